@@ -0,0 +1,175 @@
+"""Append only journal used to checkpoint long batch and sweep runs.
+
+Each completed unit of work is recorded as one JSON line, flushed to disk
+before the run moves on.  A restarted run reads the journal back and skips
+every unit already recorded.  A line left incomplete by a crash is cut off
+when the journal is opened, so the next entry starts on a line of its own.
+
+title:              checkpoint
+
+date:               October 2026
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+class Journal(object):
+    """Journal of completed work items, keyed by a string.
+    """
+
+    def __init__(self, path):
+        """Constructor for the journal.  Entries already in the file are
+        loaded.
+
+        arguments:
+            path - Journal file, created if it does not exist.
+        """
+
+        self.path = path
+        self.entries = {}
+
+        if os.path.exists(path):
+            _truncateIncomplete(path)
+
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    # lines not written by record hold no work item
+                    if isinstance(entry, dict) and 'key' in entry:
+                        self.entries[entry['key']] = entry
+
+        directory = os.path.dirname(path)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._file = open(path, 'a')
+
+    def done(self, key):
+        """Check whether a work item has been completed.
+        """
+
+        return key in self.entries
+
+    def state(self, key):
+        """Get the recorded state of a completed work item.
+
+        returns:
+            The dictionary recorded for the item, or None.
+        """
+
+        return self.entries.get(key)
+
+    def record(self, key, **state):
+        """Record a work item as completed, with any state needed to resume
+        without redoing it.  The entry is on disk when this returns.
+
+        arguments:
+            key - Key of the work item.
+            state - JSON serializable values to record with it.
+        """
+
+        self.recordAll([(key, state)])
+
+    def recordAll(self, items):
+        """Record several work items as completed with a single write to disk.
+
+        arguments:
+            items - List of (key, state dictionary) pairs.
+        """
+
+        entries = [dict(state, key=key) for key, state in items]
+
+        for entry in entries:
+            self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        for entry in entries:
+            self.entries[entry['key']] = entry
+
+    def close(self):
+        """Close the journal file.
+        """
+
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def _truncateIncomplete(path):
+    """Cut a file after its last newline, dropping a line left incomplete by
+    an interrupted write.
+    """
+
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        end = size
+
+        # search backwards for the last newline, a block at a time
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            block = f.read(end - start)
+            index = block.rfind(b'\n')
+            if index >= 0:
+                end = start + index + 1
+                break
+            end = start
+
+        if end < size:
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+
+def workKey(*parts):
+    """Build a stable key for a work item from JSON serializable parts, such
+    as an input file and the technique parameters applied to it.  Arrays
+    among the parts are keyed by the digest of their contents.
+
+    returns:
+        A hexadecimal digest string.
+    """
+
+    text = json.dumps(parts, sort_keys=True, default=_jsonDefault)
+
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def arrayDigest(array):
+    """Digest the type, shape and contents of an array, so large arrays such
+    as spectra can be part of a work key.
+
+    arguments:
+        array - Array or sequence of numbers.
+
+    returns:
+        A hexadecimal digest string.
+    """
+
+    array = np.ascontiguousarray(array)
+
+    digest = hashlib.sha1('{0}{1}'.format(array.dtype.str,
+        array.shape).encode('utf-8'))
+    digest.update(array.data)
+
+    return digest.hexdigest()
+
+def _jsonDefault(value):
+    """Serialize values json cannot, keying arrays by their contents rather
+    than their abbreviated text.
+    """
+
+    if isinstance(value, np.ndarray):
+        return arrayDigest(value)
+
+    return str(value)
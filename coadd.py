@@ -0,0 +1,147 @@
+"""Single pass coadding of measurement scans.
+
+Each scan is folded into a running mean and sum of squared deviations as it
+is read (Welford's method), so coadding holds one spectrum of state however
+many scans are taken.  The scan to scan statistics used by the coadd
+tolerance tests come from the same pass.
+
+title:              coadd
+
+date:               October 2026
+"""
+
+import numpy as np
+
+class CoaddAccumulator(object):
+    """Running mean and variance of the scans of a measurement.
+    """
+
+    def __init__(self):
+        """Constructor for the accumulator.  The spectrum length is taken
+        from the first scan added.
+        """
+
+        self.count = 0
+        self.mean = None
+        self._squares = None
+
+    def add(self, scan):
+        """Fold a scan into the coadd.
+
+        arguments:
+            scan - Array with the scan values at each wavelength.
+        """
+
+        scan = np.asarray(scan, np.float64)
+
+        if self.count == 0:
+            self.mean = np.zeros(scan.shape)
+            self._squares = np.zeros(scan.shape)
+        elif scan.shape != self.mean.shape:
+            raise ValueError('Scan length {0} does not match the coadd '
+                'length {1}'.format(scan.shape, self.mean.shape))
+
+        self.count += 1
+
+        delta = scan - self.mean
+        self.mean += delta / self.count
+        self._squares += delta * (scan - self.mean)
+
+    def merge(self, other):
+        """Fold in the scans of another accumulator, for example one that
+        coadded a different part of the same measurement.
+
+        arguments:
+            other - CoaddAccumulator.
+        """
+
+        if other.count == 0:
+            return
+
+        if self.count == 0:
+            self.count = other.count
+            self.mean = other.mean.copy()
+            self._squares = other._squares.copy()
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        self.mean += delta * (other.count / count)
+        self._squares += other._squares + delta**2 * (self.count *
+            other.count / count)
+        self.count = count
+
+    def variance(self):
+        """Get the scan to scan sample variance at each wavelength.
+        """
+
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+
+        return self._squares / (self.count - 1)
+
+    def std(self):
+        """Get the scan to scan standard deviation at each wavelength.
+        """
+
+        return np.sqrt(self.variance())
+
+    def stderr(self):
+        """Get the standard error of the coadded mean at each wavelength.
+        """
+
+        return self.std() / np.sqrt(max(self.count, 1))
+
+    def toleranceStatistic(self, lowerWave=None, upperWave=None,
+            wavelength=None):
+        """Summarize the scan to scan agreement of the coadd in the form of
+        the coadd tolerance tests of dp.calibrateDpData, a ratio near 1 for
+        scans that agree, optionally over a wavelength range.
+
+        arguments:
+            lowerWave - Lower wavelength of the range (microns).
+            upperWave - Upper wavelength of the range (microns).
+            wavelength - Wavelength of each value, needed for a range.
+
+        returns:
+            One minus the mean of the standard deviation over the absolute
+            mean, so 100 - 100 * statistic is the variation in percent
+            compared against the coadd variation tolerance.
+        """
+
+        std = self.std()
+        mean = np.abs(self.mean)
+
+        if not wavelength is None:
+            wavelength = np.asarray(wavelength)
+            inside = np.ones(len(wavelength), bool)
+            if not lowerWave is None:
+                inside &= wavelength >= lowerWave
+            if not upperWave is None:
+                inside &= wavelength <= upperWave
+            std, mean = std[inside], mean[inside]
+
+        valid = mean > 0
+        if not np.any(valid):
+            return 1.0
+
+        return float(1 - np.mean(std[valid] / mean[valid]))
+
+def coaddScans(scans):
+    """Coadd scans read one at a time.
+
+    arguments:
+        scans - Iterable of scan arrays, such as a generator reading them
+            from a file.
+
+    returns:
+        The CoaddAccumulator of the scans.
+    """
+
+    accumulator = CoaddAccumulator()
+
+    for scan in scans:
+        accumulator.add(scan)
+
+    return accumulator
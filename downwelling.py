@@ -0,0 +1,190 @@
+"""Session store of downwelling measurements.
+
+Downwelling radiance is measured a few times per session and used by many
+samples.  Each downwelling file is read once and indexed by its acquisition
+time, as given by acquisitionTime, and every sample is then given the
+downwelling nearest in time to it, or the two measured either side of it,
+without further file reads.  The downwelling is calibrated jointly with
+each sample, as in tes_batch.calibrateSessionMeasurements, so the coadd
+tolerance tests still cover the downwelling.
+
+title:              downwelling
+
+date:               October 2026
+"""
+
+import os
+import copy
+import time
+import bisect
+
+import dp_radiance_calibration as dp
+from pipeline_metrics import increment, timed
+
+# extension of downwelling measurement files
+DWR_EXTENSION = '.dwr'
+
+# attributes checked for an acquisition time recorded in a measurement.  The
+# measurement classes of dp_radiance_calibration are not documented here, so
+# these are checked if present rather than relied on.
+TIME_ATTRIBUTES = ('time', 'datetime')
+
+def acquisitionTime(measurement, path=None):
+    """Get the acquisition time of a measurement.  A time recorded in the
+    measurement read by dp.readDpFile is preferred.  Otherwise the time the
+    measurement file was last modified is used, which is the acquisition
+    time for files as the instrument writes them but changes when files are
+    copied without preserving their times (e.g. cp without -p).
+
+    arguments:
+        measurement - Measurement read by dp.readDpFile.
+        path - Measurement file, for the modification time fallback.
+
+    returns:
+        The time in seconds since the epoch.  A ValueError is raised if the
+        measurement records no time and no file is given.
+    """
+
+    for name in TIME_ATTRIBUTES:
+        value = getattr(measurement, name, None)
+        if value is None:
+            continue
+
+        if hasattr(value, 'timetuple'):
+            return time.mktime(value.timetuple()) + getattr(value,
+                'microsecond', 0) / 1e6
+
+        return float(value)
+
+    if path is None:
+        raise ValueError('The measurement does not record its acquisition '
+            'time')
+
+    return os.path.getmtime(path)
+
+class DownwellingSession(object):
+    """Downwelling measurements of a session, as read and ordered by
+    acquisition time.
+    """
+
+    def __init__(self):
+        """Constructor for the session store.
+        """
+
+        self.times = []
+        self.files = []
+        self.measurements = []
+
+        # read file versions, so a rewritten file is read again
+        self._versions = {}
+
+    def __len__(self):
+        return len(self.files)
+
+    def add(self, dwrFile):
+        """Read a downwelling file and add it to the session, unless it is
+        already in the session.
+
+        arguments:
+            dwrFile - Downwelling file.
+
+        returns:
+            The number of downwelling files in the session.
+        """
+
+        version = os.path.getmtime(dwrFile)
+        if self._versions.get(dwrFile) == version:
+            increment('downwelling_cache_total', description='Downwelling '
+                'files requested from the session.', result='hit')
+            return len(self)
+
+        increment('downwelling_cache_total', result='miss')
+
+        if dwrFile in self._versions:
+            self._remove(dwrFile)
+
+        with timed('read'):
+            dwr = dp.readDpFile(dwrFile)
+
+        acquired = acquisitionTime(dwr, dwrFile)
+
+        index = bisect.bisect_right(self.times, acquired)
+        self.times.insert(index, acquired)
+        self.files.insert(index, dwrFile)
+        self.measurements.insert(index, dwr)
+        self._versions[dwrFile] = version
+
+        return len(self)
+
+    def addDirectory(self, directory):
+        """Add every downwelling file in a directory to the session.
+
+        arguments:
+            directory - Directory holding .dwr files.
+
+        returns:
+            The number of downwelling files in the session.
+        """
+
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith(DWR_EXTENSION):
+                self.add(os.path.join(directory, name))
+
+        return len(self)
+
+    def lookup(self, acquired, interpolate=False):
+        """Choose the downwelling for a sample acquired at a given time.
+
+        arguments:
+            acquired - Acquisition time of the sample (s).
+            interpolate - Weight the downwelling measured before and after
+                linearly in time, instead of taking the nearest.  Times
+                outside the session take the nearest.
+
+        returns:
+            A list of (file, weight) pairs of the downwelling files chosen.
+        """
+
+        if len(self) == 0:
+            raise ValueError('No downwelling measurements in the session')
+
+        index = bisect.bisect_left(self.times, acquired)
+
+        if index == 0 or index == len(self):
+            return [(self.files[min(index, len(self) - 1)], 1.0)]
+
+        before, after = self.times[index - 1], self.times[index]
+
+        if interpolate:
+            fraction = (acquired - before) / (after - before) if (
+                after > before) else 0.0
+            return [(self.files[index - 1], 1 - fraction),
+                (self.files[index], fraction)]
+
+        if acquired - before <= after - acquired:
+            return [(self.files[index - 1], 1.0)]
+
+        return [(self.files[index], 1.0)]
+
+    def measurement(self, dwrFile):
+        """Get a copy of a downwelling measurement of the session, ready to be
+        calibrated, reading and adding the file first if needed.
+
+        arguments:
+            dwrFile - Downwelling file.
+
+        returns:
+            The uncalibrated downwelling.
+        """
+
+        self.add(dwrFile)
+
+        return copy.deepcopy(self.measurements[self.files.index(dwrFile)])
+
+    def _remove(self, dwrFile):
+        """Remove a file from the session.
+        """
+
+        index = self.files.index(dwrFile)
+        del self.times[index], self.files[index], self.measurements[index]
+        del self._versions[dwrFile]
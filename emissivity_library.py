@@ -0,0 +1,280 @@
+"""Matching of emissivity spectra against a library of reference spectra.
+
+The library is resampled onto the instrument wavelength grid once and
+projected onto its leading principal components.  A query is projected the
+same way, the nearest library spectra are found among the projections, and
+these candidates are ranked by their distance to the query over the full
+spectrum.  A KD-tree from SciPy is used for the projections when it is
+installed, and a vectorized search over every projection otherwise.
+References that do not cover the matching wavelengths are left out of the
+library rather than narrowing the wavelengths every other reference is
+matched over.
+
+title:              emissivity_library
+
+date:               October 2026
+"""
+
+import os
+import numpy as np
+
+import regrid
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+class EmissivityLibrary(object):
+    """Reference emissivity spectra on a common wavelength grid, indexed for
+    nearest neighbour search.
+    """
+
+    def __init__(self, names, wavelength, emissivity, components=20,
+            variance=0.9999, oversample=4):
+        """Constructor for the library index.
+
+        arguments:
+            names - Name of each reference spectrum.
+            wavelength - Wavelength grid of the spectra (microns), usually
+                the instrument grid.
+            emissivity - Array of reference emissivity, one spectrum per row.
+                Wavelengths at which any spectrum is NaN are not matched.
+            components - Largest number of principal components kept.
+            variance - Fraction of the library variance the kept components
+                must explain.
+            oversample - Number of candidates taken from the projections for
+                each match requested, before ranking by full distance.
+        """
+
+        emissivity = np.asarray(emissivity, np.float64)
+
+        if len(names) != emissivity.shape[0]:
+            raise ValueError('Expected {0} names, got {1}'.format(
+                emissivity.shape[0], len(names)))
+
+        self.names = list(names)
+        self.oversample = oversample
+
+        # names of references left out when the library was built
+        self.rejected = []
+
+        self.wavelength = np.asarray(wavelength)
+        self.valid = np.all(np.isfinite(emissivity), axis=0)
+
+        if not np.any(self.valid):
+            raise ValueError('No wavelength is covered by every reference '
+                'spectrum')
+
+        self.spectra = np.ascontiguousarray(emissivity[:, self.valid])
+
+        self.mean = np.mean(self.spectra, axis=0)
+        centred = self.spectra - self.mean
+
+        # principal components from the singular value decomposition
+        u, singular, vt = np.linalg.svd(centred, full_matrices=False)
+        explained = np.cumsum(singular**2) / max(np.sum(singular**2), 1e-300)
+        count = min(int(np.searchsorted(explained, variance)) + 1, components,
+            len(singular))
+
+        self.basis = vt[:count]
+        self.projections = centred.dot(self.basis.T)
+
+        self._tree = None
+        if not cKDTree is None:
+            self._tree = cKDTree(self.projections)
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, emissivity, wavelength=None, k=5):
+        """Find the library spectra closest to an emissivity spectrum.
+
+        arguments:
+            emissivity - Emissivity spectrum.
+            wavelength - Wavelength grid of the spectrum, if it is not the
+                grid the library was resampled to.
+            k - Number of matches.
+
+        returns:
+            A list of (name, distance) pairs, closest first.  The distance is
+            the root mean square difference over the matched wavelengths.
+        """
+
+        return self.matchAll(np.asarray(emissivity)[np.newaxis], wavelength,
+            k)[0]
+
+    def matchAll(self, emissivity, wavelength=None, k=5):
+        """Find the closest library spectra for many emissivity spectra at
+        once.
+
+        arguments:
+            emissivity - Array of emissivity spectra, one per row.
+            wavelength - Wavelength grid of the spectra, if it is not the grid
+                the library was resampled to.
+            k - Number of matches for each spectrum.
+
+        returns:
+            A list with the (name, distance) matches of each spectrum.
+        """
+
+        emissivity = np.atleast_2d(np.asarray(emissivity, np.float64))
+
+        if not wavelength is None:
+            emissivity = regrid.regrid(emissivity, wavelength, self.wavelength)
+
+        queries = emissivity[:, self.valid]
+        k = min(k, len(self))
+
+        # wavelengths a query does not cover are left out of the projection
+        centred = np.where(np.isnan(queries), 0.0, queries - self.mean)
+        candidates = self._candidates(centred.dot(self.basis.T),
+            min(k * self.oversample, len(self)))
+
+        # rank the candidates by their distance over the full spectrum
+        differences = self.spectra[candidates] - queries[:, np.newaxis, :]
+        distances = np.sqrt(np.nanmean(differences**2, axis=2))
+        order = np.argsort(distances, axis=1, kind='mergesort')[:, :k]
+
+        matches = []
+        for row in range(len(queries)):
+            matches.append([(self.names[candidates[row, i]],
+                float(distances[row, i])) for i in order[row]])
+
+        return matches
+
+    def matchStore(self, store, k=5):
+        """Match the final emissivity of every result in a result store.
+
+        arguments:
+            store - ResultStore.
+            k - Number of matches for each result.
+
+        returns:
+            A list with the (name, distance) matches of each result, in store
+            order.
+        """
+
+        matches = []
+        batch = []
+
+        def _flush():
+            if len(batch) > 0:
+                matches.extend(self.matchAll(np.array([e for w, e in batch]),
+                    batch[0][0], k))
+                del batch[:]
+
+        # results on the same wavelength grid are matched together
+        for result in store:
+            if len(batch) > 0 and not regrid.sameGrid(batch[0][0],
+                    result.wavelength):
+                _flush()
+            batch.append((result.wavelength, result.emissivity))
+
+        _flush()
+
+        return matches
+
+    def _candidates(self, projected, count):
+        """Indices of the library spectra nearest to each projected query.
+        """
+
+        if not self._tree is None:
+            distances, indices = self._tree.query(projected, count)
+            return np.asarray(indices).reshape(len(projected), count)
+
+        distances = (np.sum(projected**2, axis=1)[:, np.newaxis] -
+            2 * projected.dot(self.projections.T) +
+            np.sum(self.projections**2, axis=1))
+
+        if count >= distances.shape[1]:
+            return np.argsort(distances, axis=1)
+
+        return np.argpartition(distances, count - 1, axis=1)[:, :count]
+
+def buildLibrary(spectra, wavelength, lowerWave=None, upperWave=None,
+        **options):
+    """Resample reference spectra onto an instrument grid and index them.
+    A reference that does not cover every instrument wavelength within the
+    limits is rejected, and its name is listed in the rejected attribute of
+    the library.
+
+    arguments:
+        spectra - List of (name, wavelength, emissivity) references, each on
+            its own wavelength grid.
+        wavelength - Instrument wavelength grid (microns).
+        lowerWave - Lower wavelength limit of the matching (microns).
+        upperWave - Upper wavelength limit of the matching (microns).
+        options - Keyword arguments of EmissivityLibrary.
+
+    returns:
+        An EmissivityLibrary.  A ValueError is raised if every reference is
+        rejected.
+    """
+
+    wavelength = np.asarray(wavelength)
+    inside = np.ones(len(wavelength), bool)
+    if not lowerWave is None:
+        inside &= wavelength >= lowerWave
+    if not upperWave is None:
+        inside &= wavelength <= upperWave
+
+    if not np.any(inside):
+        raise ValueError('No instrument wavelength lies within the matching '
+            'limits')
+
+    names = []
+    emissivity = []
+    rejected = []
+
+    for name, grid, values in spectra:
+        resampled = regrid.regrid(values, grid, wavelength)
+
+        if np.all(np.isfinite(resampled[inside])):
+            names.append(name)
+            emissivity.append(resampled)
+        else:
+            rejected.append(name)
+
+    if len(names) == 0:
+        raise ValueError('No reference spectrum covers {0:.3f}-{1:.3f} '
+            'microns'.format(wavelength[inside][0], wavelength[inside][-1]))
+
+    emissivity = np.array(emissivity)
+
+    # wavelengths outside the limits are left out of the matching
+    emissivity[:, ~inside] = np.nan
+
+    library = EmissivityLibrary(names, wavelength, emissivity, **options)
+    library.rejected = rejected
+
+    return library
+
+def loadLibrary(directory, wavelength, lowerWave=None, upperWave=None,
+        **options):
+    """Read a directory of reference spectra and index them on an instrument
+    grid.  Each text file holds wavelength (microns) and emissivity columns
+    and is named after its reference.
+
+    arguments:
+        directory - Library directory.
+        wavelength - Instrument wavelength grid (microns).
+        lowerWave - Lower wavelength limit of the matching (microns).
+        upperWave - Upper wavelength limit of the matching (microns).
+        options - Keyword arguments of EmissivityLibrary.
+
+    returns:
+        An EmissivityLibrary, as from buildLibrary.
+    """
+
+    spectra = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.txt'):
+            continue
+
+        data = np.loadtxt(os.path.join(directory, name))
+        order = np.argsort(data[:, 0])
+        spectra.append((os.path.splitext(name)[0], data[order, 0],
+            data[order, 1]))
+
+    return buildLibrary(spectra, wavelength, lowerWave, upperWave, **options)
@@ -0,0 +1,322 @@
+"""Operational metrics of the separation pipeline.
+
+Counters, gauges and latency histograms are kept per stage (file read,
+calibration, search, plotting, ...) in a process wide registry, and exported
+in the Prometheus text format, either from a local HTTP endpoint or by
+writing a file at a fixed interval.
+
+title:              pipeline_metrics
+
+date:               October 2026
+"""
+
+import os
+import time
+import bisect
+import threading
+import contextlib
+
+# upper bounds of the latency histogram buckets (s)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+    5.0, 10.0, 30.0, 60.0)
+
+# prefix of every exported metric name
+PREFIX = 'tes_'
+
+class Registry(object):
+    """Thread safe store of counters, gauges and histograms, each keyed by
+    name and labels.
+    """
+
+    def __init__(self):
+        """Constructor for the registry.
+        """
+
+        self._lock = threading.Lock()
+        self._descriptions = {}
+        self._types = {}
+        self._values = {}
+        self._histograms = {}
+
+    def increment(self, name, amount=1, description='', **labels):
+        """Add to a counter.
+
+        arguments:
+            name - Metric name.
+            amount - Amount to add.
+            description - Description of the metric.
+            labels - Label values, e.g. stage='read'.
+        """
+
+        key = (name, _labelKey(labels))
+
+        with self._lock:
+            self._declare(name, 'counter', description)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, description='', **labels):
+        """Set a gauge, such as a queue depth.
+        """
+
+        key = (name, _labelKey(labels))
+
+        with self._lock:
+            self._declare(name, 'gauge', description)
+            self._values[key] = value
+
+    def observe(self, name, value, description='', buckets=LATENCY_BUCKETS,
+            **labels):
+        """Record an observation in a histogram.
+
+        arguments:
+            name - Metric name.
+            value - Observed value, e.g. a latency (s).
+            description - Description of the metric.
+            buckets - Upper bounds of the histogram buckets.
+            labels - Label values.
+        """
+
+        key = (name, _labelKey(labels))
+
+        with self._lock:
+            self._declare(name, 'histogram', description)
+
+            if key not in self._histograms:
+                self._histograms[key] = (tuple(buckets),
+                    [0] * (len(buckets) + 1), [0.0])
+
+            bounds, counts, total = self._histograms[key]
+            counts[bisect.bisect_left(bounds, value)] += 1
+            total[0] += value
+
+    def value(self, name, **labels):
+        """Get the current value of a counter or gauge, or zero.
+        """
+
+        with self._lock:
+            return self._values.get((name, _labelKey(labels)), 0)
+
+    def render(self):
+        """Format every metric in the Prometheus text exposition format.
+
+        returns:
+            The metrics text.
+        """
+
+        lines = []
+
+        with self._lock:
+            for name in sorted(self._types):
+                fullName = PREFIX + name
+                lines.append('# HELP {0} {1}'.format(fullName,
+                    self._descriptions[name] or name))
+                lines.append('# TYPE {0} {1}'.format(fullName,
+                    self._types[name]))
+
+                for (metric, labels), value in sorted(self._values.items()):
+                    if metric == name:
+                        lines.append('{0}{1} {2}'.format(fullName,
+                            _formatLabels(labels), _formatValue(value)))
+
+                for (metric, labels), (bounds, counts, total) in sorted(
+                        self._histograms.items()):
+                    if metric != name:
+                        continue
+
+                    cumulative = 0
+                    for bound, count in zip(bounds + ('+Inf',), counts):
+                        cumulative += count
+                        lines.append('{0}_bucket{1} {2}'.format(fullName,
+                            _formatLabels(labels + (('le',
+                            _formatValue(bound)),)), cumulative))
+                    lines.append('{0}_sum{1} {2}'.format(fullName,
+                        _formatLabels(labels), _formatValue(total[0])))
+                    lines.append('{0}_count{1} {2}'.format(fullName,
+                        _formatLabels(labels), cumulative))
+
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """Discard every metric.
+        """
+
+        with self._lock:
+            self._descriptions.clear()
+            self._types.clear()
+            self._values.clear()
+            self._histograms.clear()
+
+    def _declare(self, name, kind, description):
+        """Record the type and description of a metric on first use.
+        """
+
+        if self._types.setdefault(name, kind) != kind:
+            raise ValueError('Metric {0} is a {1}, not a {2}'.format(name,
+                self._types[name], kind))
+        if description or name not in self._descriptions:
+            self._descriptions[name] = description
+
+# registry used by the pipeline modules
+registry = Registry()
+
+@contextlib.contextmanager
+def timed(stage, **labels):
+    """Time a pipeline stage, recording its latency and counting its runs
+    and failures.
+
+    arguments:
+        stage - Stage name, e.g. 'read', 'calibrate', 'search' or 'plot'.
+        labels - Further label values, e.g. technique.
+    """
+
+    start = time.time()
+
+    try:
+        yield
+    except Exception:
+        registry.increment('stage_errors_total',
+            description='Failed runs of each pipeline stage.', stage=stage,
+            **labels)
+        raise
+    finally:
+        registry.observe('stage_seconds', time.time() - start,
+            description='Latency of each pipeline stage (s).', stage=stage,
+            **labels)
+
+def increment(name, amount=1, description='', **labels):
+    """Add to a counter of the pipeline registry.
+    """
+
+    registry.increment(name, amount, description, **labels)
+
+def setGauge(name, value, description='', **labels):
+    """Set a gauge of the pipeline registry.
+    """
+
+    registry.set(name, value, description, **labels)
+
+def serve(port=9464, host='127.0.0.1'):
+    """Serve the pipeline metrics over HTTP from a background thread.
+
+    arguments:
+        port - Port to listen on, or 0 for any free port.
+        host - Address to listen on, local only by default.
+
+    returns:
+        The HTTP server.  Its server_address holds the port in use, and
+        shutdown() stops it.
+    """
+
+    try:
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+    except ImportError:
+        from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type',
+                'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer((host, port), _Handler)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    return server
+
+class FileExporter(object):
+    """Writes the pipeline metrics to a file at a fixed interval, e.g. for
+    the node exporter textfile collector.  Each write replaces the file
+    atomically.  A failed write is kept in the error attribute, and writing
+    is tried again at the next interval.
+    """
+
+    def __init__(self, path, interval=15.0):
+        """Constructor for the exporter.  Writing starts immediately.
+
+        arguments:
+            path - Metrics file.
+            interval - Time between writes (s).
+        """
+
+        self.path = path
+        self.interval = interval
+
+        # error of the last write, None once a write succeeds
+        self.error = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self):
+        """Write the metrics now.
+        """
+
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            f.write(registry.render())
+        os.rename(temporary, self.path)
+
+    def stop(self):
+        """Stop writing, after a final write.
+        """
+
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        """Write the metrics until stopped.
+        """
+
+        while True:
+            self._tryWrite()
+            if self._stop.wait(self.interval):
+                self._tryWrite()
+                return
+
+    def _tryWrite(self):
+        """Write the metrics, keeping any I/O error rather than ending the
+        writing thread.
+        """
+
+        try:
+            self.write()
+            self.error = None
+        except (IOError, OSError) as error:
+            self.error = error
+
+def _labelKey(labels):
+    """Hashable, ordered form of a label dictionary.
+    """
+
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+def _formatLabels(labels):
+    """Format labels as {name="value",...}.
+    """
+
+    if len(labels) == 0:
+        return ''
+
+    return '{' + ','.join('{0}="{1}"'.format(k, v.replace('\\', '\\\\')
+        .replace('"', '\\"').replace('\n', '\\n')) for k, v in labels) + '}'
+
+def _formatValue(value):
+    """Format a sample value.
+    """
+
+    if isinstance(value, float):
+        return repr(value)
+
+    return str(value)
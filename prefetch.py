@@ -0,0 +1,66 @@
+"""Bounded read ahead of input files, overlapping file I/O with computation.
+
+A pool of I/O threads loads the items following the one being processed.
+At most a fixed number of items are loaded or loading at any time, and a new
+load is only started when the consumer takes a loaded item, so memory stays
+bounded whatever the length of the batch.
+
+title:              prefetch
+
+date:               October 2026
+"""
+
+import collections
+import concurrent.futures
+
+from pipeline_metrics import timed, setGauge
+
+def prefetch(load, items, depth=4, threads=2):
+    """Load items ahead of the consumer, in order.
+
+    arguments:
+        load - Function loading one item, called from the I/O threads.
+        items - Iterable of items to load.
+        depth - Largest number of items loaded or loading ahead of the
+            consumer.
+        threads - Number of I/O threads.
+
+    returns:
+        A generator of (item, loaded) pairs in the order of items.  An error
+        raised by load is raised when its item is reached.
+    """
+
+    items = iter(items)
+    pending = collections.deque()
+
+    pool = concurrent.futures.ThreadPoolExecutor(max(1, threads))
+
+    try:
+        for item in items:
+            pending.append((item, pool.submit(load, item)))
+            if len(pending) >= max(1, depth):
+                break
+
+        while len(pending) > 0:
+            item, future = pending.popleft()
+
+            # time spent waiting here means the reads are the bottleneck
+            with timed('read_wait'):
+                loaded = future.result()
+
+            setGauge('prefetch_ready_items', sum(f.done() for i, f in
+                pending), description='Items loaded ahead and waiting for '
+                'the consumer.')
+
+            # the slot just freed starts the next load before the consumer
+            # works on this item
+            for following in items:
+                pending.append((following, pool.submit(load, following)))
+                break
+
+            yield item, loaded
+    finally:
+        # a consumer that stops early leaves loads that are never used
+        for item, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
@@ -0,0 +1,263 @@
+"""Resampling of spectra measured on mismatched wavelength grids.
+
+A sparse resampling matrix is built once for each pair of source and target
+grids and cached, then applied to any number of spectra with a single sparse
+product.  Target samples that are finer than the source grid are linearly
+interpolated, and target samples that span several source samples average
+them (binning), so resolution is reduced without aliasing.
+
+title:              regrid
+
+date:               October 2026
+"""
+
+import copy
+import hashlib
+import collections
+import numpy as np
+
+from pipeline_metrics import increment
+
+# number of resampling matrices kept in the cache
+CACHE_SIZE = 32
+
+_cache = collections.OrderedDict()
+
+class Regridder(object):
+    """Sparse resampling matrix from a source wavelength grid to a target
+    wavelength grid, stored in compressed row form.
+    """
+
+    def __init__(self, source, target):
+        """Constructor for the resampling matrix.
+
+        arguments:
+            source - Monotonic source wavelength grid (microns).
+            target - Monotonic target wavelength grid (microns).
+        """
+
+        source = np.asarray(source, np.float64)
+        target = np.asarray(target, np.float64)
+
+        self.sourceSize = len(source)
+        self.targetSize = len(target)
+
+        # work on the source in ascending order and map back afterwards
+        order = np.argsort(source, kind='mergesort')
+        ascending = source[order]
+
+        edges = _edges(target)
+        lowerEdges = np.minimum(edges[:-1], edges[1:])
+        upperEdges = np.maximum(edges[:-1], edges[1:])
+
+        first = np.searchsorted(ascending, lowerEdges, 'left')
+        last = np.searchsorted(ascending, upperEdges, 'right')
+        counts = last - first
+
+        # linear interpolation where a target sample covers fewer than two
+        # source samples
+        position = np.clip(np.searchsorted(ascending, target, 'right'), 1,
+            max(self.sourceSize - 1, 1))
+        lower = ascending[position - 1]
+        upper = ascending[np.minimum(position, self.sourceSize - 1)]
+        span = np.where(upper > lower, upper - lower, 1.0)
+        fraction = np.clip((target - lower) / span, 0.0, 1.0)
+
+        self.outside = ((target < ascending[0]) | (target > ascending[-1]))
+
+        rowSizes = np.where(counts >= 2, counts, 2)
+        self.indptr = np.concatenate([[0], np.cumsum(rowSizes)]).astype(np.int64)
+        self.indices = np.zeros(self.indptr[-1], np.int64)
+        self.weights = np.zeros(self.indptr[-1], np.float64)
+
+        for row in range(self.targetSize):
+            start, stop = self.indptr[row], self.indptr[row+1]
+
+            if counts[row] >= 2:
+                self.indices[start:stop] = np.arange(first[row], last[row])
+                self.weights[start:stop] = 1.0 / counts[row]
+            else:
+                self.indices[start:stop] = [position[row] - 1,
+                    min(position[row], self.sourceSize - 1)]
+                self.weights[start:stop] = [1.0 - fraction[row], fraction[row]]
+
+        self.indices = order[self.indices]
+
+    def apply(self, values):
+        """Resample spectra onto the target grid.
+
+        arguments:
+            values - Array of spectra on the source grid, with wavelength as
+                the last axis.  Any number of spectra may be stacked along
+                the leading axes.
+
+        returns:
+            Array of spectra on the target grid, in the type of the input.
+            Target samples outside the source grid are NaN.
+        """
+
+        values = np.asarray(values)
+        dtype = np.result_type(values.dtype, np.float32)
+
+        products = values[..., self.indices] * self.weights.astype(dtype)
+        resampled = np.add.reduceat(products, self.indptr[:-1], axis=-1)
+        resampled[..., self.outside] = np.nan
+
+        return resampled
+
+def regridder(source, target):
+    """Get the cached resampling matrix for a pair of grids, building it on
+    first use.
+
+    arguments:
+        source - Source wavelength grid (microns).
+        target - Target wavelength grid (microns).
+
+    returns:
+        A Regridder.
+    """
+
+    key = (_gridKey(source), _gridKey(target))
+
+    if key in _cache:
+        _cache[key] = _cache.pop(key)
+        increment('regrid_cache_total', description='Resampling matrix '
+            'lookups.', result='hit')
+    else:
+        increment('regrid_cache_total', result='miss')
+        _cache[key] = Regridder(source, target)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return _cache[key]
+
+def sameGrid(source, target):
+    """Check whether two wavelength grids are identical.
+    """
+
+    return (len(source) == len(target) and
+        np.array_equal(np.asarray(source), np.asarray(target)))
+
+def regrid(values, source, target):
+    """Resample spectra from one wavelength grid to another.
+
+    arguments:
+        values - Array of spectra on the source grid, wavelength last.
+        source - Source wavelength grid (microns).
+        target - Target wavelength grid (microns).
+
+    returns:
+        Array of spectra on the target grid.
+    """
+
+    if sameGrid(source, target):
+        return np.asarray(values)
+
+    return regridder(source, target).apply(values)
+
+def matchGrid(data, wavelength):
+    """Resample the spectrum of a radiance measurement onto a wavelength grid
+    in place, if it is not already on that grid.
+
+    arguments:
+        data - Measurement object with a spectrum attribute, or None.
+        wavelength - Target wavelength grid (microns).
+
+    returns:
+        The same measurement object.  A ValueError is raised if the
+        measurement does not cover the whole grid, as the samples outside it
+        could only be NaN.
+    """
+
+    if not data is None and not sameGrid(data.spectrum.wavelength, wavelength):
+        resampling = regridder(data.spectrum.wavelength, wavelength)
+        if np.any(resampling.outside):
+            raise ValueError('Spectrum covers {0:.3f}-{1:.3f} microns, which '
+                'does not cover the grid {2:.3f}-{3:.3f} microns'.format(
+                np.min(data.spectrum.wavelength),
+                np.max(data.spectrum.wavelength), np.min(wavelength),
+                np.max(wavelength)))
+
+        data.spectrum.value = resampling.apply(data.spectrum.value)
+        data.spectrum.wavelength = np.array(wavelength)
+
+    return data
+
+def binnedGrid(wavelength, binWidth):
+    """Build a coarser grid of evenly spaced bins covering a wavelength grid.
+
+    arguments:
+        wavelength - Monotonic wavelength grid (microns).
+        binWidth - Width of each bin (microns).
+
+    returns:
+        The bin centres, in the order of the input grid.  The input grid is
+        returned unchanged if it is already as coarse as the bins.
+    """
+
+    wavelength = np.asarray(wavelength)
+
+    if len(wavelength) < 2 or not binWidth > np.median(np.abs(np.diff(
+            wavelength))):
+        return wavelength
+
+    lower, upper = np.min(wavelength), np.max(wavelength)
+    count = max(int(np.floor((upper - lower) / binWidth)), 1)
+    centres = lower + binWidth * (np.arange(count) + 0.5)
+
+    if wavelength[0] > wavelength[-1]:
+        centres = centres[::-1]
+
+    return centres
+
+def binMeasurement(data, binWidth):
+    """Reduce the spectral resolution of a radiance measurement by averaging
+    its spectrum into bins.
+
+    arguments:
+        data - Measurement object with a spectrum attribute, or None.
+        binWidth - Width of each bin (microns).
+
+    returns:
+        A copy of the measurement with the binned spectrum.  The original
+        measurement is not changed.
+    """
+
+    if data is None:
+        return None
+
+    binned = copy.copy(data)
+    binned.spectrum = copy.copy(data.spectrum)
+
+    wavelength = binnedGrid(data.spectrum.wavelength, binWidth)
+    binned.spectrum.value = regrid(data.spectrum.value,
+        data.spectrum.wavelength, wavelength)
+    binned.spectrum.wavelength = np.array(wavelength)
+
+    return binned
+
+def clearCache():
+    """Discard every cached resampling matrix.
+    """
+
+    _cache.clear()
+
+def _gridKey(grid):
+    """Hashable key identifying the contents of a wavelength grid.
+    """
+
+    grid = np.ascontiguousarray(grid, np.float64)
+
+    return (len(grid), hashlib.sha1(grid.tobytes()).hexdigest())
+
+def _edges(grid):
+    """Edges of the bins centered on each sample of a grid.
+    """
+
+    if len(grid) < 2:
+        return np.array([grid[0], grid[0]], np.float64)
+
+    middle = (grid[:-1] + grid[1:]) / 2
+
+    return np.concatenate([[grid[0] - (middle[0] - grid[0])], middle,
+        [grid[-1] + (grid[-1] - middle[-1])]])
@@ -0,0 +1,248 @@
+"""Overlay of many stored emissivity and metric curves.
+
+Every curve of a result store is drawn by a single LineCollection for the
+emissivity and another for the metric, which matplotlib renders far faster
+than one line per curve.  Filtering by sample, technique or temperature
+replaces the segments shown by the collections, without rebuilding the
+figure.  Long curves are reduced to the minimum and maximum of each of a
+fixed number of buckets, which keeps their features at screen resolution
+with a fraction of the points to render.
+
+title:              result_overlay
+
+date:               October 2026
+"""
+
+import os
+import numpy as np
+
+import tes_search
+
+# largest number of points kept for each drawn curve
+MAX_POINTS = 1000
+
+# emissivity range shown, as on the emissivity plot of the GUI
+EMISSIVITY_LIMITS = (-0.2, 1.2)
+
+class OverlayData(object):
+    """Curves and descriptions of every result in a store, prepared for
+    drawing as line collections.
+    """
+
+    def __init__(self, store, maxPoints=MAX_POINTS):
+        """Constructor for the overlay data.
+
+        arguments:
+            store - ResultStore.
+            maxPoints - Largest number of points kept for each curve.
+        """
+
+        self.emissivity = []
+        self.metric = []
+        self.samples = []
+        self.techniques = []
+        temperatures = []
+
+        for result in store:
+            self.emissivity.append(_decimate(np.column_stack([
+                result.wavelength, result.emissivity]), maxPoints))
+
+            # metrics have different units, so each is relative to its
+            # minimum, skipping temperatures a hybrid search left as NaN
+            metric = np.asarray(result.metric, np.float64)
+            temps = tes_search.temperatureGrid(result.lowerTemp,
+                result.upperTemp)
+            if len(temps) != len(metric):
+                temps = np.linspace(result.lowerTemp, result.upperTemp,
+                    len(metric))
+            if np.any(np.isfinite(metric)) and np.nanmin(metric) > 0:
+                metric = metric / np.nanmin(metric)
+            else:
+                metric = np.full(len(metric), np.nan)
+            self.metric.append(_decimate(np.column_stack([temps, metric]),
+                maxPoints))
+
+            provenance = result.provenance
+            self.samples.append(os.path.basename(str(provenance.get('sam',
+                ''))))
+            self.techniques.append(str(provenance.get('technique', '')))
+            temperatures.append(result.temperature)
+
+        self.temperatures = np.array(temperatures)
+
+    def __len__(self):
+        return len(self.temperatures)
+
+    def select(self, samples=None, techniques=None, lowerTemp=None,
+            upperTemp=None):
+        """Find the results passing a filter.
+
+        arguments:
+            samples - Sample names to keep, or None for all.
+            techniques - Technique names to keep, or None for all.
+            lowerTemp - Lowest estimated temperature to keep (K), or None.
+            upperTemp - Highest estimated temperature to keep (K), or None.
+
+        returns:
+            Array of the indices of the results kept.
+        """
+
+        keep = np.ones(len(self), bool)
+
+        if not samples is None:
+            keep &= np.array([s in samples for s in self.samples], bool)
+        if not techniques is None:
+            keep &= np.array([t in techniques for t in self.techniques], bool)
+        if not lowerTemp is None:
+            keep &= self.temperatures >= lowerTemp
+        if not upperTemp is None:
+            keep &= self.temperatures <= upperTemp
+
+        return np.flatnonzero(keep)
+
+class Overlay(object):
+    """Emissivity and metric line collections drawn on a pair of axes.
+    """
+
+    def __init__(self, data, emissivityAxis, metricAxis, alpha=0.3):
+        """Constructor for the overlay.  Every curve is shown at first.
+
+        arguments:
+            data - OverlayData.
+            emissivityAxis - Axis for the emissivity curves.
+            metricAxis - Axis for the metric curves.
+            alpha - Opacity of each curve.
+        """
+
+        from matplotlib.collections import LineCollection
+
+        self.data = data
+
+        # curves are coloured by their estimated temperature
+        self.emissivityLines = LineCollection(data.emissivity, alpha=alpha,
+            linewidths=0.8, cmap='viridis')
+        self.metricLines = LineCollection(data.metric, alpha=alpha,
+            linewidths=0.8, cmap='viridis')
+
+        for lines, axis in [(self.emissivityLines, emissivityAxis),
+                (self.metricLines, metricAxis)]:
+            lines.set_array(data.temperatures)
+            if len(data) > 0:
+                lines.set_clim(np.min(data.temperatures),
+                    np.max(data.temperatures))
+            axis.add_collection(lines)
+
+        emissivityAxis.set_xlabel('Wavelength (microns)')
+        emissivityAxis.set_ylabel('Emissivity')
+        metricAxis.set_xlabel('Temperature (K)')
+        metricAxis.set_ylabel('Metric relative to minimum')
+        metricAxis.set_yscale('log')
+
+        self.emissivityAxis = emissivityAxis
+        self.metricAxis = metricAxis
+        self.shown = np.arange(len(data))
+
+        self._limits()
+
+    def show(self, indices):
+        """Show only some of the curves.
+
+        arguments:
+            indices - Indices of the results to show, e.g. from
+                OverlayData.select.
+        """
+
+        self.shown = np.asarray(indices, np.int64)
+
+        for lines, curves in [(self.emissivityLines, self.data.emissivity),
+                (self.metricLines, self.data.metric)]:
+            lines.set_segments([curves[i] for i in self.shown])
+            lines.set_array(self.data.temperatures[self.shown])
+
+    def colorbar(self, figure):
+        """Add a colorbar of the estimated temperatures to a figure.
+
+        arguments:
+            figure - Figure holding the axes of the overlay.
+
+        returns:
+            The colorbar, or None if there are no results to colour.
+        """
+
+        if len(self.data) == 0:
+            return None
+
+        return figure.colorbar(self.emissivityLines, ax=self.metricAxis,
+            label='Estimated temperature (K)')
+
+    def _limits(self):
+        """Fit the axes to every curve, so the view stays put while
+        filtering.  The emissivity axis keeps the fixed range of the
+        emissivity plot, as the emissivity blows up where the sample and
+        downwelling radiance meet at the band edges.
+        """
+
+        self.emissivityAxis.set_ylim(EMISSIVITY_LIMITS)
+
+        for axis, curves in [(self.emissivityAxis, self.data.emissivity),
+                (self.metricAxis, self.data.metric)]:
+            if len(curves) == 0:
+                continue
+
+            points = np.concatenate(curves)
+            points = points[np.all(np.isfinite(points), axis=1)]
+            if len(points) == 0:
+                continue
+
+            axis.set_xlim(np.min(points[:, 0]), np.max(points[:, 0]))
+            if axis is self.metricAxis:
+                axis.set_ylim(np.min(points[:, 1]), np.max(points[:, 1]))
+
+def plotOverlay(store, path, **selection):
+    """Save an overlay of the curves of a result store to an image.
+
+    arguments:
+        store - ResultStore.
+        path - Output image file.
+        selection - Keyword arguments of OverlayData.select.
+    """
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=(12, 5))
+    canvas = FigureCanvasAgg(figure)
+
+    overlay = Overlay(OverlayData(store), figure.add_subplot(1, 2, 1),
+        figure.add_subplot(1, 2, 2))
+    overlay.show(overlay.data.select(**selection))
+
+    if overlay.colorbar(figure) is None:
+        figure.suptitle('No results in the store')
+    figure.tight_layout()
+    canvas.print_figure(path)
+
+def _decimate(curve, maxPoints):
+    """Reduce a curve to the minimum and maximum point of each of
+    maxPoints / 2 buckets, in order.
+    """
+
+    if len(curve) <= maxPoints:
+        return curve
+
+    buckets = max(maxPoints // 2, 1)
+    size = -(-len(curve) // buckets)
+
+    values = np.full(buckets * size, np.nan)
+    values[:len(curve)] = curve[:, 1]
+    values = values.reshape(buckets, size)
+
+    missing = np.isnan(values)
+    lowest = np.argmin(np.where(missing, np.inf, values), axis=1)
+    highest = np.argmax(np.where(missing, -np.inf, values), axis=1)
+
+    # np.unique keeps each bucket's extremes in order along the curve
+    starts = np.arange(buckets) * size
+    keep = np.unique(np.concatenate([starts + lowest, starts + highest]))
+
+    return curve[keep[keep < len(curve)]]
@@ -0,0 +1,392 @@
+"""Chunked binary storage of temperature emissivity separation results.
+
+Results are buffered in memory up to a fixed chunk size and then written as a
+directory of .npy arrays, so long batches append to the store with constant
+memory.  Each buffered result is also saved to a pending file as soon as it
+is appended, so results are not lost if the process stops before their chunk
+is written; the next writer of the store picks them up again, and readers
+include them after the written chunks.  Arrays are read back by memory
+mapping each one when it is first accessed, and opening a store only reads
+the header of each chunk's temperature array to count its results.
+
+Layout of a store directory:
+
+    chunk-000000/
+        temperature.npy     estimated temperature of each result
+        tempLimits.npy      lower and upper search temperature of each result
+        spectrumOffsets.npy start of each result in wavelength/emissivity
+        wavelength.npy      concatenated wavelength grids
+        emissivity.npy      concatenated final emissivity
+        metricOffsets.npy   start of each result in metric
+        metric.npy          concatenated metric curves
+        provenance.json     list of provenance dictionaries
+    chunk-000001/
+        ...
+    pending/
+        chunk-000002-000000.npz  buffered results of the next chunk
+
+title:              result_store
+
+date:               October 2026
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+
+CHUNK_PREFIX = 'chunk-'
+PENDING_DIRECTORY = 'pending'
+
+class Result(object):
+    """A single separation result read from a store.  Arrays are views of the
+    memory mapped chunk.
+    """
+
+    def __init__(self, temperature, lowerTemp, upperTemp, wavelength,
+            emissivity, metric, provenance):
+        """Constructor for a result.
+        """
+
+        self.temperature = temperature
+        self.lowerTemp = lowerTemp
+        self.upperTemp = upperTemp
+        self.wavelength = wavelength
+        self.emissivity = emissivity
+        self.metric = metric
+        self.provenance = provenance
+
+class ResultWriter(object):
+    """Appends results to a store directory one chunk at a time.
+    """
+
+    def __init__(self, path, chunkSize=64):
+        """Constructor for the writer.  Results already in the store are kept
+        and new chunks are numbered after them.  Pending results left by an
+        earlier writer are buffered again.
+
+        arguments:
+            path - Store directory, created if it does not exist.
+            chunkSize - Number of results buffered before a chunk is written.
+        """
+
+        self.path = path
+        self.chunkSize = chunkSize
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        self.nextChunk = len(_chunkNames(path))
+        self._buffer = _readPending(path, self.nextChunk)
+
+    def append(self, temperature, wavelength, emissivity, metric, lowerTemp,
+            upperTemp, provenance=None):
+        """Add a result to the store, writing a chunk when the buffer is full.
+        The result is saved to a pending file before this returns.
+
+        arguments:
+            temperature - Estimated sample temperature (K).
+            wavelength - Wavelength grid of the emissivity (microns).
+            emissivity - Final emissivity at the estimated temperature.
+            metric - Metric curve over the search temperatures.
+            lowerTemp - Lower search temperature limit (K).
+            upperTemp - Upper search temperature limit (K).
+            provenance - Dictionary describing how the result was made, e.g.
+                input files, technique and its parameters.
+
+        returns:
+            The provenance of the results written by this call, if a chunk
+            was written, otherwise an empty list.
+        """
+
+        self._buffer.append((float(temperature), float(lowerTemp),
+            float(upperTemp), np.asarray(wavelength), np.asarray(emissivity),
+            np.asarray(metric), dict(provenance or {})))
+        _writePending(self.path, self.nextChunk, len(self._buffer) - 1,
+            self._buffer[-1])
+
+        if len(self._buffer) >= self.chunkSize:
+            return self.flush()
+
+        return []
+
+    def pending(self):
+        """Get the provenance of the buffered results not yet in a chunk.
+        """
+
+        return [result[-1] for result in self._buffer]
+
+    def flush(self):
+        """Write any buffered results as a new chunk.
+
+        returns:
+            The provenance of the results written.
+        """
+
+        if len(self._buffer) == 0:
+            return []
+
+        name = '{0}{1:06d}'.format(CHUNK_PREFIX, self.nextChunk)
+        _writeChunk(self.path, name, self._buffer)
+
+        # pending files of a written chunk are ignored if this is interrupted
+        shutil.rmtree(os.path.join(self.path, PENDING_DIRECTORY),
+            ignore_errors=True)
+
+        written = [result[-1] for result in self._buffer]
+
+        self.nextChunk += 1
+        self._buffer = []
+
+        return written
+
+    def close(self):
+        """Write any buffered results.
+        """
+
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class ResultStore(object):
+    """Read access to a store directory.  Chunk arrays are memory mapped when
+    first accessed.
+    """
+
+    def __init__(self, path):
+        """Constructor for the store reader.
+
+        arguments:
+            path - Store directory.
+        """
+
+        self.path = path
+        self.chunks = _chunkNames(path)
+
+        self._loaded = {}
+        self._sizes = [_chunkSize(os.path.join(path, name))
+            for name in self.chunks]
+
+        # results saved by a writer but not yet written as a chunk
+        pending = _readPending(path, len(self.chunks))
+        if len(pending) > 0:
+            self._loaded[PENDING_DIRECTORY] = _chunkArrays(pending)
+            self.chunks = self.chunks + [PENDING_DIRECTORY]
+            self._sizes.append(len(pending))
+
+    def __len__(self):
+        return sum(self._sizes)
+
+    def __iter__(self):
+        for name in self.chunks:
+            chunk = self._chunk(name)
+            for i in range(len(chunk['temperature'])):
+                yield _result(chunk, i)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Result index out of range')
+
+        for name, size in zip(self.chunks, self._sizes):
+            if index < size:
+                return _result(self._chunk(name), index)
+            index -= size
+
+    def temperatures(self):
+        """Gather the estimated temperature of every result.
+
+        returns:
+            Array of temperatures (K).
+        """
+
+        if len(self.chunks) == 0:
+            return np.zeros(0)
+
+        return np.concatenate([self._chunk(name)['temperature']
+            for name in self.chunks])
+
+    def provenance(self):
+        """Gather the provenance of every result.
+
+        returns:
+            List of provenance dictionaries.
+        """
+
+        provenance = []
+        for name in self.chunks:
+            provenance.extend(self._chunk(name)['provenance'])
+
+        return provenance
+
+    def _chunk(self, name):
+        """Get a chunk, whose arrays are memory mapped when first accessed.
+        """
+
+        if name not in self._loaded:
+            self._loaded[name] = _Chunk(os.path.join(self.path, name))
+
+        return self._loaded[name]
+
+class _Chunk(object):
+    """Fields of a written chunk, each array memory mapped and the provenance
+    read when first accessed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._fields = {}
+
+    def __getitem__(self, field):
+        if field not in self._fields:
+            if field == 'provenance':
+                with open(os.path.join(self.directory, 'provenance.json')) as f:
+                    self._fields[field] = json.load(f)
+            else:
+                self._fields[field] = np.load(os.path.join(self.directory,
+                    field + '.npy'), mmap_mode='r')
+
+        return self._fields[field]
+
+def _chunkNames(path):
+    """List the completed chunks of a store in order.
+    """
+
+    if not os.path.isdir(path):
+        return []
+
+    return sorted(name for name in os.listdir(path)
+        if name.startswith(CHUNK_PREFIX) and not name.endswith('.tmp'))
+
+def _chunkSize(directory):
+    """Count the results of a written chunk from the header of its
+    temperature array, without mapping the array.
+    """
+
+    with open(os.path.join(directory, 'temperature.npy'), 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape = np.lib.format.read_array_header_1_0(f)[0]
+        else:
+            shape = np.lib.format.read_array_header_2_0(f)[0]
+
+    return shape[0]
+
+def _offsets(arrays):
+    """Start offsets of a list of arrays when concatenated, with the total
+    length appended.
+    """
+
+    return np.concatenate([[0], np.cumsum([len(a) for a in arrays])]).astype(np.int64)
+
+def _chunkArrays(results):
+    """Gather a list of buffered results into the fields of a chunk.
+    """
+
+    temperature, lowerTemp, upperTemp, wavelength, emissivity, metric, \
+        provenance = zip(*results)
+
+    return {
+        'temperature': np.array(temperature),
+        'tempLimits': np.column_stack([lowerTemp, upperTemp]),
+        'spectrumOffsets': _offsets(emissivity),
+        'wavelength': np.concatenate(wavelength),
+        'emissivity': np.concatenate(emissivity),
+        'metricOffsets': _offsets(metric),
+        'metric': np.concatenate(metric),
+        'provenance': list(provenance),
+    }
+
+def _writeChunk(path, name, results):
+    """Write a list of buffered results as a chunk.  The chunk is written to a
+    temporary directory and renamed into place, so a store never contains a
+    partially written chunk.
+    """
+
+    arrays = _chunkArrays(results)
+    provenance = arrays.pop('provenance')
+
+    final = os.path.join(path, name)
+    temporary = final + '.tmp'
+
+    if os.path.isdir(temporary):
+        shutil.rmtree(temporary)
+    os.makedirs(temporary)
+
+    for field, values in arrays.items():
+        np.save(os.path.join(temporary, field + '.npy'), values)
+
+    with open(os.path.join(temporary, 'provenance.json'), 'w') as f:
+        json.dump(list(provenance), f)
+
+    os.rename(temporary, final)
+
+def _writePending(path, chunk, index, result):
+    """Save a buffered result to the pending directory of a store.  The file
+    is synced to disk and renamed into place, so a pending file is always
+    complete.
+    """
+
+    directory = os.path.join(path, PENDING_DIRECTORY)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    temperature, lowerTemp, upperTemp, wavelength, emissivity, metric, \
+        provenance = result
+
+    final = os.path.join(directory, '{0}{1:06d}-{2:06d}.npz'.format(
+        CHUNK_PREFIX, chunk, index))
+    temporary = final + '.tmp'
+
+    with open(temporary, 'wb') as f:
+        np.savez(f, temperature=temperature,
+            tempLimits=[lowerTemp, upperTemp], wavelength=wavelength,
+            emissivity=emissivity, metric=metric,
+            provenance=json.dumps(provenance))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.rename(temporary, final)
+
+def _readPending(path, chunk):
+    """Load the pending results of the next chunk of a store, in order.
+    Pending files of chunks that were already written are left over from an
+    interrupted flush and are ignored.
+    """
+
+    directory = os.path.join(path, PENDING_DIRECTORY)
+    if not os.path.isdir(directory):
+        return []
+
+    prefix = '{0}{1:06d}-'.format(CHUNK_PREFIX, chunk)
+    results = []
+
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(prefix) and name.endswith('.npz')):
+            continue
+
+        with np.load(os.path.join(directory, name)) as pending:
+            results.append((float(pending['temperature']),
+                float(pending['tempLimits'][0]),
+                float(pending['tempLimits'][1]), pending['wavelength'],
+                pending['emissivity'], pending['metric'],
+                json.loads(str(pending['provenance']))))
+
+    return results
+
+def _result(chunk, i):
+    """Build the result at a position within a chunk.
+    """
+
+    spectrum = slice(chunk['spectrumOffsets'][i], chunk['spectrumOffsets'][i+1])
+    metric = slice(chunk['metricOffsets'][i], chunk['metricOffsets'][i+1])
+
+    return Result(float(chunk['temperature'][i]),
+        float(chunk['tempLimits'][i, 0]), float(chunk['tempLimits'][i, 1]),
+        chunk['wavelength'][spectrum], chunk['emissivity'][spectrum],
+        chunk['metric'][metric], chunk['provenance'][i])
@@ -0,0 +1,255 @@
+"""Offline rendering of the emissivity search animation to a video or GIF
+file.
+
+An export runs in a separate Python process whose main module is this one,
+so the worker processes it spawns import only this module, never the GUI or
+Qt.  Frames are drawn with the Agg backend in a pool of worker processes,
+each worker computing the emissivity of its own share of the search
+temperatures, and the frames are then streamed from disk into a single file
+by ffmpeg.  The GUI waits for the export on a background thread, so it
+remains responsive.
+
+title:              search_animation
+
+date:               October 2026
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+import tes_search
+from wave_index import WavelengthIndex
+
+# frame size in inches and resolution, giving an even pixel size for encoders
+FRAME_SIZE = (8, 6)
+FRAME_DPI = 100
+
+FRAME_NAME = 'frame-{0:05d}.png'
+
+# single background thread that coordinates exports for the GUI
+_exporter = concurrent.futures.ThreadPoolExecutor(1)
+
+def ffmpegAvailable():
+    """Check whether ffmpeg, which encodes every export, is on the PATH.
+
+    returns:
+        True if ffmpeg was found.
+    """
+
+    return not shutil.which('ffmpeg') is None
+
+def exportSearchAnimation(path, sam, dwr, lowerTemp, upperTemp, temp,
+        emissivity, wave, fps=10, workers=None, dtype=np.float64, lowerWave=8,
+        upperWave=14):
+    """Start rendering the emissivity search animation in the background.
+
+    arguments:
+        path - Output file, either a .gif or any video type ffmpeg can write.
+        sam - Calibrated sample.
+        dwr - Calibrated downwelling, or None.
+        lowerTemp - Lower search temperature limit (K).
+        upperTemp - Upper search temperature limit (K).
+        temp - Estimated sample temperature (K).
+        emissivity - Final emissivity across the sample spectrum at the
+            estimated temperature.
+        wave - List of [lower, upper] wavelength bands to shade (microns).
+        fps - Frame rate of the output file.
+        workers - Number of worker processes, defaults to the CPU count.
+        dtype - Working precision.
+        lowerWave - Lower wavelength of the plot (microns).
+        upperWave - Upper wavelength of the plot (microns).
+
+    returns:
+        A Future resolving to the number of frames rendered and the rendering
+        rate in frames per second.  A RuntimeError is raised at once if
+        ffmpeg is not installed.
+    """
+
+    if not ffmpegAvailable():
+        raise RuntimeError('ffmpeg was not found on the PATH')
+
+    waveIndex = WavelengthIndex(sam.spectrum.wavelength)
+
+    inputs = {'path': path,
+        'samRadiance': waveIndex.view(sam.spectrum.value, lowerWave,
+            upperWave),
+        'wavelength': waveIndex.view(sam.spectrum.wavelength, lowerWave,
+            upperWave),
+        'temps': tes_search.temperatureGrid(lowerTemp, upperTemp),
+        'finalEmissivity': waveIndex.view(emissivity, lowerWave, upperWave),
+        'wave': np.reshape(np.asarray(wave, np.float64), (-1, 2)),
+        'fps': fps, 'workers': workers or 0, 'dtype': np.dtype(dtype).str,
+        'waveLimits': (lowerWave, upperWave)}
+    if not dwr is None:
+        inputs['dwrRadiance'] = waveIndex.view(dwr.spectrum.value, lowerWave,
+            upperWave)
+
+    # the inputs are handed to the export process in a file
+    handle, inputPath = tempfile.mkstemp(prefix='tes_animation_',
+        suffix='.npz')
+    with os.fdopen(handle, 'wb') as f:
+        np.savez(f, **inputs)
+
+    return _exporter.submit(_runExport, inputPath)
+
+def renderSearchAnimation(path, samRadiance, dwrRadiance, wavelength, temps,
+        finalEmissivity, wave, fps=10, workers=None, dtype=np.float64,
+        waveLimits=(8, 14)):
+    """Render the emissivity search animation to a file, splitting the frames
+    across a pool of worker processes.
+
+    arguments:
+        path - Output file, either a .gif or any video type ffmpeg can write.
+        samRadiance - Calibrated sample radiance.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        temps - Array of search temperatures (K), one frame each.
+        finalEmissivity - Final emissivity over the wavelengths.
+        wave - List of [lower, upper] wavelength bands to shade (microns).
+        fps - Frame rate of the output file.
+        workers - Number of worker processes, defaults to the CPU count.
+        dtype - Working precision.
+        waveLimits - Lower and upper wavelength of the plot (microns).
+
+    returns:
+        The number of frames rendered and the rendering rate in frames per
+        second.
+    """
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    directory = tempfile.mkdtemp(prefix='tes_animation_')
+
+    try:
+        chunks = [indices for indices in
+            np.array_split(np.arange(len(temps)), workers * 4)
+            if len(indices) > 0]
+
+        start = time.time()
+
+        context = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(workers,
+                mp_context=context) as pool:
+            futures = [pool.submit(_renderFrames, directory, indices,
+                temps[indices], samRadiance, dwrRadiance, wavelength,
+                finalEmissivity, wave, dtype, waveLimits)
+                for indices in chunks]
+
+            for future in futures:
+                future.result()
+
+        elapsed = time.time() - start
+
+        _encode(directory, len(temps), path, fps)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return len(temps), len(temps) / max(elapsed, 1e-9)
+
+def _runExport(inputPath):
+    """Run an export in a separate process and wait for it, removing its
+    input file afterwards.
+    """
+
+    try:
+        process = subprocess.Popen([sys.executable,
+            os.path.abspath(__file__), inputPath], stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, universal_newlines=True)
+        output, errors = process.communicate()
+    finally:
+        os.remove(inputPath)
+
+    if process.returncode != 0:
+        lines = errors.strip().splitlines() or ['exit status {0}'.format(
+            process.returncode)]
+        raise RuntimeError(lines[-1])
+
+    frames, rate = output.split()
+
+    return int(frames), float(rate)
+
+def _renderFrames(directory, indices, temps, samRadiance, dwrRadiance,
+        wavelength, finalEmissivity, wave, dtype, waveLimits):
+    """Render a share of the animation frames to PNG files in a worker
+    process.
+    """
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    emissivity = tes_search.emissivitySurface(samRadiance, dwrRadiance,
+        wavelength, temps, dtype)
+
+    figure = Figure(figsize=FRAME_SIZE, dpi=FRAME_DPI)
+    canvas = FigureCanvasAgg(figure)
+
+    axis = figure.add_subplot(111)
+    axis.axis([waveLimits[0], waveLimits[1], -0.2, 1.2])
+    axis.set_xlabel('Wavelength (microns)')
+    axis.set_ylabel('Emissivity')
+
+    axis.plot(wavelength, finalEmissivity, label='Final', color='k')
+    for band in wave:
+        axis.axvspan(band[0], band[1], color='r', alpha=0.5)
+
+    line, = axis.plot([], [])
+    title = axis.text(10.8, 1.3, '', va='top')
+
+    for i in range(len(indices)):
+        line.set_data(wavelength, emissivity[i])
+        title.set_text('{0:.1f} K'.format(temps[i]))
+
+        canvas.print_png(os.path.join(directory,
+            FRAME_NAME.format(indices[i])))
+
+def _encode(directory, frames, path, fps):
+    """Encode rendered frames into a GIF or a video with ffmpeg, which reads
+    the frame files one at a time, so memory use does not grow with the
+    number of frames.
+    """
+
+    command = ['ffmpeg', '-y', '-loglevel', 'error', '-framerate', str(fps),
+        '-i', os.path.join(directory, 'frame-%05d.png')]
+
+    if path.lower().endswith('.gif'):
+        # a palette per frame, so frames need not be buffered to build a
+        # palette for the whole animation
+        command += ['-filter_complex', 'split[a][b];'
+            '[a]palettegen=stats_mode=single[p];[b][p]paletteuse=new=1',
+            '-loop', '0']
+    else:
+        command += ['-pix_fmt', 'yuv420p']
+
+    subprocess.check_call(command + [path])
+
+def main():
+    """Render an export from the input file written by
+    exportSearchAnimation, printing the number of frames and the rendering
+    rate.
+    """
+
+    inputs = np.load(sys.argv[1])
+
+    dwrRadiance = None
+    if 'dwrRadiance' in inputs.files:
+        dwrRadiance = inputs['dwrRadiance']
+
+    frames, rate = renderSearchAnimation(str(inputs['path']),
+        inputs['samRadiance'], dwrRadiance, inputs['wavelength'],
+        inputs['temps'], inputs['finalEmissivity'], inputs['wave'].tolist(),
+        int(inputs['fps']), int(inputs['workers']) or None,
+        np.dtype(str(inputs['dtype'])).type,
+        tuple(inputs['waveLimits'].tolist()))
+
+    print('{0} {1!r}'.format(frames, rate))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""Shared memory transport of calibrated spectra to worker processes.
+
+The calibration stage writes each spectrum into a named shared memory block
+once.  Worker processes receive only the small descriptor of the block and
+attach to it, so fanning work out across a process pool costs no
+serialization of the spectral arrays.
+
+title:              shared_spectra
+
+date:               October 2026
+"""
+
+import atexit
+import numpy as np
+from multiprocessing import shared_memory
+
+class SharedSpectrum(object):
+    """Wavelength and value arrays of a spectrum held in one shared memory
+    block.  Has the same wavelength and value attributes as the spectrum of a
+    radiance measurement.
+    """
+
+    def __init__(self, memory, length, dtype, owner):
+        """Constructor for the shared spectrum.  Use create or attach rather
+        than calling this directly.
+
+        arguments:
+            memory - SharedMemory block holding the spectrum.
+            length - Number of spectral samples.
+            dtype - NumPy type of the arrays.
+            owner - True if this process created the block and is
+                responsible for releasing it.
+        """
+
+        self.memory = memory
+        self.length = length
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+
+        data = np.ndarray((2, length), self.dtype, buffer=memory.buf)
+
+        self.wavelength = data[0]
+        self.value = data[1]
+
+    @classmethod
+    def create(cls, wavelength, value, dtype=None):
+        """Copy a spectrum into a new shared memory block.
+
+        arguments:
+            wavelength - Array of wavelengths (microns).
+            value - Array of radiance values.
+            dtype - NumPy type to store the arrays as, defaults to the type of
+                the value array.
+
+        returns:
+            The owning SharedSpectrum.
+        """
+
+        value = np.asarray(value)
+
+        if dtype is None:
+            dtype = value.dtype
+
+        dtype = np.dtype(dtype)
+        length = len(value)
+
+        memory = shared_memory.SharedMemory(create=True,
+            size=max(2 * length * dtype.itemsize, 1))
+
+        spectrum = cls(memory, length, dtype, True)
+        spectrum.wavelength[:] = wavelength
+        spectrum.value[:] = value
+
+        return spectrum
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Attach to a shared spectrum created by another process, without
+        copying its data.
+
+        arguments:
+            descriptor - Descriptor returned by the descriptor method of the
+                owning SharedSpectrum.
+
+        returns:
+            A non-owning SharedSpectrum viewing the shared arrays.
+        """
+
+        name, length, dtype = descriptor
+
+        memory = _attachMemory(name)
+
+        return cls(memory, length, dtype, False)
+
+    def descriptor(self):
+        """Create the picklable descriptor used by workers to attach.
+
+        returns:
+            A tuple of the block name, spectrum length and type string.
+        """
+
+        return (self.memory.name, self.length, self.dtype.str)
+
+    def close(self):
+        """Release this process' view of the spectrum, and destroy the shared
+        block if this process owns it.  Arrays previously taken from the
+        spectrum must no longer be referenced.
+        """
+
+        if self.memory is None:
+            return
+
+        del self.wavelength
+        del self.value
+
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+        self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class SharedMeasurement(object):
+    """Stand-in for a radiance measurement whose spectrum lives in shared
+    memory, accepted anywhere a measurement read by dp.readDpFile is.
+    """
+
+    def __init__(self, spectrum):
+        """Constructor for the shared measurement.
+
+        arguments:
+            spectrum - SharedSpectrum of the measurement.
+        """
+
+        self.spectrum = spectrum
+
+class SharedSpectra(object):
+    """A set of named calibrated measurements (e.g. 'sam' and 'dwr') written
+    to shared memory by the calibration stage.  Owns every block it creates.
+    """
+
+    def __init__(self, **measurements):
+        """Constructor for the shared set.
+
+        arguments:
+            measurements - Calibrated measurements keyed by name.  A value of
+                None (e.g. no downwelling) is kept as None.
+        """
+
+        self.spectra = {}
+
+        try:
+            for name, data in measurements.items():
+                if data is None:
+                    self.spectra[name] = None
+                else:
+                    self.spectra[name] = SharedSpectrum.create(
+                        data.spectrum.wavelength, data.spectrum.value)
+        except:
+            self.close()
+            raise
+
+    def descriptor(self):
+        """Create the picklable descriptor of the whole set.
+
+        returns:
+            A dictionary of spectrum descriptors keyed by name.
+        """
+
+        descriptor = {}
+
+        for name, spectrum in self.spectra.items():
+            if spectrum is None:
+                descriptor[name] = None
+            else:
+                descriptor[name] = spectrum.descriptor()
+
+        return descriptor
+
+    def close(self):
+        """Destroy every shared block in the set.
+        """
+
+        for spectrum in self.spectra.values():
+            if not spectrum is None:
+                spectrum.close()
+
+        self.spectra = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# spectra attached by this worker process, keyed by block name
+_attached = {}
+
+def attachSpectra(descriptor):
+    """Attach a worker process to a shared set of measurements.  Each block is
+    attached once per process and reused by later tasks.
+
+    arguments:
+        descriptor - Descriptor returned by SharedSpectra.descriptor.
+
+    returns:
+        A dictionary of SharedMeasurement objects (or None) keyed by name.
+    """
+
+    measurements = {}
+
+    for name, spectrumDescriptor in descriptor.items():
+        if spectrumDescriptor is None:
+            measurements[name] = None
+            continue
+
+        key = spectrumDescriptor[0]
+        if key not in _attached:
+            _attached[key] = SharedSpectrum.attach(spectrumDescriptor)
+
+        measurements[name] = SharedMeasurement(_attached[key])
+
+    return measurements
+
+def detachSpectra():
+    """Release every block attached by this worker process.
+    """
+
+    for spectrum in _attached.values():
+        spectrum.close()
+
+    _attached.clear()
+
+atexit.register(detachSpectra)
+
+def _attachMemory(name):
+    """Open an existing shared memory block without handing it to the resource
+    tracker, which would otherwise destroy a block this process does not own
+    when it exits.  Python releases before 3.13 cannot opt out, but workers
+    started by a process pool share the tracker of the owning process, which
+    already tracks the block.
+    """
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
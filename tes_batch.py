@@ -0,0 +1,723 @@
+"""Separation pipeline shared by the GUI and batch runs over many samples.
+
+A batch writes its results to a result store and checkpoints every sample
+it completes to a journal in the store directory.  Batches are run from the
+command line with python tes_batch.py, see main.  A restarted batch skips
+the samples recorded in the journal or already present in the store, so a
+sample is never stored twice.  The blackbody and downwelling files are read
+once per batch, and the sample files of the following samples are read by
+I/O threads while the current sample is separated.
+
+title:              tes_batch
+
+date:               October 2026
+"""
+
+import os
+import copy
+import time
+import argparse
+import numpy as np
+
+import dp_radiance_calibration as dp
+import tes
+from bb_radiance import bbRadiance
+import tes_search
+import tes_hybrid
+import regrid
+from checkpoint import Journal, workKey
+from prefetch import prefetch
+from pipeline_metrics import timed, increment, setGauge
+from result_store import ResultWriter, ResultStore
+from coadd import CoaddAccumulator
+from downwelling import acquisitionTime, DownwellingSession
+
+JOURNAL_NAME = 'journal.jsonl'
+
+# separator of repeat measurements of one sample in a sample file field
+SAMPLE_SEPARATOR = ';'
+
+# techniques selectable from the command line, by their options tab names
+TECHNIQUES = {
+    'waterband': 'Waterband Temperature Emissivity Separation',
+    'standard': 'Standard Temperature Emissivity Separation',
+    'moving': 'Moving Window Temperature Emissivity Separation',
+    'variable': 'Variable Moving Window Temperature Emissivity Separation',
+    'multiple': 'Multiple Moving Window Temperature Emissivity Separation',
+    'hybrid': 'Hybrid Waterband Seeded Multiple Moving Window Temperature '
+        'Emissivity Separation'}
+
+def sampleFiles(samFile):
+    """Split a sample file field into the repeat measurements it lists.
+
+    returns:
+        The list of sample files.
+    """
+
+    return [name.strip() for name in samFile.split(SAMPLE_SEPARATOR)
+        if name.strip() != '']
+
+def calibrate(cbbFile, wbbFile, samFile, dwrFile, plateEmissivity,
+        dtype=np.float64):
+    """Read and calibrate a set of measurement files.
+
+    arguments:
+        cbbFile - Cold blackbody file.
+        wbbFile - Warm blackbody file.
+        samFile - Sample file, or several repeat measurements of the sample
+            separated by SAMPLE_SEPARATOR, which are coadded.
+        dwrFile - Downwelling file, or an empty string.
+        plateEmissivity - Plate emissivity text, or an empty string.
+        dtype - Working precision of the calibrated spectra.
+
+    returns:
+        The calibrated cold blackbody, warm blackbody, sample and
+        downwelling (or None), and the coadd tolerance tests.
+    """
+
+    samFiles = sampleFiles(samFile)
+
+    cbb, wbb, sam, dwr = readMeasurements(cbbFile, wbbFile, samFiles[0],
+        dwrFile)
+
+    if len(samFiles) == 1:
+        return calibrateMeasurements(cbb, wbb, sam, dwr, plateEmissivity,
+            dtype)
+
+    return coaddSamples(cbb, wbb, sam, dwr, samFiles, plateEmissivity, dtype)
+
+def calibrateWithSession(cbbFile, wbbFile, samFile, session,
+        plateEmissivity, dtype=np.float64):
+    """Read and calibrate a set of measurement files, with the downwelling of
+    a DownwellingSession measured nearest in time to the sample.
+
+    arguments:
+        cbbFile - Cold blackbody file.
+        wbbFile - Warm blackbody file.
+        samFile - Sample file, or repeat measurements of the sample as taken
+            by calibrate, in which case the first gives the time.
+        session - DownwellingSession.
+        plateEmissivity - Plate emissivity text, or an empty string.
+        dtype - Working precision of the calibrated spectra.
+
+    returns:
+        As calibrate, followed by the list of downwelling files used.
+    """
+
+    samFiles = sampleFiles(samFile)
+
+    cbb, wbb, sam, dwr = readMeasurements(cbbFile, wbbFile, samFiles[0], '')
+
+    if len(samFiles) == 1:
+        return calibrateSessionMeasurements(cbb, wbb, sam, session,
+            plateEmissivity, dtype, samFile=samFiles[0])
+
+    dwrFile = session.lookup(acquisitionTime(sam, samFiles[0]))[0][0]
+
+    return coaddSamples(cbb, wbb, sam, session.measurement(dwrFile), samFiles,
+        plateEmissivity, dtype) + ([dwrFile],)
+
+def calibrateSessionMeasurements(cbb, wbb, sam, session, plateEmissivity,
+        dtype=np.float64, interpolate=False, samFile=None):
+    """Calibrate a sample jointly with the downwelling of a DownwellingSession
+    measured nearest in time to it, or with each of the two measured either
+    side of it.  The calibrated downwelling and sample of the two joint
+    calibrations are then weighted linearly in time, as the sample
+    calibration may depend on the downwelling it is calibrated with.
+
+    arguments:
+        cbb - Cold blackbody, which is not changed.
+        wbb - Warm blackbody, which is not changed.
+        sam - Sample, calibrated in place.
+        session - DownwellingSession.
+        plateEmissivity - Plate emissivity text, or an empty string.
+        dtype - Working precision of the calibrated spectra.
+        interpolate - Interpolate the downwelling in time instead of taking
+            the nearest.
+        samFile - Sample file, for acquisitionTime if the sample records no
+            time.
+
+    returns:
+        As calibrateMeasurements, followed by the list of downwelling files
+        used.  The tolerance tests are those of every joint calibration.
+    """
+
+    chosen = session.lookup(acquisitionTime(sam, samFile), interpolate)
+
+    # each joint calibration works on the sample in place
+    original = copy.deepcopy(sam) if len(chosen) > 1 else None
+
+    toleranceTests = []
+    samValue = 0.0
+    dwrValue = 0.0
+
+    for i in range(len(chosen)):
+        dwrFile, weight = chosen[i]
+
+        calibrated = calibrateMeasurements(copy.deepcopy(cbb),
+            copy.deepcopy(wbb), sam if i == 0 else copy.deepcopy(original),
+            session.measurement(dwrFile), plateEmissivity, dtype)
+
+        toleranceTests.extend(calibrated[4])
+        samValue = samValue + weight * np.asarray(
+            calibrated[2].spectrum.value, np.float64)
+        dwrValue = dwrValue + weight * np.asarray(
+            calibrated[3].spectrum.value, np.float64)
+
+        if i == 0:
+            first = calibrated
+
+    cbb, wbb, sam, dwr = first[:4]
+    sam.spectrum.value = samValue.astype(dtype)
+    dwr.spectrum.value = dwrValue.astype(dtype)
+
+    return (cbb, wbb, sam, dwr, toleranceTests,
+        [dwrFile for dwrFile, weight in chosen])
+
+def coaddSamples(cbb, wbb, sam, dwr, samFiles, plateEmissivity,
+        dtype=np.float64):
+    """Calibrate repeat measurements of a sample and coadd them in a single
+    pass, reading each repeat only once the previous one has been folded in.
+
+    arguments:
+        cbb - Cold blackbody.
+        wbb - Warm blackbody.
+        sam - Sample read from the first of samFiles.
+        dwr - Downwelling, or None.
+        samFiles - Sample files of the repeat measurements.
+        plateEmissivity - Plate emissivity text, or an empty string.
+        dtype - Working precision of the calibrated spectra.
+
+    returns:
+        As calibrateMeasurements, the sample holding the coadded spectrum.
+        The tolerance tests of every repeat are followed by the tolerance
+        statistic of the coadd.
+    """
+
+    accumulator = CoaddAccumulator()
+    toleranceTests = []
+    first = None
+
+    for i in range(len(samFiles)):
+        if i > 0:
+            with timed('read'):
+                sam = dp.readDpFile(samFiles[i])
+
+        # calibration works on the measurements in place, so every repeat is
+        # calibrated against copies of the shared measurements
+        calibrated = calibrateMeasurements(copy.deepcopy(cbb),
+            copy.deepcopy(wbb), sam, copy.deepcopy(dwr), plateEmissivity,
+            dtype)
+
+        accumulator.add(calibrated[2].spectrum.value)
+        toleranceTests.extend(calibrated[4])
+
+        if first is None:
+            first = calibrated
+
+    cbb, wbb, sam, dwr = first[:4]
+    sam.spectrum.value = accumulator.mean.astype(dtype)
+    toleranceTests.append(accumulator.toleranceStatistic())
+
+    return cbb, wbb, sam, dwr, toleranceTests
+
+def readMeasurements(cbbFile, wbbFile, samFile, dwrFile):
+    """Read a set of measurement files.
+
+    arguments:
+        cbbFile - Cold blackbody file.
+        wbbFile - Warm blackbody file.
+        samFile - Sample file.
+        dwrFile - Downwelling file, or an empty string.
+
+    returns:
+        The uncalibrated cold blackbody, warm blackbody, sample and
+        downwelling (or None).
+    """
+
+    with timed('read'):
+        cbb = dp.readDpFile(cbbFile)
+        wbb = dp.readDpFile(wbbFile)
+        sam = dp.readDpFile(samFile)
+
+        if (dwrFile == ''):
+            dwr = None
+        else:
+            dwr = dp.readDpFile(dwrFile)
+
+    return cbb, wbb, sam, dwr
+
+def calibrateMeasurements(cbb, wbb, sam, dwr, plateEmissivity,
+        dtype=np.float64):
+    """Calibrate a set of measurements read by readMeasurements.
+
+    arguments:
+        cbb - Cold blackbody.
+        wbb - Warm blackbody.
+        sam - Sample.
+        dwr - Downwelling, or None.
+        plateEmissivity - Plate emissivity text, or an empty string.
+        dtype - Working precision of the calibrated spectra.
+
+    returns:
+        The calibrated cold blackbody, warm blackbody, sample and
+        downwelling (or None), and the coadd tolerance tests.
+    """
+
+    if (plateEmissivity == ''):
+        plateEmissivity = -1
+    else:
+        plateEmissivity = int(plateEmissivity)
+
+    with timed('calibrate'):
+        if dwr is None:
+            toleranceTests = dp.calibrateDpData(plateEmissivity, cbb, wbb, sam)
+        else:
+            toleranceTests = dp.calibrateDpData(plateEmissivity, cbb, wbb, sam,
+                dwr)
+
+        # bring a downwelling measured on a different grid onto the sample
+        # grid
+        regrid.matchGrid(dwr, sam.spectrum.wavelength)
+
+        # keep the calibrated spectra in the working precision
+        tes_search.asPrecision(sam, dtype)
+        tes_search.asPrecision(dwr, dtype)
+
+    return cbb, wbb, sam, dwr, toleranceTests
+
+def windowSettings(lowerWave, upperWave, lowerWin='', upperWin='',
+        windowStep='', numWindows=''):
+    """Fill in the window settings of a technique, as entered on the options
+    tab where unused settings are left blank.
+
+    returns:
+        The lower and upper window width, the number of window widths and
+        the number of windows.
+    """
+
+    if (lowerWin == ''):
+        lowerWin = upperWave - lowerWave
+    else:
+        lowerWin = float(lowerWin)
+
+    if (upperWin == ''):
+        upperWin = lowerWin
+    else:
+        upperWin = float(upperWin)
+
+    if (windowStep == ''):
+        windowStep = 1
+    else:
+        windowStep = float(windowStep)
+
+    if (numWindows == ''):
+        numWindows = 1
+    else:
+        numWindows = int(numWindows)
+
+    if (upperWin == lowerWin):
+        windowSteps = 1
+    else:
+        windowSteps = ((upperWin-lowerWin) / windowStep) + 1
+
+    return lowerWin, upperWin, windowSteps, numWindows
+
+def binMeasurements(sam, dwr, binWidth):
+    """Reduce the spectral resolution of the sample and downwelling before
+    the temperature search.
+
+    arguments:
+        sam - Calibrated sample.
+        dwr - Calibrated downwelling, or None.
+        binWidth - Bin width (microns), or None or 0 for no binning.
+
+    returns:
+        The binned sample and downwelling, or the originals when not binning.
+    """
+
+    if not binWidth:
+        return sam, dwr
+
+    return (regrid.binMeasurement(sam, binWidth),
+        regrid.binMeasurement(dwr, binWidth))
+
+def checkBinning(sam, dwr, temp, binnedSeconds, settings):
+    """Repeat a binned temperature search at full resolution, to report the
+    speedup binning gives and the temperature difference it causes.
+
+    arguments:
+        sam - Calibrated sample at full resolution.
+        dwr - Calibrated downwelling at full resolution, or None.
+        temp - Temperature found by the binned search (K).
+        binnedSeconds - Time taken to bin and search (s).
+        settings - Dictionary of runTechnique keyword arguments other than
+            the measurements.
+
+    returns:
+        The full resolution search time over the binned search time, and
+        the binned minus the full resolution temperature (K), NaN if either
+        search found no temperature.
+    """
+
+    start = time.time()
+    fullTemp = runTechnique(sam, dwr, **settings)[0]
+    fullSeconds = time.time() - start
+
+    difference = np.nan
+    if temp != 0 and fullTemp != 0:
+        difference = temp - fullTemp
+
+    return fullSeconds / max(binnedSeconds, 1e-9), difference
+
+def runTechnique(sam, dwr, technique, lowerTemp, upperTemp, lowerWave,
+        upperWave, lowerWin, upperWin, windowSteps, numWindows,
+        waterbandWave=None, searchBand=None):
+    """Perform a temperature emissivity separation technique.
+
+    arguments:
+        sam - Calibrated sample.
+        dwr - Calibrated downwelling, or None.
+        technique - Technique name as listed on the options tab.
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        lowerWave - Lower wavelength limit (microns).
+        upperWave - Upper wavelength limit (microns).
+        lowerWin - Lower window width (microns).
+        upperWin - Upper window width (microns).
+        windowSteps - Number of window widths.
+        numWindows - Number of windows.
+        waterbandWave - Waterband limits seeding the hybrid technique.
+        searchBand - Half width of the hybrid temperature band (K),
+            tes_hybrid.DEFAULT_SEARCH_BAND if None.
+
+    returns:
+        The estimated temperature, the metric over the temperature grid of
+        the limits, and the wavelength bands used.  The hybrid technique only
+        searches a band of the limits, and its metric is NaN elsewhere.
+    """
+
+    with timed('search', technique=technique):
+        if ('Hybrid' in technique):
+            if searchBand is None:
+                searchBand = tes_hybrid.DEFAULT_SEARCH_BAND
+
+            seedTemp, seedDiffs = tes.waterbandTes(sam, dwr, lowerTemp, upperTemp, waterbandWave[0], waterbandWave[1])
+
+            def _search(lower, upper):
+                assd, temp, wave, diffs = tes.tes(sam, dwr, lower, upper, lowerWave, upperWave, lowerWin, upperWin, windowSteps, numWindows)
+                return temp, diffs, wave
+
+            (temp, diffs, wave), lower, upper, fullRange = tes_hybrid.seededSearch(_search, seedTemp, lowerTemp, upperTemp, searchBand)
+            diffs = _fullMetric(diffs, lower, lowerTemp, upperTemp)
+
+            if fullRange:
+                increment('hybrid_fallbacks_total', description='Hybrid '
+                    'searches that fell back to the full interval.')
+        elif ('Waterband' in technique):
+            temp, diffs = tes.waterbandTes(sam, dwr, lowerTemp, upperTemp, lowerWave, upperWave)
+            wave = [[lowerWave, upperWave]]
+        else:
+            assd, temp, wave, diffs =  tes.tes(sam, dwr, lowerTemp, upperTemp, lowerWave, upperWave, lowerWin, upperWin, windowSteps, numWindows)
+
+    if (temp == 0):
+        increment('unknown_temperatures_total', description='Searches that '
+            'found no temperature.', technique=technique)
+
+    return temp, diffs, wave
+
+def approximateTechnique(technique, lowerTemp, upperTemp, lowerWave,
+        upperWave, lowerWin, upperWin, windowSteps, numWindows,
+        waterbandWave=None, searchBand=None):
+    """Describe a technique, with the settings runTechnique takes, for the
+    array search of tes_uncertainty, so replicates are searched with the
+    wavelength limits and window widths that produced the temperature.
+
+    returns:
+        A technique dictionary as taken by
+        tes_uncertainty.replicateTemperatures.
+    """
+
+    if ('Hybrid' in technique):
+        parameters = {'metric': 'window', 'searchBand': searchBand,
+            'seed': {'name': 'Waterband', 'metric': 'waterband',
+            'lowerWave': waterbandWave[0], 'upperWave': waterbandWave[1]}}
+    elif ('Waterband' in technique):
+        parameters = {'metric': 'waterband'}
+    elif ('Standard' in technique):
+        parameters = {'metric': 'smoothness'}
+    else:
+        parameters = {'metric': 'window'}
+
+    if parameters['metric'] == 'window':
+        windowStep = 1
+        if windowSteps > 1:
+            windowStep = (upperWin - lowerWin) / (windowSteps - 1)
+
+        parameters.update({'numWindows': numWindows,
+            'widths': tes_search.windowWidths(lowerWin, upperWin, windowStep)})
+
+    parameters.update({'name': technique, 'lowerWave': lowerWave,
+        'upperWave': upperWave})
+
+    return parameters
+
+def _fullMetric(metric, searchedLower, lowerTemp, upperTemp):
+    """Place a metric over a band of the temperature limits on the grid of
+    the full limits, NaN outside the band.
+    """
+
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+    full = np.full(len(temps), np.nan)
+
+    start = 0
+    if len(temps) > 1:
+        start = int(round((searchedLower - lowerTemp) / (temps[1] - temps[0])))
+
+    metric = np.asarray(metric, np.float64)[:max(len(temps) - start, 0)]
+    full[start:start+len(metric)] = metric
+
+    return full
+
+def finalEmissivity(sam, dwr, temp, dtype=np.float64):
+    """Compute the emissivity across the full sample spectrum at the
+    estimated temperature, with the blackbody radiance of bb_radiance as
+    used by tes.tes.  The emissivity is computed in double precision and
+    returned in the working precision.
+
+    arguments:
+        sam - Calibrated sample.
+        dwr - Calibrated downwelling, or None.
+        temp - Estimated temperature (K).
+        dtype - Working precision.
+
+    returns:
+        Array of emissivity.
+    """
+
+    samRadiance = np.asarray(sam.spectrum.value, np.float64)
+    wavelength = np.asarray(sam.spectrum.wavelength, np.float64)
+
+    if dwr is None:
+        dwrRadiance = np.zeros(len(samRadiance))
+    else:
+        dwrRadiance = np.asarray(dwr.spectrum.value, np.float64)
+
+    emissivity = ((samRadiance - dwrRadiance) /
+        (bbRadiance(temp, wavelength) - dwrRadiance))
+
+    return emissivity.astype(dtype)
+
+def runBatch(samFiles, cbbFile, wbbFile, dwrFile, plateEmissivity, settings,
+        storePath, chunkSize=16, precision='float64', readAhead=4,
+        ioThreads=2, binWidth=None, session=None, interpolate=False):
+    """Separate every sample of a batch into a result store, resuming from the
+    store's journal if the batch was interrupted.
+
+    arguments:
+        samFiles - List of sample files.
+        cbbFile - Cold blackbody file.
+        wbbFile - Warm blackbody file.
+        dwrFile - Downwelling file, or an empty string.
+        plateEmissivity - Plate emissivity text, or an empty string.
+        settings - Dictionary of runTechnique keyword arguments other than
+            the measurements.
+        storePath - Result store directory.
+        chunkSize - Number of results per stored chunk.  Results not yet
+            written in a chunk are kept as pending files of the store, so
+            no completed sample is redone after a restart.
+        precision - Working precision, 'float64' or 'float32'.
+        readAhead - Largest number of samples read ahead of the one being
+            separated.
+        ioThreads - Number of threads reading measurement files.
+        binWidth - Bin width (microns) the spectra are reduced to for the
+            temperature search, or None.  The stored emissivity keeps the
+            full resolution.  The first sample separated is also searched
+            at full resolution, and its provenance records the speedup and
+            the temperature difference from checkBinning.
+        session - DownwellingSession giving each sample the downwelling
+            nearest to it in time, in place of dwrFile, calibrated jointly
+            with the sample by calibrateSessionMeasurements.
+        interpolate - Interpolate the session downwelling in time instead
+            of taking the nearest.
+
+    returns:
+        The number of samples separated by this call.
+    """
+
+    dtype = tes_search.precisionType(precision)
+    separated = 0
+
+    writer = ResultWriter(storePath, chunkSize)
+
+    # results already in the store, pending ones included, count as
+    # completed even if the journal entry was lost, so rewriting is
+    # idempotent
+    stored = set(provenance.get('key') for provenance in
+        ResultStore(storePath).provenance())
+
+    with Journal(os.path.join(storePath, JOURNAL_NAME)) as journal:
+
+        pending = []
+        for samFile in samFiles:
+            key = workKey(samFile, cbbFile, wbbFile, dwrFile, plateEmissivity,
+                settings, precision)
+            if binWidth:
+                key = workKey(key, binWidth)
+            if not session is None:
+                key = workKey(key, session.files, interpolate)
+
+            if not (journal.done(key) or key in stored):
+                pending.append((samFile, key))
+            else:
+                increment('batch_samples_total', description='Samples '
+                    'handled by batch runs.', outcome='skipped')
+
+        setGauge('batch_pending_samples', len(pending), description='Samples '
+            'of the current batch not yet separated.')
+
+        # the files shared by every sample are read once, and only the
+        # samples are read ahead
+        if len(pending) > 0:
+            with timed('read'):
+                cbbRead = dp.readDpFile(cbbFile)
+                wbbRead = dp.readDpFile(wbbFile)
+
+                dwrRead = None
+                if session is None and dwrFile != '':
+                    dwrRead = dp.readDpFile(dwrFile)
+
+        def _read(work):
+            with timed('read'):
+                return dp.readDpFile(work[0])
+
+        for (samFile, key), sam in prefetch(_read, pending, readAhead,
+                ioThreads):
+            # calibration works on the measurements in place, so each sample
+            # is calibrated against copies of the shared measurements
+            if session is None:
+                cbb, wbb, sam, dwr, toleranceTests = calibrateMeasurements(
+                    copy.deepcopy(cbbRead), copy.deepcopy(wbbRead), sam,
+                    copy.deepcopy(dwrRead), plateEmissivity, dtype)
+                dwrSource = dwrFile
+            else:
+                (cbb, wbb, sam, dwr, toleranceTests,
+                    dwrSource) = calibrateSessionMeasurements(cbbRead, wbbRead,
+                    sam, session, plateEmissivity, dtype, interpolate, samFile)
+
+            start = time.time()
+            binnedSam, binnedDwr = binMeasurements(sam, dwr, binWidth)
+            temp, diffs, wave = runTechnique(binnedSam, binnedDwr, **settings)
+
+            provenance = {'key': key, 'cbb': cbbFile, 'wbb': wbbFile,
+                'sam': samFile, 'dwr': dwrSource,
+                'technique': settings['technique'],
+                'wave': [list(map(float, band)) for band in wave],
+                'precision': precision, 'binWidth': binWidth,
+                'toleranceTests': list(map(float, toleranceTests))}
+
+            if binWidth and separated == 0:
+                speedup, difference = checkBinning(sam, dwr, temp,
+                    time.time() - start, settings)
+                provenance['binningCheck'] = {'speedup': speedup,
+                    'temperatureDifference': difference}
+
+            # the result is on disk once appended, so the sample is recorded
+            # as completed straight away
+            with timed('store'):
+                writer.append(temp, sam.spectrum.wavelength,
+                    finalEmissivity(sam, dwr, temp, dtype), diffs,
+                    settings['lowerTemp'], settings['upperTemp'], provenance)
+                journal.record(key, sam=samFile)
+
+            separated += 1
+            increment('batch_samples_total', outcome='separated')
+            setGauge('batch_pending_samples', len(pending) - separated)
+
+        writer.flush()
+
+    return separated
+
+def main():
+    """Run a batch from the command line, for example
+
+        python tes_batch.py --cbb cold.cbb --wbb warm.wbb --dwr sky.dwr
+            --store results a.sam b.sam c.sam
+
+    Running the same command again after an interruption resumes the batch
+    from the journal of the store.  A downwelling directory gives every
+    sample the downwelling nearest to it in time.
+    """
+
+    parser = argparse.ArgumentParser(description='Separate the temperature '
+        'and emissivity of a batch of samples into a result store.')
+    parser.add_argument('samples', nargs='+', help='Sample files.')
+    parser.add_argument('--cbb', required=True, help='Cold blackbody file.')
+    parser.add_argument('--wbb', required=True, help='Warm blackbody file.')
+    parser.add_argument('--dwr', default='', help='Downwelling file, or a '
+        'directory of downwelling files of the session.')
+    parser.add_argument('--interpolate', action='store_true',
+        help='Interpolate the session downwelling in time.')
+    parser.add_argument('--plate', default='', help='Plate emissivity.')
+    parser.add_argument('--store', required=True,
+        help='Result store directory.')
+    parser.add_argument('--technique', choices=sorted(TECHNIQUES),
+        default='multiple', help='Separation technique.')
+    parser.add_argument('--temps', nargs=2, type=float, default=[250, 350],
+        metavar=('LOWER', 'UPPER'), help='Temperature limits (K).')
+    parser.add_argument('--wave', nargs=2, type=float, default=[8, 14],
+        metavar=('LOWER', 'UPPER'), help='Wavelength limits (microns).')
+    parser.add_argument('--windows', nargs=2, default=['', ''],
+        metavar=('LOWER', 'UPPER'), help='Window width limits (microns).')
+    parser.add_argument('--window-step', default='',
+        help='Window width step (microns).')
+    parser.add_argument('--num-windows', default='',
+        help='Number of windows.')
+    parser.add_argument('--waterband', nargs=2, type=float, default=[7, 8],
+        metavar=('LOWER', 'UPPER'), help='Waterband limits seeding the '
+        'hybrid technique (microns).')
+    parser.add_argument('--search-band', type=float,
+        default=tes_hybrid.DEFAULT_SEARCH_BAND,
+        help='Half width of the hybrid temperature band (K).')
+    parser.add_argument('--bin-width', type=float, default=None,
+        help='Bin width of the temperature search (microns).')
+    parser.add_argument('--precision', choices=sorted(tes_search.PRECISIONS),
+        default='float64', help='Working precision.')
+    parser.add_argument('--chunk-size', type=int, default=16,
+        help='Results per stored chunk.')
+    parser.add_argument('--read-ahead', type=int, default=4,
+        help='Samples read ahead of the one being separated.')
+    parser.add_argument('--io-threads', type=int, default=2,
+        help='Threads reading measurement files.')
+    arguments = parser.parse_args()
+
+    lowerWave, upperWave = arguments.wave
+    lowerWin, upperWin, windowSteps, numWindows = windowSettings(lowerWave,
+        upperWave, arguments.windows[0], arguments.windows[1],
+        arguments.window_step, arguments.num_windows)
+
+    settings = {'technique': TECHNIQUES[arguments.technique],
+        'lowerTemp': arguments.temps[0], 'upperTemp': arguments.temps[1],
+        'lowerWave': lowerWave, 'upperWave': upperWave,
+        'lowerWin': lowerWin, 'upperWin': upperWin,
+        'windowSteps': windowSteps, 'numWindows': numWindows,
+        'waterbandWave': tuple(arguments.waterband),
+        'searchBand': arguments.search_band}
+
+    session = None
+    if os.path.isdir(arguments.dwr):
+        session = DownwellingSession()
+        if session.addDirectory(arguments.dwr) == 0:
+            parser.error('no downwelling files in {0}'.format(arguments.dwr))
+
+    separated = runBatch(arguments.samples, arguments.cbb, arguments.wbb,
+        arguments.dwr, arguments.plate, settings, arguments.store,
+        arguments.chunk_size, arguments.precision, arguments.read_ahead,
+        arguments.io_threads, arguments.bin_width, session,
+        arguments.interpolate)
+
+    print('{0} of {1} samples separated into {2}'.format(separated,
+        len(arguments.samples), arguments.store))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,534 @@
+"""Benchmarks of the array based emissivity search on synthetic spectra.
+
+title:              tes_benchmark
+
+date:               October 2026
+"""
+
+import time
+import multiprocessing
+import numpy as np
+
+import tes_search
+import tes_sweep
+import tes_hybrid
+import tes_kernels
+import tes_compare
+import tes_uncertainty
+import regrid
+from prefetch import prefetch
+from emissivity_library import buildLibrary
+from coadd import coaddScans
+from wave_index import WavelengthIndex
+
+class _Spectrum(object):
+    """Spectrum of a synthetic measurement.
+    """
+
+    def __init__(self, wavelength, value):
+        self.wavelength = wavelength
+        self.value = value
+
+class _Measurement(object):
+    """Synthetic stand-in for a calibrated measurement read by dp.readDpFile.
+    """
+
+    def __init__(self, wavelength, value):
+        self.spectrum = _Spectrum(wavelength, value)
+
+def syntheticSpectra(temp=300.0, lowerWave=7.0, upperWave=15.0, samples=2000,
+        noise=0.0, seed=0):
+    """Create a synthetic sample and downwelling spectrum.  The downwelling
+    carries fine spectral structure so that the emissivity only appears
+    smooth at the true sample temperature.
+
+    arguments:
+        temp - True sample temperature (K).
+        lowerWave - Lower wavelength of the spectra (microns).
+        upperWave - Upper wavelength of the spectra (microns).
+        samples - Number of spectral samples.
+        noise - Standard deviation of the relative noise on the sample, none
+            by default.
+        seed - Seed for the random number generator.
+
+    returns:
+        The wavelength, sample radiance, downwelling radiance and true
+        emissivity arrays.
+    """
+
+    random = np.random.RandomState(seed)
+
+    wavelength = np.linspace(lowerWave, upperWave, samples)
+
+    emissivity = (0.95 -
+        0.15 * np.exp(-((wavelength - 9.2) / 0.4)**2) -
+        0.08 * np.exp(-((wavelength - 11.3) / 0.3)**2))
+
+    lines = 0.5 + 0.4 * random.rand(samples)**4
+    dwrRadiance = lines * tes_search.planck(265.0, wavelength)[0]
+
+    samRadiance = (emissivity * tes_search.planck(temp, wavelength)[0] +
+        (1 - emissivity) * dwrRadiance)
+    samRadiance *= 1 + noise * random.randn(samples)
+
+    return wavelength, samRadiance, dwrRadiance, emissivity
+
+def timeIt(function, repeat=5):
+    """Time a function call, keeping the fastest of several runs.
+
+    arguments:
+        function - Function taking no arguments.
+        repeat - Number of runs.
+
+    returns:
+        The fastest run time (s) and the result of the last call.
+    """
+
+    best = None
+
+    for i in range(repeat):
+        start = time.time()
+        result = function()
+        elapsed = time.time() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best, result
+
+def benchmarkPrecision(temp=300.0, lowerTemp=280.0, upperTemp=320.0,
+        lowerWave=8.0, upperWave=14.0):
+    """Compare double and single precision on noisy synthetic spectra.  The
+    temperature difference is reported for tes.tes as run by the GUI and
+    batch, when tes is installed, and separately for the smoothness search
+    of tes_search, with its run time and emissivity surface memory.  The
+    second only applies to the approximate helpers built on tes_search.
+    """
+
+    wavelength, samRadiance, dwrRadiance, emissivity = syntheticSpectra(temp,
+        noise=1e-4)
+    window = WavelengthIndex(wavelength).slice(lowerWave, upperWave)
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+    try:
+        import tes_batch
+    except ImportError:
+        print('technique precision: tes or dp_radiance_calibration not '
+            'installed')
+    else:
+        lowerWin, upperWin, windowSteps, numWindows = (
+            tes_batch.windowSettings(lowerWave, upperWave))
+
+        results = {}
+
+        for precision in ['float64', 'float32']:
+            dtype = tes_search.precisionType(precision)
+            sam = tes_search.asPrecision(_Measurement(wavelength,
+                samRadiance), dtype)
+            dwr = tes_search.asPrecision(_Measurement(wavelength,
+                dwrRadiance), dtype)
+
+            elapsed, (results[precision], metric, wave) = timeIt(
+                lambda: tes_batch.runTechnique(sam, dwr, 'Standard '
+                'Temperature Emissivity Separation', lowerTemp, upperTemp,
+                lowerWave, upperWave, lowerWin, upperWin, windowSteps,
+                numWindows), 1)
+
+            print('tes.tes {0}: {1:.2f} s, temperature {2:.1f} K'.format(
+                precision, elapsed, results[precision]))
+
+        print('tes.tes float32 temperature difference: {0:.2f} K'.format(
+            abs(results['float32'] - results['float64'])))
+
+    results = {}
+
+    for precision in ['float64', 'float32']:
+        dtype = tes_search.precisionType(precision)
+
+        def _search():
+            surface = tes_search.emissivitySurface(samRadiance, dwrRadiance,
+                wavelength, temps, dtype)
+            metric = tes_search.smoothnessMetric(surface, window)
+            return surface.nbytes, tes_search.bestTemperature(temps, metric)
+
+        elapsed, (nbytes, estimate) = timeIt(_search)
+        results[precision] = estimate
+
+        print('approximate search {0}: {1:.1f} ms, surface {2:.1f} MB, '
+            'temperature {3:.1f} K'.format(precision, elapsed*1000,
+            nbytes/1e6, estimate))
+
+    print('approximate search float32 temperature difference: '
+        '{0:.2f} K'.format(abs(results['float32'] - results['float64'])))
+
+def benchmarkSweep(temp=300.0, lowerTemp=280.0, upperTemp=320.0):
+    """Compare a parameter sweep of the multiple moving window metric run
+    point by point, rebuilding the emissivity surface each time, against the
+    sweep reusing shared tables.  A small grid runs in this process, and a
+    grid above tes_sweep.PARALLEL_POINTS is timed with one worker and with
+    every CPU, showing where the worker processes pay off.
+    """
+
+    wavelength, samRadiance, dwrRadiance, emissivity = syntheticSpectra(temp,
+        noise=1e-4)
+    sam = _Measurement(wavelength, samRadiance)
+    dwr = _Measurement(wavelength, dwrRadiance)
+
+    parameters = [('lowerWin', [0.5, 1.0, 1.5, 2.0]),
+        ('lowerWave', [8.0, 8.5, 9.0, 9.5])]
+    fixed = {'upperWave': 14.0, 'upperWin': 3.0, 'windowStep': 0.5,
+        'numWindows': 3}
+
+    def _pointByPoint():
+        for lowerWin in parameters[0][1]:
+            for lowerWave in parameters[1][1]:
+                point = dict(fixed, lowerWin=lowerWin, lowerWave=lowerWave)
+                tables = tes_sweep.sweepTables(samRadiance, dwrRadiance,
+                    wavelength, lowerTemp, upperTemp, (lowerWave, 14.0))
+                tes_sweep.evaluatePoint(tables, 'window', point)
+
+    pointByPoint, result = timeIt(_pointByPoint, 1)
+    shared, result = timeIt(lambda: tes_sweep.sweep(sam, dwr, lowerTemp,
+        upperTemp, 'window', parameters, fixed), 1)
+
+    print('sweep of {0} points: point by point {1:.2f} s, shared tables '
+        '{2:.2f} s, speedup {3:.1f}x'.format(result.temperature.size,
+        pointByPoint, shared, pointByPoint / shared))
+    print('approximate recovered temperatures: {0:.1f} to {1:.1f} K'.format(
+        np.min(result.temperature), np.max(result.temperature)))
+
+    parameters = [('lowerWin', np.linspace(0.5, 2.0, 16)),
+        ('lowerWave', np.linspace(8.0, 9.5, 16))]
+    workers = multiprocessing.cpu_count()
+
+    serial, result = timeIt(lambda: tes_sweep.sweep(sam, dwr, lowerTemp,
+        upperTemp, 'window', parameters, fixed, workers=1), 1)
+    parallel, result = timeIt(lambda: tes_sweep.sweep(sam, dwr, lowerTemp,
+        upperTemp, 'window', parameters, fixed, workers=workers), 1)
+
+    print('sweep of {0} points: one process {1:.2f} s, {2} workers {3:.2f} '
+        's, speedup {4:.1f}x'.format(result.temperature.size, serial,
+        workers, parallel, serial / parallel))
+
+def benchmarkHybrid(temp=300.0, lowerTemp=250.0, upperTemp=350.0,
+        searchBand=5.0):
+    """Compare the multiple moving window technique over the full temperature
+    interval against the waterband seeded hybrid technique, both run with
+    tes.tes and tes.waterbandTes as in GUI and batch runs.  Without tes the
+    comparison is made with the tes_search approximations of the
+    techniques, which only indicates the speedup of tes.tes.
+    """
+
+    wavelength, samRadiance, dwrRadiance, emissivity = syntheticSpectra(temp,
+        noise=1e-4)
+    sam = _Measurement(wavelength, samRadiance)
+    dwr = _Measurement(wavelength, dwrRadiance)
+
+    try:
+        import tes_batch
+    except ImportError:
+        tes_batch = None
+
+    if tes_batch is None:
+        name = 'approximate moving window technique'
+        lowerWave, upperWave = 8.0, 14.0
+        part = WavelengthIndex(wavelength).slice(lowerWave, upperWave)
+        widths = tes_search.windowWidths(0.5, 3.0, 0.5)
+
+        def _search(lower, upper):
+            temps = tes_search.temperatureGrid(lower, upper)
+            surface = tes_search.emissivitySurface(samRadiance[part],
+                dwrRadiance[part], wavelength[part], temps)
+            metrics, bounds = tes_search.windowMetrics(surface,
+                wavelength[part], widths)
+            estimate, wave, metric = tes_search.selectWindows(temps, metrics,
+                bounds, 3)
+            return estimate, metric
+
+        def _full():
+            estimate, metric = _search(lowerTemp, upperTemp)
+            return estimate, metric, lowerTemp, upperTemp
+
+        def _hybrid():
+            temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+            band = WavelengthIndex(wavelength).slice(7.0, 8.0)
+            surface = tes_search.emissivitySurface(samRadiance[band],
+                dwrRadiance[band], wavelength[band], temps)
+            seedTemp = tes_search.bestTemperature(temps,
+                tes_search.waterbandMetric(surface, slice(None)))
+
+            (estimate, metric), lower, upper, fullRange = (
+                tes_hybrid.seededSearch(_search, seedTemp, lowerTemp,
+                upperTemp, searchBand))
+            return estimate, metric, lower, upper
+    else:
+        name = 'moving window technique'
+        lowerWin, upperWin, windowSteps, numWindows = (
+            tes_batch.windowSettings(8.0, 14.0, 0.5, 3.0, 0.5, 3))
+
+        def _run(technique):
+            temp, metric, wave = tes_batch.runTechnique(sam, dwr, technique,
+                lowerTemp, upperTemp, 8.0, 14.0, lowerWin, upperWin,
+                windowSteps, numWindows, (7.0, 8.0), searchBand)
+
+            searched = tes_search.temperatureGrid(lowerTemp, upperTemp)[
+                np.isfinite(metric)]
+            return temp, metric, searched[0], searched[-1]
+
+        def _full():
+            return _run('Multiple Moving Window Temperature Emissivity '
+                'Separation')
+
+        def _hybrid():
+            return _run('Hybrid Waterband Seeded Multiple Moving Window '
+                'Temperature Emissivity Separation')
+
+    # tes.tes is slow enough to time once, the approximation is warmed up
+    repeat = 3 if tes_batch is None else 1
+
+    full, (fullTemp, metric, lower, upper) = timeIt(_full, repeat)
+    hybrid, (hybridTemp, metric, lower, upper) = timeIt(_hybrid, repeat)
+
+    print('{0}: full {1:.2f} s ({2:.1f} K), hybrid {3:.2f} s ({4:.1f} K '
+        'over {5:.1f}-{6:.1f} K), speedup {7:.1f}x'.format(name, full,
+        fullTemp, hybrid, hybridTemp, lower, upper, full / hybrid))
+
+def _kernelOutputs(samRadiance, dwrRadiance, wavelength, temps, dtype):
+    """Evaluate every kernel backed function of tes_search with the current
+    backend.
+    """
+
+    surface = tes_search.emissivitySurface(samRadiance, dwrRadiance,
+        wavelength, temps, dtype)
+
+    return [surface,
+        tes_search.waterbandMetric(surface, slice(100, 300)),
+        tes_search.smoothnessMetric(surface, slice(100, 1500)),
+        tes_search.curvatureSums(surface)]
+
+def benchmarkKernels(temp=300.0, lowerTemp=250.0, upperTemp=350.0):
+    """Compare the run time of the NumPy and compiled emissivity search.
+    """
+
+    if not tes_kernels.available:
+        return
+
+    wavelength, samRadiance, dwrRadiance, emissivity = syntheticSpectra(temp,
+        noise=1e-4)
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+    times = {}
+
+    for flag in [False, True]:
+        tes_kernels.useKernels(flag)
+        _kernelOutputs(samRadiance, dwrRadiance, wavelength, temps, np.float64)
+
+        times[flag], outputs = timeIt(lambda: _kernelOutputs(samRadiance,
+            dwrRadiance, wavelength, temps, np.float64))
+
+    tes_kernels.useKernels(True)
+
+    print('emissivity search: NumPy {0:.1f} ms, compiled {1:.1f} ms, '
+        'speedup {2:.1f}x'.format(times[False]*1000, times[True]*1000,
+        times[False] / times[True]))
+
+def benchmarkPrefetch(samples=16, latency=0.05, lowerTemp=280.0,
+        upperTemp=320.0):
+    """Compare a sequential loop over slowly read samples against reading
+    them ahead with prefetch.  Reading is simulated by a fixed latency, as
+    for files on a network share.
+    """
+
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+    def _read(seed):
+        time.sleep(latency)
+        return syntheticSpectra(290.0 + seed, noise=1e-4, seed=seed)
+
+    def _separate(spectra):
+        wavelength, samRadiance, dwrRadiance, emissivity = spectra
+        surface = tes_search.emissivitySurface(samRadiance, dwrRadiance,
+            wavelength, temps)
+        return tes_search.bestTemperature(temps,
+            tes_search.smoothnessMetric(surface, slice(None)))
+
+    sequential, expected = timeIt(lambda: [_separate(_read(seed))
+        for seed in range(samples)], 1)
+    overlapped, actual = timeIt(lambda: [_separate(spectra)
+        for seed, spectra in prefetch(_read, range(samples))], 1)
+
+    print('{0} samples read at {1:.0f} ms: sequential {2:.2f} s, prefetch '
+        '{3:.2f} s, speedup {4:.1f}x, same temperatures: {5}'.format(samples,
+        latency*1000, sequential, overlapped, sequential / overlapped,
+        expected == actual))
+
+def benchmarkBinning(temp=300.0, lowerTemp=250.0, upperTemp=350.0,
+        binWidths=(0.01, 0.02, 0.05, 0.1), samples=8000, seeds=5):
+    """Compare the multiple moving window search at full resolution against
+    the search on spectra binned to coarser grids, over several noisy
+    synthetic samples.
+    """
+
+    widths = tes_search.windowWidths(0.5, 3.0, 0.5)
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+    def _search(wavelength, samRadiance, dwrRadiance):
+        search = WavelengthIndex(wavelength).slice(8.0, 14.0)
+        surface = tes_search.emissivitySurface(samRadiance[search],
+            dwrRadiance[search], wavelength[search], temps)
+        metrics, bounds = tes_search.windowMetrics(surface, wavelength[search],
+            widths)
+        return tes_search.selectWindows(temps, metrics, bounds, 3)[0]
+
+    spectra = [syntheticSpectra(temp + seed, samples=samples, noise=1e-4,
+        seed=seed) for seed in range(seeds)]
+
+    full = [timeIt(lambda: _search(*spectrum[:3]), 1) for spectrum in spectra]
+
+    print('full resolution search of {0} samples: {1:.2f} s per sample'.format(
+        samples, np.mean([t for t, result in full])))
+
+    for binWidth in binWidths:
+        binned = []
+        for wavelength, samRadiance, dwrRadiance, emissivity in spectra:
+            target = regrid.binnedGrid(wavelength, binWidth)
+            binned.append(timeIt(lambda: _search(target,
+                regrid.regrid(samRadiance, wavelength, target),
+                regrid.regrid(dwrRadiance, wavelength, target)), 1))
+
+        difference = [abs(b[1] - f[1]) for b, f in zip(binned, full)]
+
+        print('  binned to {0:.2f} microns: {1:.2f} s per sample, speedup '
+            '{2:.1f}x, temperature difference mean {3:.2f} K, max {4:.2f} '
+            'K'.format(binWidth, np.mean([t for t, result in binned]),
+            np.mean([t for t, result in full]) / np.mean([t for t, result in
+            binned]), np.mean(difference), np.max(difference)))
+
+def benchmarkLibrary(references=5000, queries=200, k=5, seed=0):
+    """Compare indexed library matching against a brute force comparison
+    with every reference, on a synthetic library of absorption features.
+    """
+
+    random = np.random.RandomState(seed)
+    wavelength = syntheticSpectra()[0]
+    libraryWave = np.linspace(5.0, 16.0, 3000)
+
+    def _spectrum():
+        centres = random.uniform(7.5, 14.5, 3)
+        depths = random.uniform(0.02, 0.2, 3)
+        widths = random.uniform(0.1, 0.6, 3)
+        return 0.97 - np.sum(depths[:, np.newaxis] * np.exp(-((libraryWave -
+            centres[:, np.newaxis]) / widths[:, np.newaxis])**2), axis=0)
+
+    spectra = [('reference {0}'.format(i), libraryWave, _spectrum())
+        for i in range(references)]
+
+    build, library = timeIt(lambda: buildLibrary(spectra, wavelength, 8.0,
+        14.0), 1)
+
+    # queries are noisy copies of references on the instrument grid
+    truth = random.randint(0, references, queries)
+    query = np.array([regrid.regrid(spectra[i][2], libraryWave, wavelength)
+        for i in truth]) + 0.002 * random.randn(queries, len(wavelength))
+
+    def _bruteForce():
+        distances = np.array([np.sqrt(np.mean((library.spectra -
+            q[library.valid])**2, axis=1)) for q in query])
+        return np.argsort(distances, axis=1)[:, :k]
+
+    brute, expected = timeIt(_bruteForce, 1)
+    indexed, matches = timeIt(lambda: library.matchAll(query, k=k), 1)
+
+    agree = np.mean([[name for name, distance in m] ==
+        [library.names[i] for i in e] for m, e in zip(matches, expected)])
+    found = np.mean([m[0][0] == spectra[i][0] for m, i in zip(matches, truth)])
+
+    print('library of {0} spectra ({1} components) built in {2:.2f} s: brute '
+        'force {3:.1f} ms per query, indexed {4:.2f} ms per query, speedup '
+        '{5:.0f}x, same top {6}: {7:.0%}, true reference first: {8:.0%}'.format(
+        references, len(library.basis), build, brute / queries * 1000,
+        indexed / queries * 1000, brute / indexed, k, agree, found))
+
+def benchmarkUncertainty(temp=300.0, lowerTemp=290.0, upperTemp=310.0,
+        replicates=100, noise=1e-3):
+    """Compare the batched replicate search against separate searches of
+    each replicate, and check the estimated noise level.
+    """
+
+    wavelength, samRadiance, dwrRadiance, emissivity = syntheticSpectra(temp,
+        noise=noise)
+    technique = {'name': 'Standard', 'metric': 'smoothness', 'lowerWave': 8.0,
+        'upperWave': 14.0}
+
+    sigma = tes_uncertainty.noiseLevel(samRadiance, dwrRadiance, wavelength,
+        temp)
+    samReplicates = tes_uncertainty.noiseReplicates(samRadiance, sigma,
+        replicates)
+
+    batched, uncertainty = timeIt(lambda: tes_uncertainty.temperatureUncertainty(
+        samReplicates, dwrRadiance, wavelength, lowerTemp, upperTemp,
+        technique), 1)
+    separate, temperatures = timeIt(lambda: [tes_compare.compareTechniques(
+        replicate, dwrRadiance, wavelength, lowerTemp, upperTemp,
+        [technique])[1][0]['temperature'] for replicate in samReplicates], 1)
+
+    print('{0} replicates: separate {1:.2f} s, batched {2:.2f} s, speedup '
+        '{3:.1f}x, same temperatures: {4}, noise estimate {5:.2g} (true '
+        '{6:.2g}), {7}'.format(replicates, separate, batched,
+        separate / batched, np.allclose(uncertainty.temperatures,
+        temperatures), np.median(sigma / samRadiance), noise, uncertainty))
+
+def checkCoadd(scans=200, samples=2000, seed=0):
+    """Check that the single pass coadd matches the mean and variance of the
+    scans held in memory, including when partial coadds are merged.
+
+    returns:
+        True if the coadds agree.
+    """
+
+    random = np.random.RandomState(seed)
+    wavelength, samRadiance, dwrRadiance, emissivity = syntheticSpectra(
+        samples=samples)
+
+    def _scans(count):
+        for i in range(count):
+            yield samRadiance * (1 + 0.01 * random.randn(samples)) + 1e3
+
+    held = np.array(list(_scans(scans)))
+    random.seed(seed)
+
+    streamed = coaddScans(_scans(scans))
+
+    random.seed(seed)
+    merged = coaddScans(_scans(scans // 3))
+    merged.merge(coaddScans(_scans(scans - scans // 3)))
+
+    agree = True
+    for accumulator in [streamed, merged]:
+        agree = agree and (accumulator.count == scans and
+            np.allclose(accumulator.mean, np.mean(held, 0), rtol=1e-12) and
+            np.allclose(accumulator.variance(), np.var(held, 0, ddof=1),
+            rtol=1e-9))
+
+    print('streaming coadd of {0} scans matches held scans: {1} ({2:.0f} kB '
+        'of state instead of {3:.0f} kB)'.format(scans, agree,
+        2 * streamed.mean.nbytes / 1e3, held.nbytes / 1e3))
+
+    return agree
+
+def main():
+    """Run all benchmarks.
+    """
+
+    checkCoadd()
+    benchmarkKernels()
+    benchmarkPrecision()
+    benchmarkSweep()
+    benchmarkHybrid()
+    benchmarkPrefetch()
+    benchmarkBinning()
+    benchmarkLibrary()
+    benchmarkUncertainty()
+
+if __name__ == '__main__':
+    main()
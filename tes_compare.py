@@ -0,0 +1,84 @@
+"""Single pass comparison of the temperature emissivity separation techniques.
+
+The emissivity surface is built once over the wavelength range covering
+every technique, and the waterband, smoothness and moving window metrics are
+all evaluated from views of it.  These are the tes_search approximations of
+the techniques, so the estimates are approximate and may differ from the
+temperatures found by the techniques themselves.
+
+title:              tes_compare
+
+date:               October 2026
+"""
+
+import numpy as np
+
+import tes_search
+from wave_index import WavelengthIndex
+
+def compareTechniques(samRadiance, dwrRadiance, wavelength, lowerTemp,
+        upperTemp, techniques, dtype=np.float64):
+    """Estimate the sample temperature with several techniques from one
+    emissivity surface.
+
+    arguments:
+        samRadiance - Calibrated sample radiance.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        techniques - List of dictionaries describing each technique, with
+            keys 'name', 'metric' (one of 'waterband', 'smoothness' or
+            'window'), 'lowerWave' and 'upperWave', and for the window metric
+            'widths' and 'numWindows'.
+        dtype - NumPy floating point type to compute in.
+
+    returns:
+        The array of search temperatures, and a list with a dictionary per
+        technique holding its 'name', 'temperature', 'wave' and 'metric'.
+    """
+
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+    # one surface over the union of the technique wavelength ranges
+    waveIndex = WavelengthIndex(wavelength)
+    region = waveIndex.slice(min(t['lowerWave'] for t in techniques),
+        max(t['upperWave'] for t in techniques))
+
+    order = slice(None, None, -1) if waveIndex.descending else slice(None)
+
+    regionWave = np.asarray(wavelength)[region][order]
+    samRegion = np.asarray(samRadiance)[region][order]
+    if dwrRadiance is None:
+        dwrRegion = None
+    else:
+        dwrRegion = np.asarray(dwrRadiance)[region][order]
+
+    surface = tes_search.emissivitySurface(samRegion, dwrRegion, regionWave,
+        temps, dtype)
+    regionIndex = WavelengthIndex(regionWave)
+
+    results = []
+
+    for technique in techniques:
+        lowerWave, upperWave = technique['lowerWave'], technique['upperWave']
+        part = regionIndex.slice(lowerWave, upperWave)
+
+        if technique['metric'] == 'waterband':
+            metric = tes_search.waterbandMetric(surface, part)
+            temp = tes_search.bestTemperature(temps, metric)
+            wave = [[lowerWave, upperWave]]
+        elif technique['metric'] == 'smoothness':
+            metric = tes_search.smoothnessMetric(surface, part)
+            temp = tes_search.bestTemperature(temps, metric)
+            wave = [[lowerWave, upperWave]]
+        else:
+            metrics, bounds = tes_search.windowMetrics(surface[:, part],
+                regionWave[part], technique['widths'])
+            temp, wave, metric = tes_search.selectWindows(temps, metrics,
+                bounds, technique.get('numWindows', 1))
+
+        results.append({'name': technique['name'], 'temperature': temp,
+            'wave': wave, 'metric': metric})
+
+    return temps, results
@@ -9,7 +9,10 @@ author:             Ryan LaClair
 date:               April-June 2014
 """
 
+import os
 import sys
+import time
+import concurrent.futures
 from PyQt4 import QtGui, QtCore
 import numpy as np
 import xml.etree.ElementTree as et
@@ -21,9 +24,19 @@ from matplotlib.backends.backend_qt4agg import (FigureCanvasQTAgg
 from matplotlib.backends.backend_qt4agg import (NavigationToolbar2QT
     as NavigationToolbar)
 
-import dp_radiance_calibration as dp
-import tes
-from bb_radiance import bbRadiance
+import tes_search
+import tes_hybrid
+import regrid
+import tes_compare
+import tes_batch
+import tes_uncertainty
+import pipeline_metrics
+from result_store import ResultWriter, ResultStore
+from result_overlay import OverlayData, Overlay
+from downwelling import DownwellingSession
+from emissivity_library import loadLibrary
+from search_animation import exportSearchAnimation, ffmpegAvailable
+from wave_index import WavelengthIndex
 
 class MainWindow(QtGui.QWidget):
     """The main window of the GUI that is composed of 3 selectable tabs.
@@ -35,9 +48,70 @@ class MainWindow(QtGui.QWidget):
 
         super(MainWindow, self).__init__()
 
+        # downwelling measurements read once and reused across runs
+        self.downwellingSession = None
+
+        # reference emissivity library, loaded on the sample grid when needed
+        self.emissivityLibrary = None
+
+        # writer of the results directory, kept open so results of many runs
+        # share a chunk
+        self.resultWriter = None
+
+        # single background thread running the full separation technique
+        self.searchExecutor = concurrent.futures.ThreadPoolExecutor(1)
+        self.search = None
+
         self.initUI()
+        self._startMetrics()
         self.show()
 
+    def _startMetrics(self):
+        """Export the pipeline metrics from a local HTTP endpoint and/or to a
+        file, when enabled in the configuration.  Export errors are reported
+        in the status text rather than stopping the program.
+        """
+
+        self.metricsServer = None
+        self.metricsExporter = None
+
+        # export errors, kept in the status text across runs
+        self.metricsStatus = {}
+
+        if (self.metricsPort != ''):
+            try:
+                self.metricsServer = pipeline_metrics.serve(
+                    int(self.metricsPort))
+            except (IOError, OSError, ValueError) as error:
+                self.metricsStatus['server'] = ('Metrics not served on port '
+                    '{0}: {1}'.format(self.metricsPort, error))
+                self._addStatus(self.metricsStatus['server'])
+
+        if (self.metricsFile != ''):
+            self.metricsExporter = pipeline_metrics.FileExporter(
+                self.metricsFile)
+
+            # the exporter writes from its own thread, so its errors are
+            # checked for here
+            self.metricsTimer = QtCore.QTimer(self)
+            self.metricsTimer.timeout.connect(self._checkMetricsFile)
+            self.metricsTimer.start(int(self.metricsExporter.interval * 1000))
+
+    def _checkMetricsFile(self):
+        """Report a new error of the metrics file exporter in the status text.
+        """
+
+        error = self.metricsExporter.error
+
+        if error is None:
+            self.metricsStatus.pop('file', None)
+            return
+
+        status = 'Metrics file not written: {0}'.format(error)
+        if (self.metricsStatus.get('file') != status):
+            self.metricsStatus['file'] = status
+            self._addStatus(status)
+
     def initUI(self):
         """Initialize the top level of the main window user interface layout.
         The layout consists of a tabbed interface, a text box used to display
@@ -87,6 +161,7 @@ class MainWindow(QtGui.QWidget):
         self.sam = QtGui.QLabel('Sample:')
         self.dwr = QtGui.QLabel('Downwelling:')
         self.plate = QtGui.QLabel('Plate emissivity:')
+        self.results = QtGui.QLabel('Results:')
 
         self.cbbEdit = QtGui.QLineEdit()
         self.cbbEdit.setPlaceholderText('Required..')
@@ -96,8 +171,11 @@ class MainWindow(QtGui.QWidget):
         self.samEdit.setPlaceholderText('Required..')
         self.dwrEdit = QtGui.QLineEdit()
         self.dwrEdit.setPlaceholderText('Optional..')
+        self.dwrEdit.setToolTip('Downwelling file, or a directory of downwelling files from which the one measured nearest in time to the sample is used.')
         self.plateEdit = QtGui.QLineEdit()
         self.plateEdit.setPlaceholderText('Optional..')
+        self.resultsEdit = QtGui.QLineEdit()
+        self.resultsEdit.setPlaceholderText('Optional..')
 
         self.cbbButton = QtGui.QPushButton('Browse')
         self.cbbButton.setFixedWidth(100)
@@ -107,6 +185,8 @@ class MainWindow(QtGui.QWidget):
         self.samButton.setFixedWidth(100)
         self.dwrButton = QtGui.QPushButton('Browse')
         self.dwrButton.setFixedWidth(100)
+        self.resultsButton = QtGui.QPushButton('Browse')
+        self.resultsButton.setFixedWidth(100)
 
         fileSelectorLayout = QtGui.QGridLayout()
         fileSelectorLayout.addWidget(self.cbb, 0, 0, QtCore.Qt.AlignRight)
@@ -123,11 +203,15 @@ class MainWindow(QtGui.QWidget):
         fileSelectorLayout.addWidget(self.dwrButton, 3, 2)
         fileSelectorLayout.addWidget(self.plate, 4, 0, QtCore.Qt.AlignRight)
         fileSelectorLayout.addWidget(self.plateEdit, 4, 1)
+        fileSelectorLayout.addWidget(self.results, 5, 0, QtCore.Qt.AlignRight)
+        fileSelectorLayout.addWidget(self.resultsEdit, 5, 1)
+        fileSelectorLayout.addWidget(self.resultsButton, 5, 2)
 
         self.cbbButton.clicked.connect(self._handleCbbButton)
         self.wbbButton.clicked.connect(self._handleWbbButton)
         self.samButton.clicked.connect(self._handleSamButton)
         self.dwrButton.clicked.connect(self._handleDwrButton)
+        self.resultsButton.clicked.connect(self._handleResultsButton)
 
         return fileSelectorLayout
 
@@ -152,11 +236,14 @@ class MainWindow(QtGui.QWidget):
     def _handleSamButton(self):
         """Open a file selection dialog to choose a .sam (sample) file when the
         corresponding SAM button is pressed, and update the SAM text area to
-        reflect the chosen file.
+        reflect the chosen file.  Choosing several files coadds them as
+        repeat measurements of the sample.
         """
 
-        self.samEdit.setText(QtGui.QFileDialog.getOpenFileName(self,
-            'Choose a sample file..', '', 'SAM (*.sam)'))
+        files = QtGui.QFileDialog.getOpenFileNames(self,
+            'Choose sample files..', '', 'SAM (*.sam)')
+        self.samEdit.setText((tes_batch.SAMPLE_SEPARATOR + ' ').join(
+            str(name) for name in files))
 
     def _handleDwrButton(self):
         """Open a file selection dialog to choose a .dwr (downwelling) file
@@ -167,12 +254,30 @@ class MainWindow(QtGui.QWidget):
         self.dwrEdit.setText(QtGui.QFileDialog.getOpenFileName(self,
             'Choose a downwelling file..', '', 'DWR (*.dwr)'))
 
+    def _handleResultsButton(self):
+        """Open a directory selection dialog to choose the result store that
+        separation results are appended to when the corresponding Results
+        button is pressed, and update the Results text area to reflect the
+        chosen directory.
+        """
+
+        self.resultsEdit.setText(QtGui.QFileDialog.getExistingDirectory(self,
+            'Choose a results directory..'))
+
     def _parseConfig(self):
         """
         """
 
         tree = et.parse('tes_config.xml')
 
+        self.precision = tree.findtext('precision', 'float64').strip()
+        self.binWidth = tree.findtext('binWidth', '').strip()
+        self.replicates = tree.findtext('uncertaintyReplicates', '').strip()
+        self.metricsPort = tree.findtext('metricsPort', '').strip()
+        self.metricsFile = tree.findtext('metricsFile', '').strip()
+        self.libraryDirectory = tree.findtext('libraryDirectory', '').strip()
+        self.hybSearchBand = '{0:g}'.format(tes_hybrid.DEFAULT_SEARCH_BAND)
+
         for method in tree.iterfind('method'):
             if (method.attrib['name'] == 'waterband'):
                 self.wbTolerance = method.find('variationTolerance').text
@@ -217,6 +322,10 @@ class MainWindow(QtGui.QWidget):
 
                 self.vmwWinStep = method.find('windowStep').text
 
+            elif (method.attrib['name'] == 'hybrid'):
+                self.hybSearchBand = (method.findtext('searchBand') or
+                    self.hybSearchBand).strip()
+
             else:
                 self.mmwTolerance = method.find('variationTolerance').text
 
@@ -245,15 +354,21 @@ class MainWindow(QtGui.QWidget):
         self.windowLimits = QtGui.QLabel('Window width:')
         self.windowStep = QtGui.QLabel('Window step:')
         self.numWindows = QtGui.QLabel('Number of windows:')
+        self.searchBand = QtGui.QLabel('Waterband search band:')
         self.plots = QtGui.QLabel('Plots:')
+        self.precisionLabel = QtGui.QLabel('Precision:')
+        self.binWidthLabel = QtGui.QLabel('Spectral bin width:')
+        self.replicatesLabel = QtGui.QLabel('Uncertainty replicates:')
         self.percent = QtGui.QLabel('%')
         self.k1 = QtGui.QLabel('K')
         self.k2 = QtGui.QLabel('K')
+        self.k3 = QtGui.QLabel('K')
         self.micron1 = QtGui.QLabel('microns')
         self.micron2 = QtGui.QLabel('microns')
         self.micron3 = QtGui.QLabel('microns')
         self.micron4 = QtGui.QLabel('microns')
         self.micron5 = QtGui.QLabel('microns')
+        self.micron6 = QtGui.QLabel('microns')
 
         # measurement tolerance
         self.measurementToleranceEdit = QtGui.QLineEdit()
@@ -290,6 +405,20 @@ class MainWindow(QtGui.QWidget):
         self.numWindowsEdit = QtGui.QLineEdit()
         self.numWindowsEdit.setFixedWidth(75)
 
+        # temperature band searched around the waterband estimate
+        self.searchBandEdit = QtGui.QLineEdit()
+        self.searchBandEdit.setFixedWidth(75)
+
+        # width of the bins the spectra are reduced to before the search
+        self.binWidthEdit = QtGui.QLineEdit()
+        self.binWidthEdit.setFixedWidth(75)
+        self.binWidthEdit.setText(self.binWidth)
+
+        # number of noisy replicates searched for the temperature uncertainty
+        self.replicatesEdit = QtGui.QLineEdit()
+        self.replicatesEdit.setFixedWidth(75)
+        self.replicatesEdit.setText(self.replicates)
+
         self.techniqueComboBox = QtGui.QComboBox(self)
         self.techniqueComboBox.addItem(
             'Waterband Temperature Emissivity Separation')
@@ -301,13 +430,22 @@ class MainWindow(QtGui.QWidget):
             'Variable Moving Window Temperature Emissivity Separation')
         self.techniqueComboBox.addItem(
             'Multiple Moving Window Temperature Emissivity Separation')
+        self.techniqueComboBox.addItem(
+            'Hybrid Waterband Seeded Multiple Moving Window Temperature Emissivity Separation')
         self.techniqueComboBox.currentIndexChanged.connect(
             self._handleTechnique)
 
+        self.precisionComboBox = QtGui.QComboBox(self)
+        self.precisionComboBox.addItem('float64')
+        self.precisionComboBox.addItem('float32')
+        self.precisionComboBox.setCurrentIndex(
+            max(self.precisionComboBox.findText(self.precision), 0))
+
         self.radiancePlotCheckBox = QtGui.QCheckBox('Calibrated radiance')
         self.emissivityPlotCheckBox = QtGui.QCheckBox('Calculated emissivity')
         self.emissivitySearchCheckBox = QtGui.QCheckBox('Emissivity search')
         self.metricPlotCheckBox = QtGui.QCheckBox('Variation criterea')
+        self.exportSearchCheckBox = QtGui.QCheckBox('Export search animation')
 
         # tooltips
         self.measurementTolerance.setToolTip('Maximum allowed error between coadds.')
@@ -325,16 +463,29 @@ class MainWindow(QtGui.QWidget):
         self.windowStepEdit.setToolTip(self.windowStep.toolTip())
         self.numWindows.setToolTip('The total number of windows to examine at one time.')
         self.numWindowsEdit.setToolTip(self.numWindows.toolTip())
+        self.searchBand.setToolTip('Half width of the temperature band around the waterband estimate in which to perform the moving window search.')
+        self.searchBandEdit.setToolTip(self.searchBand.toolTip())
         self.radiancePlotCheckBox.setToolTip('Display a plot of the calibrated radiance curves for the sample, downwelling, cold blackbody and warm blackbody.')
         self.emissivityPlotCheckBox.setToolTip('Display a plot of the final calculated emissivity.')
         self.emissivitySearchCheckBox.setToolTip('Display a dynamic plot of the emissivity curve at each temperature examined.')
         self.metricPlotCheckBox.setToolTip('Display a plot of the variation metric used to determine the best temperature approximation.')
+        self.exportSearchCheckBox.setToolTip('Render the emissivity search animation to a video or GIF file in the background.')
+        if not ffmpegAvailable():
+            self.exportSearchCheckBox.setEnabled(False)
+            self.exportSearchCheckBox.setToolTip('Exporting the search animation needs ffmpeg, which was not found on the PATH.')
+        self.precisionLabel.setToolTip('Floating point precision of the calibrated spectra and of the approximate array search used for progressive estimates, comparisons, uncertainty and animations.  Single precision halves memory use.  tes_benchmark reports the temperature difference it makes.')
+        self.precisionComboBox.setToolTip(self.precisionLabel.toolTip())
+        self.binWidthLabel.setToolTip('Average the spectra into bins of this width before the temperature search.  The final emissivity keeps the full resolution.  Leave blank to search at full resolution.')
+        self.binWidthEdit.setToolTip(self.binWidthLabel.toolTip())
+        self.replicatesLabel.setToolTip('Repeat the temperature search on this many copies of the sample with noise added, and report the spread of the temperatures found.  Leave blank to skip.')
+        self.replicatesEdit.setToolTip(self.replicatesLabel.toolTip())
 
         checkBoxLayout = QtGui.QGridLayout()
         checkBoxLayout.addWidget(self.radiancePlotCheckBox, 0, 0)
         checkBoxLayout.addWidget(self.emissivityPlotCheckBox, 0, 1)
         checkBoxLayout.addWidget(self.emissivitySearchCheckBox, 1, 0)
         checkBoxLayout.addWidget(self.metricPlotCheckBox, 1, 1)
+        checkBoxLayout.addWidget(self.exportSearchCheckBox, 2, 0)
         checkBoxLayout.setContentsMargins(0, 0, 0, 0)
 
         checkBoxWidget = QtGui.QFrame()
@@ -345,6 +496,8 @@ class MainWindow(QtGui.QWidget):
         self.waveLimitsUnits = self._addUnits(self.minWaveEdit, self.micron1, self.maxWaveEdit, self.micron2)
         self.windowLimitsUnits = self._addUnits(self.minWinEdit, self.micron3, self.maxWinEdit, self.micron4)
         self.windowStepUnits = self._addUnits(self.windowStepEdit, self.micron5)
+        self.searchBandUnits = self._addUnits(self.searchBandEdit, self.k3)
+        self.binWidthUnits = self._addUnits(self.binWidthEdit, self.micron6)
 
         windowLimitsWidget = self._makeWidget(self.windowLimitsUnits)
         windowStepWidget = self._makeWidget(self.windowStepUnits)
@@ -368,8 +521,16 @@ class MainWindow(QtGui.QWidget):
         optionSelectorLayout.addWidget(windowStepWidget, 5, 1)
         optionSelectorLayout.addWidget(self.numWindows, 6, 0, QtCore.Qt.AlignRight)
         optionSelectorLayout.addWidget(numWindowsWidget, 6, 1, QtCore.Qt.AlignLeft)
-        optionSelectorLayout.addWidget(self.plots, 7, 0, QtCore.Qt.AlignRight)
-        optionSelectorLayout.addWidget(checkBoxWidget, 7, 1)
+        optionSelectorLayout.addWidget(self.searchBand, 7, 0, QtCore.Qt.AlignRight)
+        optionSelectorLayout.addWidget(self._makeWidget(self.searchBandUnits), 7, 1, QtCore.Qt.AlignLeft)
+        optionSelectorLayout.addWidget(self.plots, 8, 0, QtCore.Qt.AlignRight)
+        optionSelectorLayout.addWidget(checkBoxWidget, 8, 1)
+        optionSelectorLayout.addWidget(self.precisionLabel, 9, 0, QtCore.Qt.AlignRight)
+        optionSelectorLayout.addWidget(self.precisionComboBox, 9, 1, QtCore.Qt.AlignLeft)
+        optionSelectorLayout.addWidget(self.binWidthLabel, 10, 0, QtCore.Qt.AlignRight)
+        optionSelectorLayout.addWidget(self._makeWidget(self.binWidthUnits), 10, 1, QtCore.Qt.AlignLeft)
+        optionSelectorLayout.addWidget(self.replicatesLabel, 11, 0, QtCore.Qt.AlignRight)
+        optionSelectorLayout.addWidget(self.replicatesEdit, 11, 1, QtCore.Qt.AlignLeft)
 
         self._waterbandOptions()
 
@@ -430,7 +591,9 @@ class MainWindow(QtGui.QWidget):
 
         technique = str(self.techniqueComboBox.currentText())
 
-        if ('Waterband' in technique):
+        if ('Hybrid' in technique):
+            self._hybridOptions()
+        elif ('Waterband' in technique):
             self._waterbandOptions()
         elif ('Standard' in technique):
             self._standardOptions()
@@ -466,7 +629,10 @@ class MainWindow(QtGui.QWidget):
         self.windowStepUnits.setVisible(False)
         self.numWindows.setVisible(False)
         self.numWindowsEdit.setVisible(False)
+        self.searchBand.setVisible(False)
+        self.searchBandUnits.setVisible(False)
         self.emissivitySearchCheckBox.setVisible(True)
+        self.exportSearchCheckBox.setVisible(True)
         self.metricPlotCheckBox.setVisible(True)
 
         self.waveLimits.setToolTip('Upper and lower waterband wavelength limits to be used in the temperature determination.')
@@ -499,7 +665,10 @@ class MainWindow(QtGui.QWidget):
         self.windowStepUnits.setVisible(False)
         self.numWindows.setVisible(False)
         self.numWindowsEdit.setVisible(False)
+        self.searchBand.setVisible(False)
+        self.searchBandUnits.setVisible(False)
         self.emissivitySearchCheckBox.setVisible(True)
+        self.exportSearchCheckBox.setVisible(True)
         self.metricPlotCheckBox.setVisible(True)
 
         self.waveLimits.setToolTip('Upper and lower wavelength limits to be used in the temperature determination.')
@@ -525,6 +694,7 @@ class MainWindow(QtGui.QWidget):
         self.numWindowsEdit.setText('')
 
         self.emissivitySearchCheckBox.setChecked(False)
+        self.exportSearchCheckBox.setChecked(False)
         self.metricPlotCheckBox.setChecked(False)
 
         self.maxWinEdit.setVisible(False)
@@ -535,7 +705,10 @@ class MainWindow(QtGui.QWidget):
         self.windowStepUnits.setVisible(False)
         self.numWindows.setVisible(False)
         self.numWindowsEdit.setVisible(False)
+        self.searchBand.setVisible(False)
+        self.searchBandUnits.setVisible(False)
         self.emissivitySearchCheckBox.setVisible(False)
+        self.exportSearchCheckBox.setVisible(False)
         self.metricPlotCheckBox.setVisible(False)
 
         self.waveLimits.setToolTip('Upper and lower wavelength limits to be used in the temperature determination.')
@@ -563,6 +736,7 @@ class MainWindow(QtGui.QWidget):
         self.numWindowsEdit.setText('')
 
         self.emissivitySearchCheckBox.setChecked(False)
+        self.exportSearchCheckBox.setChecked(False)
         self.metricPlotCheckBox.setChecked(False)
 
         self.maxWinEdit.setVisible(True)
@@ -573,7 +747,10 @@ class MainWindow(QtGui.QWidget):
         self.windowStepUnits.setVisible(True)
         self.numWindows.setVisible(False)
         self.numWindowsEdit.setVisible(False)
+        self.searchBand.setVisible(False)
+        self.searchBandUnits.setVisible(False)
         self.emissivitySearchCheckBox.setVisible(False)
+        self.exportSearchCheckBox.setVisible(False)
         self.metricPlotCheckBox.setVisible(False)
 
         self.waveLimits.setToolTip('Upper and lower wavelength limits to be used in the temperature determination.')
@@ -602,6 +779,7 @@ class MainWindow(QtGui.QWidget):
         self.numWindowsEdit.setText(self.mmwNumWins)
 
         self.emissivitySearchCheckBox.setChecked(False)
+        self.exportSearchCheckBox.setChecked(False)
         self.metricPlotCheckBox.setChecked(False)
 
         self.maxWinEdit.setVisible(True)
@@ -612,7 +790,10 @@ class MainWindow(QtGui.QWidget):
         self.windowStepUnits.setVisible(True)
         self.numWindows.setVisible(True)
         self.numWindowsEdit.setVisible(True)
+        self.searchBand.setVisible(False)
+        self.searchBandUnits.setVisible(False)
         self.emissivitySearchCheckBox.setVisible(False)
+        self.exportSearchCheckBox.setVisible(False)
         self.metricPlotCheckBox.setVisible(False)
 
         self.waveLimits.setToolTip('Upper and lower wavelength limits to be used in the temperature determination.')
@@ -622,6 +803,17 @@ class MainWindow(QtGui.QWidget):
         self.minWinEdit.setToolTip('Lower window limit')
         self.maxWinEdit.setToolTip('Upper window limit')
 
+    def _hybridOptions(self):
+        """
+        """
+
+        self._multipleOptions()
+
+        self.searchBandEdit.setText(self.hybSearchBand)
+
+        self.searchBand.setVisible(True)
+        self.searchBandUnits.setVisible(True)
+
     def _about(self):
         """Creates the layout for the about tab.
         """
@@ -637,18 +829,25 @@ class MainWindow(QtGui.QWidget):
     def _temperatureBox(self):
         """Creates the layout for the temperature box used to display the
         estimated temperature after performing the specified temperature
-        emissivity separation.
+        emissivity separation, and a status line below it.
         """
 
         self.temperature = QtGui.QLabel('Sample temperature:')
 
         self.temperatureEdit = QtGui.QLabel(' ')
 
+        self.statusEdit = QtGui.QLabel('')
+        self.statusEdit.setWordWrap(True)
+
         temperatureGroup = QtGui.QGroupBox()
 
-        temperatureBoxLayout = QtGui.QHBoxLayout()
-        temperatureBoxLayout.addWidget(self.temperature)
-        temperatureBoxLayout.addWidget(self.temperatureEdit, QtCore.Qt.AlignLeft)
+        temperatureRowLayout = QtGui.QHBoxLayout()
+        temperatureRowLayout.addWidget(self.temperature)
+        temperatureRowLayout.addWidget(self.temperatureEdit, QtCore.Qt.AlignLeft)
+
+        temperatureBoxLayout = QtGui.QVBoxLayout()
+        temperatureBoxLayout.addLayout(temperatureRowLayout)
+        temperatureBoxLayout.addWidget(self.statusEdit)
 
         temperatureGroup.setLayout(temperatureBoxLayout)
 
@@ -660,16 +859,26 @@ class MainWindow(QtGui.QWidget):
 
         self.okButton = QtGui.QPushButton('Ok')
         self.okButton.setFixedWidth(100)
+        self.compareButton = QtGui.QPushButton('Compare all')
+        self.compareButton.setFixedWidth(100)
+        self.compareButton.setToolTip('Approximate the temperature found by every technique from a single emissivity search.')
+        self.overlayButton = QtGui.QPushButton('Overlay results')
+        self.overlayButton.setFixedWidth(100)
+        self.overlayButton.setToolTip('Overlay the emissivity and metric of every result in the results directory.')
         self.cancelButton = QtGui.QPushButton('Cancel')
         self.cancelButton.setFixedWidth(100)
 
         buttonLayout = QtGui.QHBoxLayout()
         buttonLayout.addStretch()
         buttonLayout.addWidget(self.okButton)
+        buttonLayout.addWidget(self.compareButton)
+        buttonLayout.addWidget(self.overlayButton)
         buttonLayout.addWidget(self.cancelButton)
         buttonLayout.addStretch()
 
         self.okButton.clicked.connect(self._handleOkButton)
+        self.compareButton.clicked.connect(self._handleCompareButton)
+        self.overlayButton.clicked.connect(self._handleOverlayButton)
         self.cancelButton.clicked.connect(self._handleCancelButton)
 
         return buttonLayout
@@ -680,6 +889,27 @@ class MainWindow(QtGui.QWidget):
 
         self.findTemperature()
 
+    def _handleCompareButton(self):
+        """Compares every separation technique when the Compare all button is
+        pressed.
+        """
+
+        self.compareTechniques()
+
+    def _handleOverlayButton(self):
+        """Opens an overlay of the stored results when the Overlay results
+        button is pressed, asking for a results directory if none is set.
+        """
+
+        path = str(self.resultsEdit.text())
+
+        if (path == ''):
+            path = str(QtGui.QFileDialog.getExistingDirectory(self,
+                'Choose a results directory..'))
+
+        if (path != ''):
+            self.overlayPlot = OverlayWindow(ResultStore(path))
+
     def _handleCancelButton(self):
         """Closes the program when the Cancel button is pressed.
         """
@@ -695,12 +925,15 @@ class MainWindow(QtGui.QWidget):
             QtCore.QString(), 0, 0)
         progress.show()
 
+        self._clearStatus()
+
         # gather the information from the GUI needed for processing
         cbbFile = str(self.cbbEdit.text())
         wbbFile = str(self.wbbEdit.text())
         samFile = str(self.samEdit.text())
         dwrFile = str(self.dwrEdit.text())
         plateEmissivity = str(self.plateEdit.text())
+        resultsPath = str(self.resultsEdit.text())
         technique = str(self.techniqueComboBox.currentText())
         tolerance = float(self.measurementToleranceEdit.text())
         lowerTemp = float(self.minTempEdit.text())
@@ -711,92 +944,601 @@ class MainWindow(QtGui.QWidget):
         upperWin = self.maxWinEdit.text()
         windowStep = self.windowStepEdit.text()
         numWindows = self.numWindowsEdit.text()
+        searchBand = str(self.searchBandEdit.text()).strip()
+        binWidth = str(self.binWidthEdit.text())
+        replicates = str(self.replicatesEdit.text())
+        dtype = tes_search.precisionType(self.precisionComboBox.currentText())
 
-        if (plateEmissivity == ''):
-            plateEmissivity = -1
+        if (binWidth == ''):
+            binWidth = None
         else:
-            plateEmissivity = int(plateEmissivity)
+            binWidth = float(binWidth)
 
-        # read the user specified files
-        cbb = dp.readDpFile(cbbFile)
-        wbb = dp.readDpFile(wbbFile)
-        sam = dp.readDpFile(samFile)
+        # a downwelling that does not cover the sample grid, or one chosen by
+        # time for a sample that records no time, cannot be used
+        try:
+            cbb, wbb, sam, dwr, toleranceTests, dwrFile = self._calibrate(
+                cbbFile, wbbFile, samFile, dwrFile, plateEmissivity, dtype)
+        except ValueError as error:
+            progress.hide()
+            QtGui.QMessageBox.warning(self, 'Calibration',
+                'The measurements could not be calibrated:\n{0}'.format(error))
+            return
 
-        if (dwrFile == ''):
-            dwr = None
-            toleranceTests = dp.calibrateDpData(plateEmissivity, cbb, wbb, sam)
-        else:
-            dwr = dp.readDpFile(dwrFile)
-            toleranceTests = dp.calibrateDpData(plateEmissivity, cbb, wbb, sam, dwr)
+        # index the sample wavelength grid once for every later stage
+        waveIndex = WavelengthIndex(sam.spectrum.wavelength)
+
+        lowerWin, upperWin, windowSteps, numWindows = tes_batch.windowSettings(
+            lowerWave, upperWave, lowerWin, upperWin, windowStep, numWindows)
+
+        metric = self.metricPlotCheckBox.isChecked()
+        waterband = ('Waterband' in technique and not 'Hybrid' in technique)
 
-        if (lowerWin == ''):
-            lowerWin = upperWave - lowerWave
+        # publish fast coarse to fine estimates before the full technique
+        self._progressiveEstimate(sam, dwr, waveIndex, lowerTemp, upperTemp,
+            lowerWave, upperWave, waterband, metric, technique, dtype)
+
+        if ('Hybrid' in technique):
+            waterbandWave = (float(self.wbLowerWave), float(self.wbUpperWave))
+
+            if (searchBand == ''):
+                searchBand = tes_hybrid.DEFAULT_SEARCH_BAND
+                self._addStatus('No waterband search band given, searching '
+                    '{0:g} K either side of the waterband estimate.'.format(
+                    searchBand))
+            else:
+                searchBand = float(searchBand)
         else:
-            lowerWin = float(lowerWin)
+            waterbandWave = None
+            searchBand = None
+
+        settings = {'technique': technique, 'lowerTemp': lowerTemp,
+            'upperTemp': upperTemp, 'lowerWave': lowerWave,
+            'upperWave': upperWave, 'lowerWin': lowerWin,
+            'upperWin': upperWin, 'windowSteps': windowSteps,
+            'numWindows': numWindows, 'waterbandWave': waterbandWave,
+            'searchBand': searchBand}
+
+        def _finish(temp, diffs, wave, binningCheck, uncertainty):
+            if ('Hybrid' in technique):
+                self._addStatus(self._hybridStatus(lowerTemp, upperTemp,
+                    diffs))
+
+            if not binningCheck is None:
+                self._addStatus(self._binningStatus(binWidth,
+                    binningCheck['speedup'],
+                    binningCheck['temperatureDifference']))
+
+            if not uncertainty is None:
+                self._addStatus('Uncertainty from {0} noise replicates '
+                    'searched with the array approximation of the {1} '
+                    'technique.'.format(len(uncertainty.temperatures),
+                    technique))
+
+            # display estimated temperature with 2 decimal places
+            if (temp == 0):
+                self.temperatureEdit.setText('Unknown')
+            elif uncertainty is None:
+                self.temperatureEdit.setText('{0:.1f} K'.format(temp))
+            else:
+                self.temperatureEdit.setText('{0:.1f} K ({1})'.format(temp,
+                    uncertainty))
+
+            # closest reference spectra to the final emissivity
+            libraryMatches = None
+            if (temp != 0 and self.libraryDirectory != ''):
+                libraryMatches = self._matchLibrary(sam, dwr, temp, dtype)
+
+            # append the result to the result store
+            if (resultsPath != ''):
+                provenance = {'cbb': cbbFile, 'wbb': wbbFile, 'sam': samFile,
+                    'dwr': dwrFile, 'technique': technique,
+                    'wave': [list(map(float, band)) for band in wave],
+                    'precision': np.dtype(dtype).name, 'binWidth': binWidth}
+                if not binningCheck is None:
+                    provenance['binningCheck'] = binningCheck
+                if not libraryMatches is None:
+                    provenance['libraryMatches'] = libraryMatches
+                if not uncertainty is None:
+                    provenance['uncertainty'] = {'mean': uncertainty.mean,
+                        'std': uncertainty.std, 'lower': uncertainty.lower,
+                        'upper': uncertainty.upper,
+                        'confidence': uncertainty.confidence,
+                        'replicates': len(uncertainty.temperatures),
+                        'method': uncertainty.method}
+
+                self._storeResult(resultsPath, sam, dwr, temp, diffs,
+                    lowerTemp, upperTemp, dtype, provenance)
+
+            radiance = self.radiancePlotCheckBox.isChecked()
+            finalEmissivity = self.emissivityPlotCheckBox.isChecked()
+            searchEmissivity = self.emissivitySearchCheckBox.isChecked()
+            exportSearch = self.exportSearchCheckBox.isChecked()
+
+            # handle any plots specified by the user
+            with pipeline_metrics.timed('plot'):
+                if radiance:
+                    self.radiancePlot = RadiancePlotWindow(cbb, wbb, sam, dwr)
+                if metric:
+                    self._showMetric(lowerTemp, upperTemp, diffs, waterband,
+                        tes_search.temperatureGrid(lowerTemp, upperTemp),
+                        'Metric')
+                if finalEmissivity and not searchEmissivity:
+                    self.emissivityPlot = EmissivityPlotWindow(sam, dwr,
+                        lowerTemp, upperTemp, temp, wave,
+                        waveIndex=waveIndex, dtype=dtype)
+                if searchEmissivity:
+                    self.emissivityPlot = EmissivityPlotWindow(sam, dwr,
+                        lowerTemp, upperTemp, temp, wave, True, waveIndex,
+                        dtype)
+                if exportSearch:
+                    self._exportAnimation(sam, dwr, lowerTemp, upperTemp,
+                        temp, wave, dtype)
+
+            # interferogram scan tolerance test
+            displayWarning = False
+
+            for test in toleranceTests:
+                if ((100 - (test*100)) > tolerance):
+                    displayWarning = True
+
+            if (displayWarning):
+                self.warning = WarningWindow()
+
+        # the full technique runs on a background thread, polled by a timer,
+        # so the GUI stays responsive while it searches
+        self._startSearch(progress, _finish, sam, dwr, settings, binWidth,
+            replicates, dtype)
+
+    def _startSearch(self, progress, finish, sam, dwr, settings, binWidth,
+            replicates, dtype):
+        """Run the separation technique on the background thread, disabling
+        the buttons that start another search until it finishes.
+        """
+
+        self.okButton.setEnabled(False)
+        self.compareButton.setEnabled(False)
+
+        self.search = self.searchExecutor.submit(self._search, sam, dwr,
+            settings, binWidth, replicates, dtype)
+        self.searchProgress = progress
+        self.searchFinish = finish
+
+        self.searchTimer = QtCore.QTimer(self)
+        self.searchTimer.timeout.connect(self._checkSearch)
+        self.searchTimer.start(100)
+
+    def _search(self, sam, dwr, settings, binWidth, replicates, dtype):
+        """Perform temperature emissivity separation, on binned spectra if
+        requested, and estimate the temperature uncertainty.  Runs on the
+        background thread, so it must not touch any widget.
+
+        returns:
+            The temperature, metric and wavelength bands of the technique,
+            the binning check (or None) and the uncertainty (or None).
+        """
+
+        # everything after the search uses full resolution
+        start = time.time()
+        binnedSam, binnedDwr = tes_batch.binMeasurements(sam, dwr, binWidth)
+        temp, diffs, wave = tes_batch.runTechnique(binnedSam, binnedDwr,
+            **settings)
+
+        # report what binning saved against a full resolution search
+        binningCheck = None
+        if binWidth:
+            speedup, difference = tes_batch.checkBinning(sam, dwr, temp,
+                time.time() - start, settings)
+            binningCheck = {'speedup': speedup,
+                'temperatureDifference': difference}
+
+        # spread of the temperatures found for noisy replicates of the sample
+        uncertainty = None
+        if (temp != 0 and replicates != ''):
+            uncertainty = self._temperatureUncertainty(binnedSam, binnedDwr,
+                settings, temp, int(replicates), dtype)
+
+        return temp, diffs, wave, binningCheck, uncertainty
+
+    def _checkSearch(self):
+        """Finish a background search once it is done, displaying, storing
+        and plotting its result.
+        """
+
+        if not self.search.done():
+            return
+
+        self.searchTimer.stop()
+
+        self.okButton.setEnabled(True)
+        self.compareButton.setEnabled(True)
+
+        # hide the progress dialog upon completion
+        self.searchProgress.hide()
+
+        try:
+            result = self.search.result()
+        except Exception as error:
+            self.temperatureEdit.setText('Unknown')
+            QtGui.QMessageBox.warning(self, 'Temperature emissivity '
+                'separation', 'The separation failed:\n{0}'.format(error))
+            return
 
-        if (upperWin == ''):
-            upperWin = lowerWin
+        self.searchFinish(*result)
+
+    def _binningStatus(self, binWidth, speedup, difference):
+        """Describe the speedup and temperature difference of a binned search
+        compared with a full resolution search.
+        """
+
+        status = ('Binned to {0:g} microns: search {1:.1f}x faster than at '
+            'full resolution, '.format(binWidth, speedup))
+
+        if np.isnan(difference):
+            return status + 'but one of the searches found no temperature.'
+
+        return status + 'temperature {0:+.2f} K from full resolution.'.format(
+            difference)
+
+    def _hybridStatus(self, lowerTemp, upperTemp, metric):
+        """Describe the temperatures a hybrid search examined, from the
+        temperatures at which its metric is known, as the share of the
+        temperature limits the moving window search was spared.
+        """
+
+        temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+        searched = temps[np.isfinite(metric)]
+
+        if (len(searched) == len(temps)):
+            return ('Hybrid search examined the full temperature limits, '
+                'so it was no faster than the moving window technique.')
+
+        return ('Hybrid search examined {0:.1f}-{1:.1f} K, {2:.0%} of the '
+            'temperature limits.'.format(searched[0], searched[-1],
+            len(searched) / float(len(temps))))
+
+    def _clearStatus(self):
+        """Clear the status text, apart from metrics export errors.
+        """
+
+        self.statusEdit.setText('\n'.join(self.metricsStatus[key] for key in
+            sorted(self.metricsStatus)))
+
+    def _addStatus(self, text):
+        """Add a line to the status text below the temperature.
+        """
+
+        status = str(self.statusEdit.text())
+
+        if (status == ''):
+            self.statusEdit.setText(text)
         else:
-            upperWin = float(upperWin)
+            self.statusEdit.setText(status + '\n' + text)
+
+    def _matchLibrary(self, sam, dwr, temp, dtype, k=3):
+        """Match the final emissivity against the reference library of the
+        configuration over the standard technique's wavelength limits, and
+        list the closest references in the status text.  The library is
+        loaded on the sample grid when first needed.
+
+        arguments:
+            sam - Calibrated sample.
+            dwr - Calibrated downwelling, or None.
+            temp - Estimated temperature (K).
+            dtype - Working precision.
+            k - Number of matches.
 
-        if (windowStep == ''):
-            windowStep = 1
+        returns:
+            The (name, distance) matches, or None if the library could not
+            be loaded.
+        """
+
+        wavelength = sam.spectrum.wavelength
+
+        try:
+            if (self.emissivityLibrary is None or not regrid.sameGrid(
+                    self.emissivityLibrary.wavelength, wavelength)):
+                self.emissivityLibrary = loadLibrary(self.libraryDirectory,
+                    wavelength, float(self.stdLowerWave),
+                    float(self.stdUpperWave))
+        except (IOError, OSError, ValueError) as error:
+            self.emissivityLibrary = None
+            self._addStatus('Library not loaded: {0}'.format(error))
+            return None
+
+        matches = self.emissivityLibrary.match(
+            tes_batch.finalEmissivity(sam, dwr, temp, dtype), k=k)
+
+        status = 'Closest library spectra: ' + ', '.join(
+            '{0} ({1:.3f})'.format(name, distance) for name, distance in
+            matches)
+        if (len(self.emissivityLibrary.rejected) > 0):
+            status += (' ({0} references not covering the wavelength limits '
+                'left out)'.format(len(self.emissivityLibrary.rejected)))
+
+        self._addStatus(status)
+
+        return matches
+
+    def _calibrate(self, cbbFile, wbbFile, samFile, dwrFile, plateEmissivity,
+            dtype):
+        """Calibrate the measurements, the sample jointly with the
+        downwelling.  If the downwelling is a directory, the file measured
+        nearest in time to the sample is used, taken from the session store
+        so each downwelling file is only read once.
+
+        returns:
+            The calibrated cold blackbody, warm blackbody, sample and
+            downwelling (or None), the coadd tolerance tests, and the
+            downwelling file used.
+        """
+
+        if not os.path.isdir(dwrFile):
+            cbb, wbb, sam, dwr, toleranceTests = tes_batch.calibrate(cbbFile,
+                wbbFile, samFile, dwrFile, plateEmissivity, dtype)
+
+            return cbb, wbb, sam, dwr, toleranceTests, dwrFile
+
+        if self.downwellingSession is None:
+            self.downwellingSession = DownwellingSession()
+
+        self.downwellingSession.addDirectory(dwrFile)
+
+        cbb, wbb, sam, dwr, toleranceTests, dwrFiles = (
+            tes_batch.calibrateWithSession(cbbFile, wbbFile, samFile,
+            self.downwellingSession, plateEmissivity, dtype))
+
+        return cbb, wbb, sam, dwr, toleranceTests, dwrFiles[0]
+
+    def _temperatureUncertainty(self, sam, dwr, settings, temp, replicates,
+            dtype):
+        """Estimate the temperature uncertainty by searching noisy replicates
+        of the sample, with the noise level estimated from the roughness of
+        the emissivity at the estimated temperature.  The replicates are
+        searched with the limits and window widths of the technique settings
+        that produced the temperature.
+
+        returns:
+            A tes_uncertainty.Uncertainty.
+        """
+
+        parameters = tes_batch.approximateTechnique(**settings)
+
+        if dwr is None:
+            dwrRadiance = None
         else:
-            windowStep = float(windowStep)
+            dwrRadiance = dwr.spectrum.value
+
+        sigma = tes_uncertainty.noiseLevel(sam.spectrum.value, dwrRadiance,
+            sam.spectrum.wavelength, temp)
+        samReplicates = tes_uncertainty.noiseReplicates(sam.spectrum.value,
+            sigma, replicates)
+
+        return tes_uncertainty.temperatureUncertainty(samReplicates,
+            dwrRadiance, sam.spectrum.wavelength, settings['lowerTemp'],
+            settings['upperTemp'], parameters, dtype=dtype, method='noise')
+
+    def _techniqueParameters(self):
+        """Gather the configured wavelength and window parameters of every
+        separation technique.
+
+        returns:
+            A list of technique dictionaries as taken by
+            tes_compare.compareTechniques.
+        """
+
+        return [
+            {'name': 'Waterband', 'metric': 'waterband',
+                'lowerWave': float(self.wbLowerWave),
+                'upperWave': float(self.wbUpperWave)},
+            {'name': 'Standard', 'metric': 'smoothness',
+                'lowerWave': float(self.stdLowerWave),
+                'upperWave': float(self.stdUpperWave)},
+            {'name': 'Moving Window', 'metric': 'window',
+                'lowerWave': float(self.mwLowerWave),
+                'upperWave': float(self.mwUpperWave),
+                'widths': [float(self.mwWinWidth)], 'numWindows': 1},
+            {'name': 'Variable Moving Window', 'metric': 'window',
+                'lowerWave': float(self.vmwLowerWave),
+                'upperWave': float(self.vmwUpperWave),
+                'widths': tes_search.windowWidths(float(self.vmwLowerWinWidth),
+                    float(self.vmwUpperWinWidth), float(self.vmwWinStep)),
+                'numWindows': 1},
+            {'name': 'Multiple Moving Window', 'metric': 'window',
+                'lowerWave': float(self.mmwLowerWave),
+                'upperWave': float(self.mmwUpperWave),
+                'widths': tes_search.windowWidths(float(self.mmwLowerWinWidth),
+                    float(self.mmwUpperWinWidth), float(self.mmwWinStep)),
+                'numWindows': int(self.mmwNumWins)},
+        ]
+
+    def compareTechniques(self):
+        """Estimates the temperature with every separation technique from a
+        single emissivity surface over the current temperature limits, and
+        displays the estimates side by side.
+        """
 
-        if (numWindows == ''):
-            numWindows = 1
+        progress = QtGui.QProgressDialog('Please wait..',
+            QtCore.QString(), 0, 0)
+        progress.show()
+
+        lowerTemp = float(self.minTempEdit.text())
+        upperTemp = float(self.maxTempEdit.text())
+        dtype = tes_search.precisionType(self.precisionComboBox.currentText())
+
+        try:
+            cbb, wbb, sam, dwr, toleranceTests, dwrFile = self._calibrate(
+                str(self.cbbEdit.text()), str(self.wbbEdit.text()),
+                str(self.samEdit.text()), str(self.dwrEdit.text()),
+                str(self.plateEdit.text()), dtype)
+        except ValueError as error:
+            progress.hide()
+            QtGui.QMessageBox.warning(self, 'Calibration',
+                'The measurements could not be calibrated:\n{0}'.format(error))
+            return
+
+        if dwr is None:
+            dwrRadiance = None
         else:
-            numWindows = int(numWindows)
+            dwrRadiance = dwr.spectrum.value
+
+        temps, results = tes_compare.compareTechniques(sam.spectrum.value,
+            dwrRadiance, sam.spectrum.wavelength, lowerTemp, upperTemp,
+            self._techniqueParameters(), dtype)
+
+        progress.hide()
+
+        self.comparePlot = ComparisonWindow(temps, results)
 
-        if (upperWin == lowerWin):
-            windowSteps = 1
+    def _progressiveEstimate(self, sam, dwr, waveIndex, lowerTemp, upperTemp,
+            lowerWave, upperWave, waterband, metric, technique, dtype):
+        """Estimate the temperature on successively finer grids over the
+        technique's wavelength limits, displaying each estimate (and its
+        metric, if plotted) while the full technique runs.  The estimates
+        use the waterband or smoothness metric of the array search over the
+        whole wavelength range, which for the moving window techniques is a
+        different objective, so they are labelled as approximate.
+        """
+
+        if waterband:
+            metricFunction = tes_search.waterbandMetric
+            metricName = 'waterband'
         else:
-            windowSteps = ((upperWin-lowerWin) / windowStep) + 1
+            metricFunction = tes_search.smoothnessMetric
+            metricName = 'smoothness'
 
-        # perform temperature emissivity separation
-        if ('Waterband' in technique):
-            temp, diffs = tes.waterbandTes(sam, dwr, lowerTemp, upperTemp, lowerWave, upperWave)
-            wave = [[lowerWave, upperWave]]
+        if dwr is None:
+            dwrRadiance = None
         else:
-            assd, temp, wave, diffs =  tes.tes(sam, dwr, lowerTemp, upperTemp, lowerWave, upperWave, lowerWin, upperWin, windowSteps, numWindows)
+            dwrRadiance = waveIndex.view(dwr.spectrum.value, lowerWave,
+                upperWave)
+
+        estimates = tes_search.progressiveSearch(
+            waveIndex.view(sam.spectrum.value, lowerWave, upperWave),
+            dwrRadiance,
+            waveIndex.view(sam.spectrum.wavelength, lowerWave, upperWave),
+            lowerTemp, upperTemp, metricFunction, dtype=dtype)
+
+        self._addStatus('Estimates shown while the {0} technique runs are '
+            'approximate, from the {1} metric of the array search.'.format(
+            technique, metricName))
+
+        for temps, values, estimate in estimates:
+            self.temperatureEdit.setText('{0:.1f} K (approximate)'.format(
+                estimate))
+
+            if metric:
+                self._showMetric(lowerTemp, upperTemp, values, waterband,
+                    temps, 'Approximate {0} metric (estimate)'.format(
+                    metricName))
+
+            QtGui.QApplication.processEvents()
+
+    def _showMetric(self, lowerTemp, upperTemp, metric, waterband, temps,
+            title):
+        """Display a metric curve, reusing the metric window of earlier runs
+        with the limits and technique of this run.
+        """
 
-        # display estimated temperature with 2 decimal places
-        if (temp == 0):
-            self.temperatureEdit.setText('Unknown')
+        if getattr(self, 'metricPlot', None) is None:
+            self.metricPlot = MetricPlotWindow(lowerTemp, upperTemp, metric,
+                waterband, temps)
         else:
-            self.temperatureEdit.setText('{0:.1f} K'.format(temp))
+            self.metricPlot.updateMetric(lowerTemp, upperTemp, metric,
+                waterband, temps)
+            self.metricPlot.show()
 
-        # hide the progress dialog upon completion
-        progress.hide()
+        self.metricPlot.setWindowTitle(title)
 
-        radiance = self.radiancePlotCheckBox.isChecked()
-        finalEmissivity = self.emissivityPlotCheckBox.isChecked()
-        searchEmissivity = self.emissivitySearchCheckBox.isChecked()
-        metric = self.metricPlotCheckBox.isChecked()
+    def _exportAnimation(self, sam, dwr, lowerTemp, upperTemp, temp, wave,
+            dtype):
+        """Ask for an output file and render the emissivity search animation
+        to it in the background.  A timer polls for completion so the GUI is
+        never blocked.
+        """
 
-        # handle any plots specified by the user
-        if radiance:
-            self.radiancePlot = RadiancePlotWindow(cbb, wbb, sam, dwr)
-        if metric:
-            if ('Waterband' in technique):
-                self.metricPlot = MetricPlotWindow(lowerTemp, upperTemp, diffs, True)
-            else:
-                self.metricPlot = MetricPlotWindow(lowerTemp, upperTemp, diffs, False)
-        if finalEmissivity and not searchEmissivity:
-            self.emissivityPlot = EmissivityPlotWindow(sam, dwr, lowerTemp, upperTemp, temp, wave)
-        if searchEmissivity:
-            self.emissivityPlot = EmissivityPlotWindow(sam, dwr, lowerTemp, upperTemp, temp, wave, True)
+        if not ffmpegAvailable():
+            QtGui.QMessageBox.warning(self, 'Export search animation',
+                'The animation cannot be exported, ffmpeg was not found on '
+                'the PATH.')
+            return
+
+        path = str(QtGui.QFileDialog.getSaveFileName(self,
+            'Export search animation..', '', 'Video (*.mp4);;GIF (*.gif)'))
+
+        if (path == ''):
+            return
 
-        # interferogram scan tolerance test
-        displayWarning = False
+        self.animationExport = exportSearchAnimation(path, sam, dwr, lowerTemp,
+            upperTemp, temp, tes_batch.finalEmissivity(sam, dwr, temp, dtype),
+            wave, dtype=dtype)
+
+        self.animationTimer = QtCore.QTimer(self)
+        self.animationTimer.timeout.connect(self._checkAnimationExport)
+        self.animationTimer.start(500)
+
+    def _checkAnimationExport(self):
+        """Report the outcome of a background animation export once it has
+        finished.
+        """
+
+        if not self.animationExport.done():
+            return
+
+        self.animationTimer.stop()
+
+        try:
+            frames, rate = self.animationExport.result()
+            QtGui.QMessageBox.information(self, 'Export search animation',
+                '{0} frames rendered at {1:.1f} frames/s.'.format(frames, rate))
+        except Exception as error:
+            QtGui.QMessageBox.warning(self, 'Export search animation',
+                'Animation export failed:\n{0}'.format(error))
+
+    def _storeResult(self, path, sam, dwr, temp, metric, lowerTemp, upperTemp,
+            dtype, provenance):
+        """Append a separation result, with the final emissivity across the
+        full sample spectrum, to a result store.  One writer is kept for the
+        results directory, so the result is saved as a pending result of the
+        store and chunks are only written once full, or when the directory
+        changes or the window closes.
+
+        arguments:
+            path - Result store directory.
+            sam - Calibrated sample.
+            dwr - Calibrated downwelling, or None.
+            temp - Estimated temperature (K).
+            metric - Metric curve over the search temperatures.
+            lowerTemp - Lower search temperature limit (K).
+            upperTemp - Upper search temperature limit (K).
+            dtype - Working precision.
+            provenance - Dictionary describing the inputs and technique.
+        """
 
-        for test in toleranceTests:
-            if ((100 - (test*100)) > tolerance):
-                displayWarning = True
+        if self.resultWriter is None or self.resultWriter.path != path:
+            self._closeResultWriter()
+            self.resultWriter = ResultWriter(path)
 
-        if (displayWarning):
-            self.warning = WarningWindow()
+        self.resultWriter.append(temp, sam.spectrum.wavelength,
+            tes_batch.finalEmissivity(sam, dwr, temp, dtype), metric,
+            lowerTemp, upperTemp, provenance)
+
+    def _closeResultWriter(self):
+        """Write the results buffered by the result writer as a chunk.
+        """
+
+        if not self.resultWriter is None:
+            self.resultWriter.close()
+            self.resultWriter = None
+
+    def closeEvent(self, event):
+        """Wait for a running search and write any buffered results when the
+        main window closes.  A search finished after closing is not stored.
+        """
+
+        self.searchExecutor.shutdown()
+        self._closeResultWriter()
+        event.accept()
 
 class WarningWindow(QtGui.QWidget):
     """
@@ -923,12 +1665,16 @@ class EmissivityPlotWindow(QtGui.QWidget):
     temperature determined by the temperature emissivity separation.
     """
 
-    def __init__(self, sam, dwr, lowerTemp, upperTemp, temp, wave, search=False):
+    def __init__(self, sam, dwr, lowerTemp, upperTemp, temp, wave, search=False,
+            waveIndex=None, dtype=np.float64):
         """Constructor for the popup window.
         """
 
         super(EmissivityPlotWindow, self).__init__()
 
+        if waveIndex is None:
+            waveIndex = WavelengthIndex(sam.spectrum.wavelength)
+
         self.sam = sam
         self.dwr = dwr
         self.lowerTemp = lowerTemp
@@ -936,6 +1682,8 @@ class EmissivityPlotWindow(QtGui.QWidget):
         self.temp = temp
         self.wave = wave
         self.search = search
+        self.waveIndex = waveIndex
+        self.dtype = dtype
 
         self.initUI()
         self.show()
@@ -1003,6 +1751,15 @@ class EmissivityPlotWindow(QtGui.QWidget):
         else:
             dwrRadiance = self.dwr.spectrum.value
 
+        # the search animation only evaluates the initial view and the
+        # search bands, as views of the full spectra
+        lowerWave, upperWave = self.axis.get_xlim()
+        for band in self.wave:
+            lowerWave = min(lowerWave, band[0], band[1])
+            upperWave = max(upperWave, band[0], band[1])
+
+        searchWave = self.waveIndex.view(wavelength, lowerWave, upperWave)
+
         emissivity = []
 
         def _init():
@@ -1011,26 +1768,30 @@ class EmissivityPlotWindow(QtGui.QWidget):
             return line, title
 
         def _animate(i):
-            line.set_data(wavelength, emissivity[i])
+            line.set_data(searchWave, emissivity[i])
             title.set_text(str(temps[i]) + ' K')
             return line, title
 
         if self.search:
-            temps = np.arange(self.lowerTemp, self.upperTemp+1, 0.1)
+            temps = tes_search.temperatureGrid(self.lowerTemp, self.upperTemp)
 
-            for i in range(len(temps)):
-                bb = bbRadiance(temps[i], wavelength)
-                emissivity.append((samRadiance - dwrRadiance) / (bb - dwrRadiance))
+            emissivity = tes_search.emissivitySurface(
+                self.waveIndex.view(samRadiance, lowerWave, upperWave),
+                self.waveIndex.view(dwrRadiance, lowerWave, upperWave),
+                searchWave, temps, self.dtype)
 
             animatedPlot = ani.FuncAnimation(self.figure, _animate, np.arange(1, len(temps)), interval=100, blit=False, init_func=_init, repeat=False)
 
-        finalEmissivity = ((samRadiance - dwrRadiance) /
-                (bbRadiance(self.temp, wavelength) - dwrRadiance))
+        finalEmissivity = tes_batch.finalEmissivity(self.sam, self.dwr,
+            self.temp, self.dtype)
 
         self.axis.plot(wavelength, finalEmissivity, label='Final',
             color='k')
         for band in self.wave:
-            plt.axvspan(band[0], band[1], color='r', alpha=0.5)
+            limits = self.waveIndex.limits(band[0], band[1])
+            if limits is None:
+                limits = band
+            self.axis.axvspan(limits[0], limits[1], color='r', alpha=0.5)
 
         self.canvas.draw()
 
@@ -1040,20 +1801,274 @@ class EmissivityPlotWindow(QtGui.QWidget):
 
         self.close()
 
+class ComparisonWindow(QtGui.QWidget):
+    """A popup window used to display the temperature estimated by every
+    separation technique in a table, with their metrics overlaid.  The
+    estimates come from the array search approximating each technique, not
+    from the techniques themselves, and are labelled as approximate.
+    """
+
+    def __init__(self, temps, results):
+        """Constructor for the popup window.
+        """
+
+        super(ComparisonWindow, self).__init__()
+
+        self.temps = temps
+        self.results = results
+
+        self.initUI()
+        self.show()
+
+    def initUI(self):
+        """Initialize the top level of the popup window which consists of a
+        table of estimated temperatures and a plot of the metrics.
+        """
+
+        layout = QtGui.QVBoxLayout()
+
+        note = QtGui.QLabel('Approximate estimates from a single emissivity '
+            'search.  Run a technique on its own for its exact temperature.')
+        note.setWordWrap(True)
+
+        layout.addWidget(note)
+        layout.addWidget(self._table())
+        layout.addLayout(self._plot())
+        layout.addLayout(self._buttons())
+
+        self.setLayout(layout)
+        self.setWindowTitle('Technique comparison (approximate)')
+
+    def _table(self):
+        """Creates the table of estimated temperatures.
+        """
+
+        table = QtGui.QTableWidget(len(self.results), 2)
+        table.setHorizontalHeaderLabels(['Technique', 'Approximate temperature'])
+        table.verticalHeader().setVisible(False)
+
+        for row, result in enumerate(self.results):
+            if (result['temperature'] == 0):
+                temperature = 'Unknown'
+            else:
+                temperature = '{0:.1f} K'.format(result['temperature'])
+
+            table.setItem(row, 0, QtGui.QTableWidgetItem(result['name']))
+            table.setItem(row, 1, QtGui.QTableWidgetItem(temperature))
+
+        table.resizeColumnsToContents()
+        table.horizontalHeader().setStretchLastSection(True)
+
+        return table
+
+    def _buttons(self):
+        """Creates an OK button at the bottom of the popup window.
+        """
+
+        self.okButton = QtGui.QPushButton('Ok')
+        self.okButton.setFixedWidth(100)
+
+        buttonLayout = QtGui.QHBoxLayout()
+        buttonLayout.addWidget(self.okButton)
+
+        self.okButton.clicked.connect(self._handleOkButton)
+
+        return buttonLayout
+
+    def _plot(self):
+        """Creates the plot area of the popup window.  The metrics have
+        different units, so each is shown relative to its own minimum.
+        """
+
+        figure = plt.figure()
+        canvas = FigureCanvas(figure)
+        toolbar = NavigationToolbar(canvas, self)
+
+        axis = figure.add_subplot(111)
+        for result in self.results:
+            metric = np.asarray(result['metric'])
+            if (len(metric) == 0 or np.min(metric) <= 0):
+                continue
+            axis.plot(self.temps, metric / np.min(metric),
+                label=result['name'] + ' (approx.)')
+
+        axis.set_xlim(self.temps[0], self.temps[-1])
+        axis.set_xlabel('Temperature (K)')
+        axis.set_ylabel('Metric relative to minimum')
+        axis.set_yscale('log')
+        axis.legend(loc=1, prop={'size':11})
+        canvas.draw()
+
+        plotLayout = QtGui.QVBoxLayout()
+        plotLayout.addWidget(toolbar)
+        plotLayout.addWidget(canvas)
+
+        return plotLayout
+
+    def _handleOkButton(self):
+        """Closes the popup window when the OK button is pressed.
+        """
+
+        self.close()
+
+class OverlayWindow(QtGui.QWidget):
+    """A popup window used to overlay the emissivity and metric curves of
+    every result in a result store, filtered by sample, technique and
+    temperature.
+    """
+
+    def __init__(self, store):
+        """Constructor for the popup window.
+        """
+
+        super(OverlayWindow, self).__init__()
+
+        self.data = OverlayData(store)
+
+        self.initUI()
+        self.show()
+
+    def initUI(self):
+        """Initialize the top level of the popup window which consists of the
+        filters above the plot area.
+        """
+
+        layout = QtGui.QVBoxLayout()
+
+        layout.addLayout(self._filters())
+        layout.addLayout(self._plot())
+        layout.addLayout(self._buttons())
+
+        self.setLayout(layout)
+        self.setWindowTitle('Results overlay ({0} results)'.format(
+            len(self.data)))
+
+    def _filters(self):
+        """Creates the sample, technique and temperature filters.
+        """
+
+        self.sampleComboBox = QtGui.QComboBox(self)
+        self.sampleComboBox.addItem('All samples')
+        for sample in sorted(set(self.data.samples)):
+            self.sampleComboBox.addItem(sample)
+
+        self.techniqueComboBox = QtGui.QComboBox(self)
+        self.techniqueComboBox.addItem('All techniques')
+        for technique in sorted(set(self.data.techniques)):
+            self.techniqueComboBox.addItem(technique)
+
+        self.minTempEdit = QtGui.QLineEdit()
+        self.minTempEdit.setFixedWidth(75)
+        self.minTempEdit.setToolTip('Lowest estimated temperature shown')
+        self.maxTempEdit = QtGui.QLineEdit()
+        self.maxTempEdit.setFixedWidth(75)
+        self.maxTempEdit.setToolTip('Highest estimated temperature shown')
+
+        self.sampleComboBox.currentIndexChanged.connect(self._applyFilter)
+        self.techniqueComboBox.currentIndexChanged.connect(self._applyFilter)
+        self.minTempEdit.editingFinished.connect(self._applyFilter)
+        self.maxTempEdit.editingFinished.connect(self._applyFilter)
+
+        self.shownLabel = QtGui.QLabel(' ')
+
+        filterLayout = QtGui.QHBoxLayout()
+        filterLayout.addWidget(self.sampleComboBox)
+        filterLayout.addWidget(self.techniqueComboBox)
+        filterLayout.addWidget(QtGui.QLabel('Temperature:'))
+        filterLayout.addWidget(self.minTempEdit)
+        filterLayout.addWidget(QtGui.QLabel('K'))
+        filterLayout.addWidget(self.maxTempEdit)
+        filterLayout.addWidget(QtGui.QLabel('K'))
+        filterLayout.addWidget(self.shownLabel)
+        filterLayout.addStretch()
+
+        return filterLayout
+
+    def _buttons(self):
+        """Creates an OK button at the bottom of the popup window.
+        """
+
+        self.okButton = QtGui.QPushButton('Ok')
+        self.okButton.setFixedWidth(100)
+
+        buttonLayout = QtGui.QHBoxLayout()
+        buttonLayout.addWidget(self.okButton)
+
+        self.okButton.clicked.connect(self._handleOkButton)
+
+        return buttonLayout
+
+    def _plot(self):
+        """Creates the plot area of the popup window, with the emissivity and
+        metric curves each drawn as a single line collection.
+        """
+
+        self.figure = plt.figure()
+        self.canvas = FigureCanvas(self.figure)
+        toolbar = NavigationToolbar(self.canvas, self)
+
+        self.overlay = Overlay(self.data, self.figure.add_subplot(121),
+            self.figure.add_subplot(122))
+        self.overlay.colorbar(self.figure)
+        self._applyFilter()
+
+        plotLayout = QtGui.QVBoxLayout()
+        plotLayout.addWidget(toolbar)
+        plotLayout.addWidget(self.canvas)
+
+        return plotLayout
+
+    def _applyFilter(self):
+        """Shows the curves passing the current filters.  Only the segments
+        of the line collections change, so the figure is not rebuilt.
+        """
+
+        samples = None
+        if (self.sampleComboBox.currentIndex() > 0):
+            samples = [str(self.sampleComboBox.currentText())]
+
+        techniques = None
+        if (self.techniqueComboBox.currentIndex() > 0):
+            techniques = [str(self.techniqueComboBox.currentText())]
+
+        limits = []
+        for edit in [self.minTempEdit, self.maxTempEdit]:
+            try:
+                limits.append(float(edit.text()))
+            except ValueError:
+                limits.append(None)
+
+        shown = self.data.select(samples, techniques, limits[0], limits[1])
+        self.overlay.show(shown)
+        self.shownLabel.setText('{0} of {1} shown'.format(len(shown),
+            len(self.data)))
+
+        self.canvas.draw_idle()
+
+    def _handleOkButton(self):
+        """Closes the popup window when the OK button is pressed.
+        """
+
+        self.close()
+
 class MetricPlotWindow(QtGui.QWidget):
     """
     """
 
-    def __init__(self, lowerTemp, upperTemp, metric, waterband):
+    def __init__(self, lowerTemp, upperTemp, metric, waterband, temps=None):
         """Constructor for the popup window.
         """
 
         super(MetricPlotWindow, self).__init__()
 
+        if temps is None:
+            temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
         self.lowerTemp = lowerTemp
         self.upperTemp = upperTemp
         self.metric = metric
         self.waterband = waterband
+        self.temps = temps
 
         self.initUI()
         self.show()
@@ -1088,31 +2103,66 @@ class MetricPlotWindow(QtGui.QWidget):
         """Creates the plot area of the popup window.
         """
 
-        temps = np.arange(self.lowerTemp, self.upperTemp+1, 0.1)
-        index = np.argmin(self.metric)
+        self.figure = plt.figure()
+        self.canvas = FigureCanvas(self.figure)
+        toolbar = NavigationToolbar(self.canvas, self)
 
-        figure = plt.figure()
-        canvas = FigureCanvas(figure)
-        toolbar = NavigationToolbar(canvas, self)
+        self.axis = self.figure.add_subplot(111)
+        self._drawMetric()
 
-        axis = figure.add_subplot(111)
+        plotLayout = QtGui.QVBoxLayout()
+        plotLayout.addWidget(toolbar)
+        plotLayout.addWidget(self.canvas)
+
+        return plotLayout
+
+    def _drawMetric(self):
+        """Draws the metric curve and its minimum.  Temperatures a hybrid
+        search skipped are NaN and left out.
+        """
+
+        temps = self.temps
+        index = np.nanargmin(self.metric)
+
+        axis = self.axis
+        axis.clear()
         axis.plot(temps, self.metric)
         axis.plot(temps[index], self.metric[index], 'ro', label='Estimated temperature')
 
-        axis.axis([self.lowerTemp, self.upperTemp, min(self.metric), max(self.metric)])
+        axis.axis([max(self.lowerTemp, temps[0]), min(self.upperTemp, temps[-1]),
+            np.nanmin(self.metric), np.nanmax(self.metric)])
         axis.set_xlabel('Temperature (K)')
         if self.waterband:
             axis.set_ylabel('Standard deviation')
         else:
             axis.set_ylabel('Average squared second derivative')
         axis.set_yscale('log')
-        canvas.draw()
+        self.canvas.draw()
 
-        plotLayout = QtGui.QVBoxLayout()
-        plotLayout.addWidget(toolbar)
-        plotLayout.addWidget(canvas)
+    def updateMetric(self, lowerTemp, upperTemp, metric, waterband,
+            temps=None):
+        """Replace the plotted metric, e.g. with a refined estimate or the
+        metric of a later run.
 
-        return plotLayout
+        arguments:
+            lowerTemp - Lower search temperature limit (K).
+            upperTemp - Upper search temperature limit (K).
+            metric - Array with the metric at each temperature.
+            waterband - Whether the metric is the waterband metric.
+            temps - Array of temperatures of the metric, defaults to the full
+                search grid.
+        """
+
+        if temps is None:
+            temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+        self.lowerTemp = lowerTemp
+        self.upperTemp = upperTemp
+        self.metric = metric
+        self.waterband = waterband
+        self.temps = temps
+
+        self._drawMetric()
 
     def _handleOkButton(self):
         """Closes the popup window when the OK button is pressed.
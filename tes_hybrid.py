@@ -0,0 +1,56 @@
+"""Waterband seeded hybrid temperature emissivity separation.
+
+The cheap waterband technique gives an estimate that is usually within a few
+kelvin of the answer, so the expensive moving window search only needs to
+examine a band of temperatures around it.  If the restricted search finds its
+minimum at an edge of the band, the answer may lie outside it and the full
+search interval is examined instead.
+
+title:              tes_hybrid
+
+date:               October 2026
+"""
+
+import numpy as np
+
+# half width of the band around the seed (K) used when none is configured
+DEFAULT_SEARCH_BAND = 5.0
+
+def seededSearch(search, seedTemp, lowerTemp, upperTemp, searchBand):
+    """Run a temperature search over a band around a seed temperature,
+    falling back to the full search interval if the minimum is found at an
+    edge of the band.
+
+    arguments:
+        search - Function taking lower and upper temperature limits (K) and
+            returning a tuple whose first two entries are the estimated
+            temperature and the metric over the examined temperatures.
+        seedTemp - Seed temperature estimate (K), 0 if unknown.
+        lowerTemp - Lower temperature limit of the full interval (K).
+        upperTemp - Upper temperature limit of the full interval (K).
+        searchBand - Half width of the band around the seed (K).
+
+    returns:
+        The result of the search, the lower and upper temperature limits it
+        was run with, and whether it fell back to the full interval.
+    """
+
+    if seedTemp == 0:
+        return search(lowerTemp, upperTemp), lowerTemp, upperTemp, True
+
+    lower = max(lowerTemp, seedTemp - searchBand)
+    upper = min(upperTemp, seedTemp + searchBand)
+
+    if lower >= upper:
+        return search(lowerTemp, upperTemp), lowerTemp, upperTemp, True
+
+    result = search(lower, upper)
+
+    index = np.argmin(result[1])
+    atLowerEdge = (index == 0 and lower > lowerTemp)
+    atUpperEdge = (index == len(result[1]) - 1 and upper < upperTemp)
+
+    if atLowerEdge or atUpperEdge:
+        return search(lowerTemp, upperTemp), lowerTemp, upperTemp, True
+
+    return result, lower, upper, False
@@ -0,0 +1,138 @@
+"""Optional compiled kernels for the emissivity search.
+
+When Numba is installed, the Planck evaluation and emissivity ratio are fused
+into one compiled loop, and the smoothness, waterband and curvature metrics
+are compiled, all parallelized across temperatures.  tes_search uses these
+kernels automatically when they are available and falls back to NumPy
+otherwise.  Only the tes_search array search is accelerated, as used by the
+progressive estimates, comparison, sweep, uncertainty and plots; the
+techniques run by tes.tes and tes.waterbandTes are unchanged.  test_kernels
+checks that both backends agree.
+
+title:              tes_kernels
+
+date:               October 2026
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+available = not numba is None
+
+# whether tes_search should use the compiled kernels
+_enabled = available
+
+def enabled():
+    """Check whether the compiled kernels are in use.
+    """
+
+    return _enabled
+
+def useKernels(flag):
+    """Turn the compiled kernels on or off.  They can only be turned on when
+    Numba is installed.
+
+    arguments:
+        flag - True to use the compiled kernels, False to use NumPy.
+
+    returns:
+        Whether the compiled kernels are now in use.
+    """
+
+    global _enabled
+    _enabled = bool(flag) and available
+
+    return _enabled
+
+def emissivitySurface(samRadiance, dwrRadiance, wavelength, temps, c1, c2,
+        dtype=np.float64):
+    """Compiled equivalent of tes_search.emissivitySurface.  Inputs must
+    already be arrays of the working precision.
+    """
+
+    surface = np.empty((len(temps), len(wavelength)), dtype)
+    _emissivitySurface(samRadiance, dwrRadiance, wavelength, temps, dtype(c1),
+        dtype(c2), surface)
+
+    return surface
+
+def waterbandMetric(surface):
+    """Compiled equivalent of tes_search.waterbandMetric over a surface
+    already restricted to the waterband.
+    """
+
+    metric = np.empty(surface.shape[0], surface.dtype)
+    _waterbandMetric(surface, metric)
+
+    return metric
+
+def smoothnessMetric(surface):
+    """Compiled equivalent of tes_search.smoothnessMetric over a surface
+    already restricted to the window.
+    """
+
+    metric = np.empty(surface.shape[0], surface.dtype)
+    _smoothnessMetric(surface, metric)
+
+    return metric
+
+def curvatureSums(surface):
+    """Compiled equivalent of tes_search.curvatureSums.
+    """
+
+    cumulative = np.zeros((surface.shape[0], max(surface.shape[1] - 1, 1)),
+        np.float64)
+    _curvatureSums(surface, cumulative)
+
+    return cumulative
+
+if available:
+
+    @numba.njit(parallel=True, cache=True)
+    def _emissivitySurface(samRadiance, dwrRadiance, wavelength, temps, c1, c2,
+            surface):
+        for i in numba.prange(len(temps)):
+            for j in range(len(wavelength)):
+                x = (c2 / wavelength[j]) / temps[i]
+                radiance = np.exp(-x) / -np.expm1(-x) * (c1 / wavelength[j]**5)
+                surface[i, j] = ((samRadiance[j] - dwrRadiance[j]) /
+                    (radiance - dwrRadiance[j]))
+
+    @numba.njit(parallel=True, cache=True)
+    def _waterbandMetric(surface, metric):
+        count = surface.shape[1]
+        for i in numba.prange(surface.shape[0]):
+            mean = 0.0
+            for j in range(count):
+                mean += surface[i, j]
+            mean /= count
+
+            variance = 0.0
+            for j in range(count):
+                variance += (surface[i, j] - mean)**2
+            metric[i] = np.sqrt(variance / count)
+
+    @numba.njit(parallel=True, cache=True)
+    def _smoothnessMetric(surface, metric):
+        count = surface.shape[1] - 2
+        for i in numba.prange(surface.shape[0]):
+            total = 0.0
+            for j in range(count):
+                second = ((surface[i, j+2] - surface[i, j+1]) -
+                    (surface[i, j+1] - surface[i, j]))
+                total += second * second
+            metric[i] = total / count
+
+    @numba.njit(parallel=True, cache=True)
+    def _curvatureSums(surface, cumulative):
+        for i in numba.prange(surface.shape[0]):
+            total = 0.0
+            for j in range(surface.shape[1] - 2):
+                second = ((surface[i, j+2] - surface[i, j+1]) -
+                    (surface[i, j+1] - surface[i, j]))
+                total += second * second
+                cumulative[i, j+1] = total
@@ -0,0 +1,332 @@
+"""Array based emissivity search used to evaluate every temperature of a
+separation search interval at once.
+
+title:              tes_search
+
+date:               October 2026
+"""
+
+import numpy as np
+
+import tes_kernels
+
+# first and second radiation constants for radiance in W/m^2/sr/micron, as
+# checked against bb_radiance.bbRadiance by test_search
+C1 = 1.191042e8
+C2 = 1.4387752e4
+
+# working precisions selectable from the options tab and configuration file.
+# The precision is that of the calibrated spectra passed to tes.tes and
+# tes.waterbandTes, and of the array search of this module used by the
+# progressive estimates, technique comparison, uncertainty and animation.
+# tes.tes computes in its own precision from the converted spectra.
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
+
+def precisionType(precision):
+    """Look up the NumPy type for a named working precision.
+
+    arguments:
+        precision - Either 'float64' or 'float32'.
+
+    returns:
+        The corresponding NumPy floating point type.
+    """
+
+    try:
+        return PRECISIONS[str(precision).strip().lower()]
+    except KeyError:
+        raise ValueError('Unknown precision: {0}'.format(precision))
+
+def asPrecision(data, dtype):
+    """Convert the spectrum of a radiance measurement to a working precision
+    in place.  Only the stored spectrum is rounded, the separation techniques
+    of tes still compute in the precision they choose.
+
+    arguments:
+        data - Measurement object with a spectrum attribute, or None.
+        dtype - NumPy floating point type to convert to.
+
+    returns:
+        The same measurement object.
+    """
+
+    if not data is None:
+        data.spectrum.wavelength = np.asarray(data.spectrum.wavelength, dtype)
+        data.spectrum.value = np.asarray(data.spectrum.value, dtype)
+
+    return data
+
+def temperatureGrid(lowerTemp, upperTemp, step=0.1):
+    """Create the temperatures examined by a search, matching the grid the
+    separation techniques report their metric on.
+
+    arguments:
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        step - Temperature increment (K).
+
+    returns:
+        Array of temperatures.
+    """
+
+    return np.arange(lowerTemp, upperTemp+1, step)
+
+def planck(temps, wavelength, dtype=np.float64):
+    """Evaluate blackbody radiance for several temperatures at once.
+
+    The exponential is evaluated as exp(-x) / (1 - exp(-x)), which underflows
+    gracefully to zero instead of overflowing, so the result is safe to
+    compute in single precision.
+
+    arguments:
+        temps - Temperature or array of temperatures (K).
+        wavelength - Array of wavelengths (microns).
+        dtype - NumPy floating point type to compute in.
+
+    returns:
+        Array of radiance (W/m^2/sr/micron) with one row per temperature.
+    """
+
+    wavelength = np.asarray(wavelength, dtype)
+    temps = np.atleast_1d(np.asarray(temps, dtype))
+
+    x = (dtype(C2) / wavelength)[np.newaxis, :] / temps[:, np.newaxis]
+
+    radiance = np.exp(-x)
+    radiance /= -np.expm1(-x)
+    radiance *= dtype(C1) / wavelength**5
+
+    return radiance
+
+def emissivitySurface(samRadiance, dwrRadiance, wavelength, temps,
+        dtype=np.float64):
+    """Compute the emissivity of a sample at every temperature of a search.
+
+    arguments:
+        samRadiance - Calibrated sample radiance.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        temps - Array of temperatures (K).
+        dtype - NumPy floating point type to compute in.
+
+    returns:
+        Array of emissivity with one row per temperature.
+    """
+
+    samRadiance = np.asarray(samRadiance, dtype)
+
+    if dwrRadiance is None:
+        dwrRadiance = np.zeros(len(samRadiance), dtype)
+    else:
+        dwrRadiance = np.asarray(dwrRadiance, dtype)
+
+    if tes_kernels.enabled():
+        return tes_kernels.emissivitySurface(samRadiance, dwrRadiance,
+            np.asarray(wavelength, dtype),
+            np.atleast_1d(np.asarray(temps, dtype)), C1, C2, dtype)
+
+    surface = planck(temps, wavelength, dtype)
+    surface -= dwrRadiance
+    np.divide(samRadiance - dwrRadiance, surface, out=surface)
+
+    return surface
+
+def waterbandMetric(surface, band):
+    """Standard deviation of the emissivity across a waterband.
+
+    arguments:
+        surface - Emissivity surface with one row per temperature.
+        band - Slice of the wavelength axis covering the waterband.
+
+    returns:
+        Array with the metric at each temperature.
+    """
+
+    if tes_kernels.enabled():
+        return tes_kernels.waterbandMetric(surface[:, band])
+
+    return np.std(surface[:, band], axis=1)
+
+def smoothnessMetric(surface, window):
+    """Average squared second derivative of the emissivity across a window.
+
+    arguments:
+        surface - Emissivity surface with one row per temperature.
+        window - Slice of the wavelength axis covering the window.
+
+    returns:
+        Array with the metric at each temperature.
+    """
+
+    if tes_kernels.enabled():
+        return tes_kernels.smoothnessMetric(surface[:, window])
+
+    return np.mean(np.diff(surface[:, window], 2, axis=1)**2, axis=1)
+
+def bestTemperature(temps, metric):
+    """Find the temperature minimizing a metric.
+
+    arguments:
+        temps - Array of temperatures (K).
+        metric - Array with the metric at each temperature.
+
+    returns:
+        The temperature at the metric minimum.
+    """
+
+    return temps[np.argmin(metric)]
+
+def progressiveSearch(samRadiance, dwrRadiance, wavelength, lowerTemp,
+        upperTemp, metric, steps=(2.0, 0.5, 0.1), dtype=np.float64):
+    """Estimate the temperature on successively finer temperature grids, each
+    centered on the previous estimate.  The first estimate is available after
+    evaluating only a coarse grid over the full search interval.
+
+    arguments:
+        samRadiance - Calibrated sample radiance over the metric region.
+        dwrRadiance - Calibrated downwelling radiance over the metric region,
+            or None.
+        wavelength - Array of wavelengths over the metric region (microns).
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        metric - Metric function taking an emissivity surface and a slice of
+            its wavelength axis, e.g. waterbandMetric or smoothnessMetric.
+        steps - Temperature increments of the successive grids (K).
+        dtype - NumPy floating point type to compute in.
+
+    yields:
+        The temperatures, metric and estimated temperature of each grid.
+    """
+
+    lower, upper = lowerTemp, upperTemp
+
+    for step in steps:
+        temps = np.arange(lower, upper + step/2, step)
+
+        surface = emissivitySurface(samRadiance, dwrRadiance, wavelength, temps,
+            dtype)
+        values = metric(surface, slice(None))
+        estimate = bestTemperature(temps, values)
+
+        yield temps, values, estimate
+
+        lower = max(lowerTemp, estimate - 2*step)
+        upper = min(upperTemp, estimate + 2*step)
+
+def windowWidths(lowerWin, upperWin, windowStep):
+    """List the window widths examined by the moving window techniques.
+
+    arguments:
+        lowerWin - Lower window width (microns).
+        upperWin - Upper window width (microns).
+        windowStep - Increment of the window width (microns).
+
+    returns:
+        Array of window widths (microns).
+    """
+
+    if upperWin <= lowerWin or windowStep <= 0:
+        return np.array([lowerWin], np.float64)
+
+    return np.arange(lowerWin, upperWin + windowStep/2, windowStep)
+
+def curvatureSums(surface):
+    """Accumulate the squared second differences of an emissivity surface
+    along the wavelength axis.
+
+    arguments:
+        surface - Emissivity surface with one row per temperature.
+
+    returns:
+        Array with one row per temperature whose column i holds the sum of
+        the first i squared second differences.  Sums are kept in double
+        precision, since windows are scored by differences of them.
+    """
+
+    if tes_kernels.enabled():
+        return tes_kernels.curvatureSums(surface)
+
+    curvature = np.diff(surface, 2, axis=1)
+    curvature *= curvature
+
+    cumulative = np.zeros((surface.shape[0], curvature.shape[1] + 1),
+        np.float64)
+    np.cumsum(curvature, axis=1, out=cumulative[:, 1:])
+
+    return cumulative
+
+def windowMetrics(surface, wavelength, widths, cumulative=None):
+    """Evaluate the smoothness metric over every window position and width at
+    once.  Squared second differences are accumulated along the wavelength
+    axis, so each window costs a single subtraction regardless of its width.
+
+    arguments:
+        surface - Emissivity surface over the search range, one row per
+            temperature, wavelength ascending.
+        wavelength - Ascending array of wavelengths of the surface (microns).
+        widths - Array of window widths (microns).
+        cumulative - Result of curvatureSums for the surface, if already
+            computed.
+
+    returns:
+        Array of metric curves with one row per window, and an array with the
+        lower and upper wavelength of each window.
+    """
+
+    wavelength = np.asarray(wavelength, np.float64)
+
+    if cumulative is None:
+        cumulative = curvatureSums(surface)
+
+    metrics = []
+    bounds = []
+
+    for width in widths:
+        starts = np.arange(len(wavelength))
+        stops = np.searchsorted(wavelength, wavelength + width, 'right')
+
+        # a window of n samples has n - 2 second differences, and only
+        # windows lying completely within the search range are kept
+        inside = ((wavelength + width <= wavelength[-1]) &
+            (stops - starts >= 3))
+        starts, stops = starts[inside], stops[inside]
+
+        # rounding in the differences may leave tiny negative values
+        counts = stops - starts - 2
+        metrics.append(np.maximum(cumulative[:, stops - 2] -
+            cumulative[:, starts], 0) / counts)
+        bounds.append(np.column_stack([wavelength[starts],
+            wavelength[stops - 1]]))
+
+    if len(metrics) == 0 or sum(m.shape[1] for m in metrics) == 0:
+        return (np.zeros((0, surface.shape[0]), surface.dtype),
+            np.zeros((0, 2)))
+
+    return np.concatenate(metrics, axis=1).T, np.concatenate(bounds)
+
+def selectWindows(temps, metrics, bounds, numWindows=1):
+    """Choose the windows with the smallest metric minimum, as done by the
+    moving window techniques.
+
+    arguments:
+        temps - Array of temperatures (K).
+        metrics - Array of metric curves with one row per window.
+        bounds - Array with the lower and upper wavelength of each window.
+        numWindows - Number of windows to combine.
+
+    returns:
+        The estimated temperature (mean over the chosen windows), the list
+        of chosen window bounds, and the mean metric curve of the chosen
+        windows.
+    """
+
+    if len(metrics) == 0:
+        return 0, [], np.zeros(len(temps))
+
+    minima = np.min(metrics, axis=1)
+    chosen = np.argsort(minima, kind='mergesort')[:numWindows]
+
+    estimates = temps[np.argmin(metrics[chosen], axis=1)]
+
+    return (np.mean(estimates), bounds[chosen].tolist(),
+        np.mean(metrics[chosen], axis=0))
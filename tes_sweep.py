@@ -0,0 +1,341 @@
+"""Parameter sensitivity sweep of the temperature emissivity separation over
+wavelength and window limits.
+
+The sweep evaluates the tes_search approximations of the techniques, not
+tes.tes and tes.waterbandTes, so its temperatures are approximate and may
+differ from those the techniques find with the same settings.  The Planck
+table, emissivity surface and accumulated curvature are built once and every
+grid point is evaluated from views of them.  Large sweeps place the
+calibrated spectra in shared memory and split the grid across a pool of
+worker processes, each building the tables once.
+
+title:              tes_sweep
+
+date:               October 2026
+"""
+
+import itertools
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+import tes_search
+from wave_index import WavelengthIndex
+from shared_spectra import SharedSpectra, attachSpectra
+from checkpoint import Journal, workKey, arrayDigest
+
+# parameters that may be swept, with the technique settings they stand for
+PARAMETERS = ['lowerWave', 'upperWave', 'lowerWin', 'upperWin', 'windowStep',
+    'numWindows']
+
+# fewest grid points split across worker processes.  Starting the workers
+# costs about a second and a point takes a few tens of milliseconds, so
+# smaller sweeps run faster in this process.
+PARALLEL_POINTS = 64
+
+class SweepResult(object):
+    """Recovered temperature and metric sharpness over a parameter grid.  The
+    result arrays have one axis per swept parameter, in order.
+    """
+
+    def __init__(self, names, values, temperature, sharpness):
+        """Constructor for the sweep result.
+        """
+
+        self.names = names
+        self.values = values
+        self.temperature = temperature
+        self.sharpness = sharpness
+
+def metricSharpness(metric):
+    """Measure how distinct the minimum of a metric curve is, as the decades
+    between the median of the curve and its minimum.
+
+    arguments:
+        metric - Array with the metric at each temperature.
+
+    returns:
+        The sharpness of the minimum, larger being sharper.
+    """
+
+    minimum = np.min(metric)
+
+    if not minimum > 0:
+        return 0.0
+
+    return float(np.log10(np.median(metric) / minimum))
+
+def sweep(sam, dwr, lowerTemp, upperTemp, technique, parameters, fixed=None,
+        workers=None, dtype=np.float64, journalPath=None):
+    """Run a separation technique over every combination of parameter values.
+
+    arguments:
+        sam - Calibrated sample.
+        dwr - Calibrated downwelling, or None.
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        technique - Metric of the technique, one of 'waterband',
+            'smoothness' or 'window'.
+        parameters - List of (name, values) pairs to sweep, names taken from
+            PARAMETERS.
+        fixed - Dictionary of values for parameters that are not swept.
+            Wavelength limits neither swept nor fixed default to the whole
+            sample spectrum.
+        workers - Number of worker processes, defaults to the CPU count.
+            Sweeps of fewer than PARALLEL_POINTS points, or with a single
+            worker, run in this process.
+        dtype - Working precision.
+        journalPath - Journal file checkpointing every completed grid point.
+            A sweep restarted with the same inputs and journal only
+            evaluates the points not yet recorded.
+
+    returns:
+        A SweepResult.
+    """
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    names = [name for name, values in parameters]
+    values = [np.asarray(values) for name, values in parameters]
+
+    for name in names:
+        if name not in PARAMETERS:
+            raise ValueError('Unknown sweep parameter: {0}'.format(name))
+
+    # wavelength limits neither swept nor fixed cover the whole sample
+    wavelength = np.asarray(sam.spectrum.wavelength)
+    fixed = dict({'lowerWave': float(np.min(wavelength)),
+        'upperWave': float(np.max(wavelength))}, **(fixed or {}))
+    points = [dict(fixed, **dict(zip(names, point)))
+        for point in itertools.product(*[v.tolist() for v in values])]
+
+    # the surface covers every wavelength range examined by the sweep
+    region = (min(point['lowerWave'] for point in points),
+        max(point['upperWave'] for point in points))
+
+    temperature = np.zeros(len(points))
+    sharpness = np.zeros(len(points))
+
+    journal = None
+    keys = [None] * len(points)
+    remaining = np.arange(len(points))
+
+    if not journalPath is None:
+        journal = Journal(journalPath)
+        identity = _sweepIdentity(sam, dwr, lowerTemp, upperTemp, technique,
+            points, dtype)
+
+        keys = [workKey(identity, i) for i in range(len(points))]
+        for i in range(len(points)):
+            if journal.done(keys[i]):
+                temperature[i] = journal.state(keys[i])['temperature']
+                sharpness[i] = journal.state(keys[i])['sharpness']
+
+        remaining = np.array([i for i in range(len(points))
+            if not journal.done(keys[i])], np.int64)
+
+    try:
+        chunks = [chunk for chunk in np.array_split(remaining, workers * 4)
+            if len(chunk) > 0]
+
+        if len(chunks) == 0:
+            pass
+        elif workers < 2 or len(remaining) < PARALLEL_POINTS:
+            tables = sweepTables(sam.spectrum.value,
+                None if dwr is None else dwr.spectrum.value, wavelength,
+                lowerTemp, upperTemp, region, dtype)
+
+            for chunk in chunks:
+                results = [evaluatePoint(tables, technique, points[i])
+                    for i in chunk]
+                temperature[chunk] = [r[0] for r in results]
+                sharpness[chunk] = [r[1] for r in results]
+
+                _recordPoints(journal, keys, chunk, temperature, sharpness)
+        else:
+            with SharedSpectra(sam=sam, dwr=dwr) as shared:
+                context = multiprocessing.get_context('spawn')
+                with concurrent.futures.ProcessPoolExecutor(workers,
+                        mp_context=context) as pool:
+                    futures = [(chunk, pool.submit(_sweepPoints,
+                        shared.descriptor(), lowerTemp, upperTemp, region,
+                        technique, [points[i] for i in chunk], dtype))
+                        for chunk in chunks]
+
+                    for chunk, future in futures:
+                        temperature[chunk], sharpness[chunk] = future.result()
+
+                        _recordPoints(journal, keys, chunk, temperature,
+                            sharpness)
+    finally:
+        if not journal is None:
+            journal.close()
+
+    shape = tuple(len(v) for v in values)
+
+    return SweepResult(names, values, temperature.reshape(shape),
+        sharpness.reshape(shape))
+
+def evaluatePoint(tables, technique, point):
+    """Evaluate one grid point of a sweep from precomputed tables.
+
+    arguments:
+        tables - Result of sweepTables.
+        technique - Metric of the technique, one of 'waterband',
+            'smoothness' or 'window'.
+        point - Dictionary of parameter values.
+
+    returns:
+        The recovered temperature and the metric sharpness.
+    """
+
+    temps, wavelength, surface, waveIndex, cumulative = tables
+    part = waveIndex.slice(point['lowerWave'], point['upperWave'])
+
+    if technique == 'waterband':
+        metric = tes_search.waterbandMetric(surface, part)
+        temp = tes_search.bestTemperature(temps, metric)
+    elif technique == 'smoothness':
+        metric = tes_search.smoothnessMetric(surface, part)
+        temp = tes_search.bestTemperature(temps, metric)
+    else:
+        lowerWin = point.get('lowerWin',
+            point['upperWave'] - point['lowerWave'])
+        widths = tes_search.windowWidths(lowerWin,
+            point.get('upperWin', lowerWin), point.get('windowStep', 1))
+
+        # differences of the accumulated curvature do not depend on where the
+        # accumulation started, so the full table is sliced to the range
+        metrics, bounds = tes_search.windowMetrics(surface[:, part],
+            wavelength[part], widths,
+            cumulative[:, part.start:max(part.stop - 1, part.start)])
+        temp, wave, metric = tes_search.selectWindows(temps, metrics, bounds,
+            int(point.get('numWindows', 1)))
+
+    return temp, metricSharpness(metric)
+
+def sweepTables(samRadiance, dwrRadiance, wavelength, lowerTemp, upperTemp,
+        region, dtype=np.float64):
+    """Build the tables shared by every grid point of a sweep.
+
+    arguments:
+        samRadiance - Calibrated sample radiance.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        region - Lower and upper wavelength covered by the sweep (microns).
+        dtype - Working precision.
+
+    returns:
+        The temperatures, ascending wavelength over the region, emissivity
+        surface, index of the region and accumulated curvature.
+    """
+
+    waveIndex = WavelengthIndex(wavelength)
+    inside = waveIndex.slice(region[0], region[1])
+    order = slice(None, None, -1) if waveIndex.descending else slice(None)
+
+    regionWave = np.asarray(wavelength)[inside][order]
+    if dwrRadiance is None:
+        dwrRegion = None
+    else:
+        dwrRegion = np.asarray(dwrRadiance)[inside][order]
+
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+    surface = tes_search.emissivitySurface(
+        np.asarray(samRadiance)[inside][order], dwrRegion, regionWave, temps,
+        dtype)
+
+    return (temps, regionWave, surface, WavelengthIndex(regionWave),
+        tes_search.curvatureSums(surface))
+
+def plotSweep(result, path, fixedIndex=None):
+    """Save heatmaps of the approximate temperature and metric sharpness over
+    the first two swept parameters.
+
+    arguments:
+        result - SweepResult.
+        path - Output image file.
+        fixedIndex - Indices along any further swept parameters at which to
+            take the heatmap, defaults to the first value of each.
+    """
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if len(result.names) < 2:
+        raise ValueError('A heatmap needs at least two swept parameters')
+
+    index = (slice(None), slice(None)) + tuple(fixedIndex or
+        [0] * (len(result.names) - 2))
+
+    figure = Figure(figsize=(12, 5))
+    canvas = FigureCanvasAgg(figure)
+
+    for i, (values, label) in enumerate([
+            (result.temperature[index], 'Approximate temperature (K)'),
+            (result.sharpness[index],
+            'Approximate metric sharpness (decades)')]):
+        axis = figure.add_subplot(1, 2, i + 1)
+        image = axis.pcolormesh(result.values[1], result.values[0], values,
+            shading='nearest')
+        axis.set_xlabel(result.names[1])
+        axis.set_ylabel(result.names[0])
+        axis.set_title(label)
+        figure.colorbar(image, ax=axis)
+
+    figure.tight_layout()
+    canvas.print_figure(path)
+
+def _sweepIdentity(sam, dwr, lowerTemp, upperTemp, technique, points, dtype):
+    """Digest of everything that determines the results of a sweep, used to
+    key its journal entries.
+    """
+
+    spectra = []
+    for data in [sam, dwr]:
+        if data is None:
+            spectra.append(None)
+        else:
+            spectra.append([arrayDigest(data.spectrum.wavelength),
+                arrayDigest(data.spectrum.value)])
+
+    return workKey(spectra, lowerTemp, upperTemp, technique, points,
+        np.dtype(dtype).str)
+
+def _recordPoints(journal, keys, chunk, temperature, sharpness):
+    """Journal the results of a share of the grid points, if journalled.
+    """
+
+    if not journal is None:
+        journal.recordAll([(keys[i], {'temperature': float(temperature[i]),
+            'sharpness': float(sharpness[i])}) for i in chunk])
+
+# tables built by this worker process, keyed by sweep inputs
+_tables = {}
+
+def _sweepPoints(descriptor, lowerTemp, upperTemp, region, technique, points,
+        dtype):
+    """Evaluate a share of the grid points in a worker process, reusing the
+    worker's tables across every share of the same sweep.
+    """
+
+    key = (tuple(sorted((k, v and v[0]) for k, v in descriptor.items())),
+        lowerTemp, upperTemp, region, np.dtype(dtype).str)
+
+    if key not in _tables:
+        _tables.clear()
+
+        measurements = attachSpectra(descriptor)
+        sam, dwr = measurements['sam'], measurements['dwr']
+
+        _tables[key] = sweepTables(sam.spectrum.value,
+            None if dwr is None else dwr.spectrum.value,
+            sam.spectrum.wavelength, lowerTemp, upperTemp, region, dtype)
+
+    results = [evaluatePoint(_tables[key], technique, point)
+        for point in points]
+
+    return [r[0] for r in results], [r[1] for r in results]
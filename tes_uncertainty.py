@@ -0,0 +1,267 @@
+"""Temperature uncertainty from replicated temperature searches.
+
+Replicates of the sample spectrum are made either by resampling its scans
+(bootstrap) or by adding noise draws.  The emissivity surfaces of all the
+replicates are stacked along the temperature axis and searched together, so
+the metrics are evaluated for a block of replicates in a single array
+computation rather than one search per replicate.  The replicates are
+searched with the tes_search approximation of a technique, using its
+wavelength limits and window widths, and for the hybrid technique each
+replicate is searched around its own waterband seed.
+
+title:              tes_uncertainty
+
+date:               October 2026
+"""
+
+import numpy as np
+
+import tes_search
+from wave_index import WavelengthIndex
+
+# largest emissivity surface evaluated at once (bytes)
+BLOCK_BYTES = 64 * 2**20
+
+class Uncertainty(object):
+    """Spread of the temperatures recovered from replicates of a sample.
+    """
+
+    def __init__(self, temperatures, confidence, method='noise'):
+        """Constructor for the uncertainty summary.
+
+        arguments:
+            temperatures - Array with the temperature of each replicate (K).
+            confidence - Confidence level of the interval, e.g. 0.95.
+            method - How the replicates were made, 'noise' or 'bootstrap'.
+        """
+
+        self.temperatures = np.asarray(temperatures)
+        self.confidence = confidence
+        self.method = method
+
+        self.mean = float(np.mean(self.temperatures))
+        self.std = float(np.std(self.temperatures, ddof=1)) if len(
+            self.temperatures) > 1 else 0.0
+
+        tail = (1 - confidence) / 2 * 100
+        self.lower, self.upper = [float(t) for t in
+            np.percentile(self.temperatures, [tail, 100 - tail])]
+
+    def __str__(self):
+        return '{0:.1f} +/- {1:.1f} K, {2:.0f}% CI {3:.1f}-{4:.1f} K'.format(
+            self.mean, self.std, self.confidence * 100, self.lower, self.upper)
+
+def noiseLevel(samRadiance, dwrRadiance, wavelength, temp):
+    """Estimate the noise on a sample spectrum from the roughness of its
+    emissivity at the estimated temperature.  Emissivity is smooth where the
+    radiance carries atmospheric structure, so the median absolute second
+    difference of the emissivity is dominated by noise.
+
+    arguments:
+        samRadiance - Calibrated sample radiance.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        temp - Estimated temperature (K).
+
+    returns:
+        Array with the estimated noise standard deviation of the radiance
+        at each wavelength.
+    """
+
+    emissivity = tes_search.emissivitySurface(samRadiance, dwrRadiance,
+        wavelength, temp)[0]
+    second = np.diff(emissivity[np.isfinite(emissivity)], 2)
+
+    # a second difference of white noise has variance 6 sigma^2
+    sigma = np.median(np.abs(second)) / 0.6745 / np.sqrt(6)
+
+    radiance = tes_search.planck(temp, wavelength)[0]
+    if not dwrRadiance is None:
+        radiance = radiance - np.asarray(dwrRadiance, np.float64)
+
+    return sigma * np.abs(radiance)
+
+def noiseReplicates(samRadiance, sigma, replicates=200, seed=0):
+    """Make replicates of a spectrum by adding Gaussian noise draws.
+
+    arguments:
+        samRadiance - Calibrated sample radiance.
+        sigma - Noise standard deviation, a value or an array with one per
+            wavelength, such as CoaddAccumulator.stderr().
+        replicates - Number of replicates.
+        seed - Seed for the random number generator.
+
+    returns:
+        Array of replicate spectra, one per row.
+    """
+
+    random = np.random.RandomState(seed)
+    samRadiance = np.asarray(samRadiance, np.float64)
+
+    return samRadiance + np.asarray(sigma) * random.randn(replicates,
+        len(samRadiance))
+
+def bootstrapReplicates(scans, replicates=200, seed=0):
+    """Make replicates of a coadded spectrum by resampling its scans with
+    replacement.  Each replicate is a weighted sum of the scans, so every
+    replicate is formed by one matrix product.
+
+    arguments:
+        scans - Array of calibrated scans, one per row.
+        replicates - Number of replicates.
+        seed - Seed for the random number generator.
+
+    returns:
+        Array of replicate spectra, one per row.
+    """
+
+    random = np.random.RandomState(seed)
+    scans = np.asarray(scans, np.float64)
+    count = len(scans)
+
+    draws = random.randint(0, count, (replicates, count))
+    weights = np.zeros((replicates, count))
+    np.add.at(weights, (np.arange(replicates)[:, np.newaxis], draws), 1.0)
+
+    return weights.dot(scans) / count
+
+def replicateTemperatures(samReplicates, dwrRadiance, wavelength, lowerTemp,
+        upperTemp, technique, dtype=np.float64, blockBytes=BLOCK_BYTES):
+    """Recover the temperature of every replicate of a sample.
+
+    arguments:
+        samReplicates - Array of replicate sample spectra, one per row.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        technique - Technique dictionary as taken by
+            tes_compare.compareTechniques.  A hybrid technique also holds
+            the waterband technique dictionary of its seed as 'seed', and
+            the half width of the band searched around the seed (K) as
+            'searchBand'.
+        dtype - NumPy floating point type to compute in.
+        blockBytes - Largest stacked emissivity surface evaluated at once.
+
+    returns:
+        Array with the temperature of each replicate (K).
+    """
+
+    temps = tes_search.temperatureGrid(lowerTemp, upperTemp)
+
+    # temperature band of each replicate, from its own seed as in
+    # tes_hybrid.seededSearch
+    bands = None
+    if 'seed' in technique:
+        seeds = replicateTemperatures(samReplicates, dwrRadiance, wavelength,
+            lowerTemp, upperTemp, technique['seed'], dtype, blockBytes)
+        bands = np.column_stack([
+            np.maximum(lowerTemp, seeds - technique['searchBand']),
+            np.minimum(upperTemp, seeds + technique['searchBand'])])
+        bands[bands[:, 0] >= bands[:, 1]] = [lowerTemp, upperTemp]
+
+    waveIndex = WavelengthIndex(wavelength)
+    part = waveIndex.slice(technique['lowerWave'], technique['upperWave'])
+    order = slice(None, None, -1) if waveIndex.descending else slice(None)
+
+    partWave = np.asarray(wavelength)[part][order]
+    samPart = np.asarray(samReplicates)[:, part][:, order]
+    if dwrRadiance is None:
+        dwrPart = np.zeros(len(partWave), dtype)
+    else:
+        dwrPart = np.asarray(dwrRadiance, dtype)[part][order]
+
+    # the Planck table is shared by every replicate
+    denominator = tes_search.planck(temps, partWave, dtype) - dwrPart
+
+    # the window metrics hold a curve per window position and width
+    perReplicate = denominator.nbytes
+    if technique['metric'] == 'window':
+        perReplicate += (len(partWave) * len(technique['widths']) *
+            len(temps) * np.dtype(np.float64).itemsize)
+
+    rows = max(1, blockBytes // perReplicate)
+    temperatures = []
+
+    for start in range(0, len(samPart), rows):
+        block = np.asarray(samPart[start:start+rows], dtype) - dwrPart
+
+        # replicates stacked along the temperature axis of one surface
+        surface = (block[:, np.newaxis, :] / denominator).reshape(-1,
+            len(partWave))
+
+        temperatures.append(_blockTemperatures(surface, partWave, temps,
+            len(block), technique, None if bands is None else
+            bands[start:start+rows]))
+
+    return np.concatenate(temperatures)
+
+def temperatureUncertainty(samReplicates, dwrRadiance, wavelength, lowerTemp,
+        upperTemp, technique, confidence=0.95, dtype=np.float64,
+        method='noise'):
+    """Summarize the temperatures recovered from replicates of a sample.
+
+    arguments:
+        samReplicates - Array of replicate sample spectra, one per row, from
+            noiseReplicates or bootstrapReplicates.
+        dwrRadiance - Calibrated downwelling radiance, or None.
+        wavelength - Array of wavelengths (microns).
+        lowerTemp - Lower temperature limit (K).
+        upperTemp - Upper temperature limit (K).
+        technique - Technique dictionary as taken by
+            tes_compare.compareTechniques.
+        confidence - Confidence level of the interval.
+        dtype - NumPy floating point type to compute in.
+        method - How the replicates were made, 'noise' or 'bootstrap'.
+
+    returns:
+        An Uncertainty.
+    """
+
+    return Uncertainty(replicateTemperatures(samReplicates, dwrRadiance,
+        wavelength, lowerTemp, upperTemp, technique, dtype), confidence,
+        method)
+
+def _blockTemperatures(surface, wavelength, temps, count, technique,
+        bands=None):
+    """Temperatures of a block of replicates from their stacked surface,
+    each searched within its own temperature band if bands are given and
+    over all temperatures if its minimum lies on an inner band edge.
+    """
+
+    if technique['metric'] == 'waterband':
+        metric = tes_search.waterbandMetric(surface, slice(None))
+        metric = metric.reshape(count, len(temps))
+    elif technique['metric'] == 'smoothness':
+        metric = tes_search.smoothnessMetric(surface, slice(None))
+        metric = metric.reshape(count, len(temps))
+    else:
+        metric, bounds = tes_search.windowMetrics(surface, wavelength,
+            technique['widths'])
+        if len(metric) == 0:
+            return np.zeros(count)
+        metric = metric.reshape(len(metric), count, len(temps))
+
+    def _estimate(metric):
+        if metric.ndim == 2:
+            return temps[np.argmin(metric, axis=1)]
+
+        # selectWindows for every replicate at once
+        chosen = np.argsort(np.min(metric, axis=2), axis=0,
+            kind='mergesort')[:technique.get('numWindows', 1)]
+        return np.mean(temps[np.argmin(metric[chosen, np.arange(count)],
+            axis=2)], axis=0)
+
+    estimates = _estimate(metric)
+    if bands is None:
+        return estimates
+
+    lower, upper = bands[:, 0:1], bands[:, 1:2]
+    inside = (temps >= lower - 1e-6) & (temps <= upper + 1e-6)
+    banded = _estimate(np.where(inside, metric, np.inf))
+
+    step = temps[1] - temps[0] if len(temps) > 1 else 1.0
+    atEdge = (((banded < lower[:, 0] + step/2) & (lower[:, 0] > temps[0])) |
+        ((banded > upper[:, 0] - step/2) & (upper[:, 0] < temps[-1])))
+
+    return np.where(atEdge, estimates, banded)
@@ -0,0 +1,101 @@
+"""Tests that the journal survives interrupted runs.
+
+title:              test_checkpoint
+
+date:               October 2026
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from checkpoint import Journal, workKey, arrayDigest
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_entries_reloaded(self):
+        with Journal(self.path) as journal:
+            journal.record('a', x=1)
+            journal.recordAll([('b', {'x': 2}), ('c', {'x': 3})])
+
+        with Journal(self.path) as journal:
+            self.assertTrue(all(journal.done(key) for key in 'abc'))
+            self.assertEqual(journal.state('b')['x'], 2)
+            self.assertIsNone(journal.state('d'))
+
+    def test_record_after_truncated_line(self):
+        with Journal(self.path) as journal:
+            journal.record('a', x=1)
+
+        # a crash in the middle of writing the entry of 'b'
+        with open(self.path, 'a') as f:
+            f.write('{"key": "b", "x"')
+
+        with Journal(self.path) as journal:
+            self.assertFalse(journal.done('b'))
+            journal.record('c', x=3)
+
+        with Journal(self.path) as journal:
+            self.assertTrue(journal.done('a'))
+            self.assertTrue(journal.done('c'))
+            self.assertEqual(journal.state('c')['x'], 3)
+
+        with open(self.path) as f:
+            for line in f:
+                json.loads(line)
+
+    def test_truncated_only_line(self):
+        with open(self.path, 'w') as f:
+            f.write('{"key": "a"')
+
+        with Journal(self.path) as journal:
+            journal.record('b')
+
+        with Journal(self.path) as journal:
+            self.assertEqual(sorted(journal.entries), ['b'])
+
+    def test_lines_without_key_skipped(self):
+        with open(self.path, 'w') as f:
+            f.write('{"x": 1}\n[1, 2]\n{"key": "a"}\n')
+
+        with Journal(self.path) as journal:
+            self.assertEqual(sorted(journal.entries), ['a'])
+
+    def test_work_key_stable(self):
+        self.assertEqual(workKey('sam', {'b': 1, 'a': 2}),
+            workKey('sam', {'a': 2, 'b': 1}))
+        self.assertNotEqual(workKey('sam', 1), workKey('sam', 2))
+
+    def test_work_key_covers_whole_arrays(self):
+        # the text of these arrays is abbreviated to the same string
+        first = np.zeros(5000)
+        second = first.copy()
+        second[2500] = 1
+
+        self.assertEqual(str(first), str(second))
+        self.assertNotEqual(workKey('sam', first), workKey('sam', second))
+        self.assertEqual(workKey('sam', first), workKey('sam', first.copy()))
+
+    def test_array_digest(self):
+        values = np.arange(6, dtype=np.float64)
+
+        self.assertEqual(arrayDigest(values), arrayDigest(list(values)))
+        self.assertEqual(arrayDigest(values[::2]),
+            arrayDigest(values[::2].copy()))
+        self.assertNotEqual(arrayDigest(values),
+            arrayDigest(values.reshape(2, 3)))
+        self.assertNotEqual(arrayDigest(values),
+            arrayDigest(values.astype(np.float32)))
+
+if __name__ == '__main__':
+    unittest.main()
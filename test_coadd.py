@@ -0,0 +1,74 @@
+"""Tests that the single pass coadd matches the statistics of all scans.
+
+title:              test_coadd
+
+date:               October 2026
+"""
+
+import unittest
+import numpy as np
+
+from coadd import CoaddAccumulator, coaddScans
+
+class CoaddTest(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.scans = 100 + random.randn(9, 50)
+
+    def _check(self, accumulator, scans):
+        self.assertEqual(accumulator.count, len(scans))
+        np.testing.assert_allclose(accumulator.mean, np.mean(scans, axis=0),
+            rtol=1e-12)
+        np.testing.assert_allclose(accumulator.variance(),
+            np.var(scans, axis=0, ddof=1), rtol=1e-9)
+        np.testing.assert_allclose(accumulator.stderr(),
+            np.std(scans, axis=0, ddof=1) / np.sqrt(len(scans)), rtol=1e-9)
+
+    def test_streamed_statistics(self):
+        self._check(coaddScans(iter(self.scans)), self.scans)
+
+    def test_merge(self):
+        for split in [1, 4, 8]:
+            first = coaddScans(self.scans[:split])
+            first.merge(coaddScans(self.scans[split:]))
+
+            self._check(first, self.scans)
+
+    def test_merge_empty(self):
+        accumulator = coaddScans(self.scans)
+        accumulator.merge(CoaddAccumulator())
+        self._check(accumulator, self.scans)
+
+        empty = CoaddAccumulator()
+        empty.merge(coaddScans(self.scans))
+        self._check(empty, self.scans)
+
+    def test_single_scan_has_no_variance(self):
+        accumulator = coaddScans(self.scans[:1])
+
+        np.testing.assert_array_equal(accumulator.variance(),
+            np.zeros(50))
+        self.assertEqual(accumulator.toleranceStatistic(), 1.0)
+
+    def test_tolerance_statistic(self):
+        accumulator = coaddScans(self.scans)
+        std = np.std(self.scans, axis=0, ddof=1)
+        mean = np.mean(self.scans, axis=0)
+
+        self.assertAlmostEqual(accumulator.toleranceStatistic(),
+            1 - np.mean(std / mean))
+
+        wavelength = np.linspace(7.0, 15.0, 50)
+        inside = (wavelength >= 8.0) & (wavelength <= 14.0)
+        self.assertAlmostEqual(accumulator.toleranceStatistic(8.0, 14.0,
+            wavelength), 1 - np.mean(std[inside] / mean[inside]))
+
+    def test_mismatched_scan(self):
+        accumulator = coaddScans(self.scans)
+
+        with self.assertRaises(ValueError):
+            accumulator.add(np.ones(49))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Tests that the compiled kernels reproduce the NumPy emissivity search.
+
+title:              test_kernels
+
+date:               October 2026
+"""
+
+import unittest
+import numpy as np
+
+import tes_search
+import tes_kernels
+
+def _spectra(temp=300.0, samples=2000, seed=0):
+    """Create a synthetic sample and downwelling spectrum, the downwelling
+    carrying fine structure so the metrics have a distinct minimum.
+    """
+
+    random = np.random.RandomState(seed)
+
+    wavelength = np.linspace(7.0, 15.0, samples)
+    emissivity = 0.95 - 0.15 * np.exp(-((wavelength - 9.2) / 0.4)**2)
+
+    dwrRadiance = ((0.5 + 0.4 * random.rand(samples)**4) *
+        tes_search.planck(265.0, wavelength)[0])
+    samRadiance = (emissivity * tes_search.planck(temp, wavelength)[0] +
+        (1 - emissivity) * dwrRadiance)
+
+    samRadiance *= 1 + 1e-4 * random.randn(samples)
+
+    return wavelength, samRadiance, dwrRadiance
+
+def _outputs(samRadiance, dwrRadiance, wavelength, temps, dtype):
+    """Evaluate every kernel backed function of tes_search with the current
+    backend.
+    """
+
+    surface = tes_search.emissivitySurface(samRadiance, dwrRadiance,
+        wavelength, temps, dtype)
+
+    return [surface,
+        tes_search.waterbandMetric(surface, slice(100, 300)),
+        tes_search.smoothnessMetric(surface, slice(100, 1500)),
+        tes_search.curvatureSums(surface)]
+
+@unittest.skipUnless(tes_kernels.available, 'Numba is not installed')
+class KernelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.wavelength, self.samRadiance, self.dwrRadiance = _spectra()
+        self.temps = tes_search.temperatureGrid(280.0, 320.0)
+
+    def tearDown(self):
+        tes_kernels.useKernels(True)
+
+    def _compare(self, dtype):
+        """Outputs of the NumPy and the compiled backend.
+        """
+
+        results = []
+        for flag in [False, True]:
+            self.assertEqual(tes_kernels.useKernels(flag), flag)
+            results.append(_outputs(self.samRadiance, self.dwrRadiance,
+                self.wavelength, self.temps, dtype))
+
+        return results
+
+    def test_double_precision_matches(self):
+        reference, compiled = self._compare(np.float64)
+
+        for expected, actual in zip(reference, compiled):
+            self.assertEqual(actual.shape, expected.shape)
+            np.testing.assert_allclose(actual, expected, rtol=1e-9,
+                atol=1e-12 * np.max(np.abs(expected)))
+
+    def test_single_precision_temperature_matches(self):
+        reference, compiled = self._compare(np.float32)
+
+        self.assertEqual(compiled[0].dtype, np.float32)
+        for expected, actual in zip(reference[1:3], compiled[1:3]):
+            self.assertEqual(tes_search.bestTemperature(self.temps, actual),
+                tes_search.bestTemperature(self.temps, expected))
+
+    def test_window_metrics_match(self):
+        widths = tes_search.windowWidths(0.5, 2.0, 0.5)
+        index = slice(125, 1625)
+
+        results = []
+        for flag in [False, True]:
+            tes_kernels.useKernels(flag)
+            surface = tes_search.emissivitySurface(self.samRadiance[index],
+                self.dwrRadiance[index], self.wavelength[index], self.temps)
+            results.append(tes_search.windowMetrics(surface,
+                self.wavelength[index], widths))
+
+        (expected, expectedBounds), (actual, actualBounds) = results
+        np.testing.assert_array_equal(actualBounds, expectedBounds)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9,
+            atol=1e-12 * np.max(np.abs(expected)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Tests of the cached resampling of spectra between wavelength grids.
+
+title:              test_regrid
+
+date:               October 2026
+"""
+
+import unittest
+import numpy as np
+
+import regrid
+
+class _Spectrum(object):
+
+    def __init__(self, wavelength, value):
+        self.wavelength = wavelength
+        self.value = value
+
+class _Measurement(object):
+
+    def __init__(self, wavelength, value):
+        self.spectrum = _Spectrum(wavelength, value)
+
+class RegridTest(unittest.TestCase):
+
+    def setUp(self):
+        regrid.clearCache()
+        self.source = np.linspace(7.0, 15.0, 801)
+
+    def test_fine_target_interpolated(self):
+        target = np.linspace(8.0, 9.0, 1001)
+
+        np.testing.assert_allclose(regrid.regrid(2 * self.source + 1,
+            self.source, target), 2 * target + 1, rtol=1e-12)
+
+    def test_descending_grids(self):
+        target = np.linspace(9.0, 8.0, 1001)
+
+        np.testing.assert_allclose(regrid.regrid(self.source**2,
+            self.source, target), regrid.regrid(self.source[::-1]**2,
+            self.source[::-1], target), rtol=1e-12)
+
+    def test_coarse_target_averages(self):
+        source = np.arange(100, dtype=np.float64)
+        values = np.random.RandomState(0).rand(100)
+        target = regrid.binnedGrid(source, 10.0)
+
+        binned = regrid.regrid(values, source, target)
+
+        # bins of 10 centred on 5, 15, ..., each averaging the samples from
+        # edge to edge
+        np.testing.assert_array_equal(target, 5 + 10 * np.arange(9))
+        self.assertAlmostEqual(binned[1], np.mean(values[10:21]))
+        self.assertAlmostEqual(binned[8], np.mean(values[80:91]))
+
+    def test_same_grid_unchanged(self):
+        values = np.arange(len(self.source), dtype=np.float64)
+
+        self.assertIs(regrid.regrid(values, self.source,
+            self.source.copy()), values)
+
+    def test_stacked_spectra(self):
+        target = np.linspace(8.0, 14.0, 100)
+        values = np.vstack([self.source, 2 * self.source])
+
+        resampled = regrid.regrid(values, self.source, target)
+
+        self.assertEqual(resampled.shape, (2, 100))
+        np.testing.assert_allclose(resampled[1], 2 * resampled[0])
+
+    def test_cache_reused(self):
+        target = np.linspace(8.0, 14.0, 100)
+
+        first = regrid.regridder(self.source, target)
+        self.assertIs(regrid.regridder(self.source.copy(), target.copy()),
+            first)
+
+    def test_match_grid(self):
+        target = np.linspace(8.0, 14.0, 1201)
+        data = _Measurement(self.source, 3 * self.source)
+
+        self.assertIs(regrid.matchGrid(data, target), data)
+        np.testing.assert_array_equal(data.spectrum.wavelength, target)
+        np.testing.assert_allclose(data.spectrum.value, 3 * target)
+        self.assertIsNone(regrid.matchGrid(None, target))
+
+    def test_match_grid_refuses_uncovered_grid(self):
+        data = _Measurement(self.source, np.ones(len(self.source)))
+
+        with self.assertRaises(ValueError):
+            regrid.matchGrid(data, np.linspace(6.0, 14.0, 100))
+
+        # the measurement is left as it was
+        self.assertIs(data.spectrum.wavelength, self.source)
+
+    def test_outside_is_nan(self):
+        resampled = regrid.regrid(np.ones(len(self.source)), self.source,
+            np.array([6.0, 10.0, 16.0]))
+
+        self.assertTrue(np.isnan(resampled[0]) and np.isnan(resampled[2]))
+        self.assertAlmostEqual(resampled[1], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
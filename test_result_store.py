@@ -0,0 +1,111 @@
+"""Tests of the chunked result store, including results pending in a chunk.
+
+title:              test_result_store
+
+date:               October 2026
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from result_store import ResultWriter, ResultStore, PENDING_DIRECTORY
+
+def _append(writer, i):
+    """Append a result whose values are derived from its number.
+    """
+
+    wavelength = np.linspace(8.0, 14.0, 10 + i)
+
+    return writer.append(300.0 + i, wavelength, np.full(len(wavelength),
+        0.9), np.arange(i + 3, dtype=np.float64), 250.0, 350.0,
+        {'key': str(i)})
+
+class ResultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _check(self, store, count):
+        self.assertEqual(len(store), count)
+        self.assertEqual([p['key'] for p in store.provenance()],
+            [str(i) for i in range(count)])
+        np.testing.assert_array_equal(store.temperatures(),
+            300.0 + np.arange(count))
+
+        for i, result in enumerate(store):
+            self.assertEqual(result.temperature, 300.0 + i)
+            self.assertEqual(len(result.wavelength), 10 + i)
+            self.assertEqual(len(result.emissivity), 10 + i)
+            self.assertEqual(len(result.metric), i + 3)
+            self.assertEqual((result.lowerTemp, result.upperTemp),
+                (250.0, 350.0))
+
+    def test_chunks_written_and_read(self):
+        with ResultWriter(self.path, chunkSize=3) as writer:
+            written = [_append(writer, i) for i in range(7)]
+
+        self.assertEqual([len(w) for w in written], [0, 0, 3, 0, 0, 3, 0])
+
+        store = ResultStore(self.path)
+        self.assertEqual(len(store.chunks), 3)
+        self._check(store, 7)
+        self.assertFalse(os.path.isdir(os.path.join(self.path,
+            PENDING_DIRECTORY)))
+
+    def test_opening_maps_nothing(self):
+        with ResultWriter(self.path, chunkSize=2) as writer:
+            for i in range(4):
+                _append(writer, i)
+
+        store = ResultStore(self.path)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store._loaded, {})
+
+        self.assertEqual(store[3].temperature, 303.0)
+        self.assertEqual(len(store._loaded), 1)
+
+    def test_pending_results_read_and_resumed(self):
+        writer = ResultWriter(self.path, chunkSize=4)
+        for i in range(6):
+            _append(writer, i)
+
+        # the writer is never closed, as after a crash
+        self._check(ResultStore(self.path), 6)
+
+        writer = ResultWriter(self.path, chunkSize=4)
+        self.assertEqual([p['key'] for p in writer.pending()], ['4', '5'])
+        _append(writer, 6)
+        writer.close()
+
+        store = ResultStore(self.path)
+        self.assertEqual(len(store.chunks), 2)
+        self._check(store, 7)
+
+    def test_indexing(self):
+        with ResultWriter(self.path, chunkSize=2) as writer:
+            for i in range(5):
+                _append(writer, i)
+
+        store = ResultStore(self.path)
+        self.assertEqual(store[-1].temperature, 304.0)
+        self.assertEqual(store[-5].temperature, 300.0)
+        self.assertEqual(store[2].temperature, 302.0)
+
+        for index in [5, -6]:
+            with self.assertRaises(IndexError):
+                store[index]
+
+    def test_empty_store(self):
+        store = ResultStore(self.path)
+        self.assertEqual(len(store), 0)
+        self.assertEqual(len(store.temperatures()), 0)
+        self.assertEqual(list(store), [])
+
+if __name__ == '__main__':
+    unittest.main()
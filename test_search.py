@@ -0,0 +1,52 @@
+"""Tests that the blackbody radiance of the array search agrees with
+bb_radiance, which tes.tes and the final emissivity use.
+
+title:              test_search
+
+date:               October 2026
+"""
+
+import unittest
+import numpy as np
+
+import tes_search
+
+try:
+    from bb_radiance import bbRadiance
+except ImportError:
+    bbRadiance = None
+
+# CODATA 2018 values of the speed of light, Planck and Boltzmann constants
+SPEED_OF_LIGHT = 299792458.0
+PLANCK_CONSTANT = 6.62607015e-34
+BOLTZMANN_CONSTANT = 1.380649e-23
+
+class PlanckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.wavelength = np.linspace(7.0, 15.0, 200)
+        self.temps = np.array([250.0, 300.0, 350.0])
+
+    def test_constants(self):
+        # radiance in W/m^2/sr/micron with wavelength in microns
+        c1 = 2 * PLANCK_CONSTANT * SPEED_OF_LIGHT**2 * 1e24
+        c2 = PLANCK_CONSTANT * SPEED_OF_LIGHT / BOLTZMANN_CONSTANT * 1e6
+
+        np.testing.assert_allclose(tes_search.C1, c1, rtol=1e-6)
+        np.testing.assert_allclose(tes_search.C2, c2, rtol=1e-5)
+
+    def test_float32_agrees(self):
+        np.testing.assert_allclose(
+            tes_search.planck(self.temps, self.wavelength, np.float32),
+            tes_search.planck(self.temps, self.wavelength), rtol=1e-5)
+
+    @unittest.skipIf(bbRadiance is None, 'bb_radiance is not installed')
+    def test_bb_radiance_agrees(self):
+        radiance = tes_search.planck(self.temps, self.wavelength)
+
+        for i, temp in enumerate(self.temps):
+            np.testing.assert_allclose(radiance[i],
+                bbRadiance(temp, self.wavelength), rtol=1e-5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Index over the wavelength grid of a spectrum, used to map wavelength ranges
+in microns onto contiguous slices of the spectral arrays.
+
+title:              wave_index
+
+date:               October 2026
+"""
+
+import numpy as np
+
+class WavelengthIndex(object):
+    """A wavelength grid index built once per spectrum.  Ranges are located
+    with a binary search of the grid and returned as slices, so every
+    consumer works on views of the spectral arrays rather than on boolean
+    masks and copies.
+    """
+
+    def __init__(self, wavelength):
+        """Constructor for the wavelength index.
+
+        arguments:
+            wavelength - Monotonic wavelength grid of the spectrum (microns),
+                either ascending or descending.
+        """
+
+        self.wavelength = np.asarray(wavelength)
+        self.size = len(self.wavelength)
+
+        # spectra derived from wavenumber are stored in descending order, so
+        # search on an ascending view of the grid and map the result back
+        self.descending = (self.size > 1 and
+            self.wavelength[0] > self.wavelength[-1])
+
+        if self.descending:
+            self._ascending = self.wavelength[::-1]
+        else:
+            self._ascending = self.wavelength
+
+        self._slices = {}
+
+    def slice(self, lowerWave, upperWave):
+        """Find the contiguous slice of the grid that lies within a wavelength
+        range.
+
+        arguments:
+            lowerWave - Lower wavelength limit (microns).
+            upperWave - Upper wavelength limit (microns).
+
+        returns:
+            A slice object selecting every sample with a wavelength between
+            the limits, inclusive.
+        """
+
+        key = (float(lowerWave), float(upperWave))
+
+        if key not in self._slices:
+            lower, upper = min(key), max(key)
+
+            start = int(np.searchsorted(self._ascending, lower, 'left'))
+            stop = int(np.searchsorted(self._ascending, upper, 'right'))
+
+            if self.descending:
+                start, stop = self.size - stop, self.size - start
+
+            self._slices[key] = slice(start, stop)
+
+        return self._slices[key]
+
+    def view(self, values, lowerWave, upperWave):
+        """Return a view of an array on this grid restricted to a wavelength
+        range.
+
+        arguments:
+            values - Array sampled on this wavelength grid.  The wavelength
+                axis must be the last axis.
+            lowerWave - Lower wavelength limit (microns).
+            upperWave - Upper wavelength limit (microns).
+
+        returns:
+            A view of the array over the requested wavelength range.
+        """
+
+        return np.asarray(values)[..., self.slice(lowerWave, upperWave)]
+
+    def bands(self, wave):
+        """Convert a list of wavelength bands into slices.
+
+        arguments:
+            wave - List of [lower, upper] wavelength pairs (microns), as
+                returned by the temperature emissivity separation techniques.
+
+        returns:
+            A list of slice objects, one per band.
+        """
+
+        return [self.slice(band[0], band[1]) for band in wave]
+
+    def limits(self, lowerWave, upperWave):
+        """Find the wavelengths of the grid samples at the edges of a range.
+
+        arguments:
+            lowerWave - Lower wavelength limit (microns).
+            upperWave - Upper wavelength limit (microns).
+
+        returns:
+            The lower and upper wavelengths actually covered by the range on
+            this grid, or None if the range contains no samples.
+        """
+
+        covered = self.wavelength[self.slice(lowerWave, upperWave)]
+
+        if len(covered) == 0:
+            return None
+
+        return min(covered[0], covered[-1]), max(covered[0], covered[-1])